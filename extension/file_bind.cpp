@@ -190,6 +190,94 @@ PyCHGInfo load(string name)
     return pyinfo;
 }
 
+inline double fast_strtod(const char *begin, char **end)
+{
+    // exact fast path for the plain decimals (e.g., 0.12345678): mantissa <= 2^53 divided by an exact power of ten,
+    // the other forms (exponent, long mantissa) fall back to strtod
+    static const double pow10[] = {1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11,
+                                   1e12, 1e13, 1e14, 1e15, 1e16, 1e17, 1e18, 1e19, 1e20, 1e21, 1e22};
+    const char *p = begin;
+    while (*p == ' ' || *p == '\t')
+    {
+        p++;
+    }
+    bool negative = (*p == '-');
+    if (*p == '-' || *p == '+')
+    {
+        p++;
+    }
+    uint64_t mantissa = 0;
+    int digits = 0, decimals = 0;
+    while (*p >= '0' && *p <= '9')
+    {
+        mantissa = mantissa * 10 + (*p++ - '0');
+        digits++;
+    }
+    if (*p == '.')
+    {
+        p++;
+        while (*p >= '0' && *p <= '9')
+        {
+            mantissa = mantissa * 10 + (*p++ - '0');
+            digits++;
+            decimals++;
+        }
+    }
+    if (digits == 0 || digits > 15 || *p == 'e' || *p == 'E' || *p == 'd' || *p == 'D')
+    {
+        return strtod(begin, end);
+    }
+    *end = (char *)p;
+    double value = (double)mantissa / pow10[decimals];
+    return negative ? -value : value;
+}
+
+py::array_t<double> read_frames(string name, py::array_t<int64_t> starts, int skip, int nline, int ncol)
+{
+    auto start = starts.unchecked<1>();
+    py::array_t<double> frames({(py::ssize_t)start.shape(0), (py::ssize_t)(nline * ncol)});
+    auto data = frames.mutable_unchecked<2>();
+    {
+        py::gil_scoped_release release;
+        ifstream trajfile(name, ios::in | ios::binary);
+        if (!trajfile.is_open())
+        {
+            throw runtime_error("file open failure");
+        }
+
+        string line;
+        for (py::ssize_t i = 0; i < start.shape(0); i++)
+        {
+            trajfile.clear();
+            trajfile.seekg(start(i));
+            for (int j = 0; j < skip; j++)
+            {
+                getline(trajfile, line);
+            }
+            for (int j = 0; j < nline; j++)
+            {
+                if (!getline(trajfile, line))
+                {
+                    throw runtime_error("unexpected end of file");
+                }
+                const char *begin = line.c_str();
+                char *end;
+                for (int k = 0; k < ncol; k++)
+                {
+                    data(i, j * ncol + k) = fast_strtod(begin, &end);
+                    if (end == begin)
+                    {
+                        throw runtime_error("invalid number: " + line);
+                    }
+                    begin = end;
+                }
+            }
+        }
+        trajfile.close();
+    }
+    return frames;
+}
+
 PYBIND11_MODULE(file_bind, m)
 {
     m.doc() = "pybind11 <file> module";
@@ -202,4 +290,5 @@ PYBIND11_MODULE(file_bind, m)
 
     m.def("to_grd", &to_grd, "A C++ function to transform CHGCAR_mag to *.grd file");
     m.def("load", &load, "A C++ function to load CHGBase file");
+    m.def("read_frames", &read_frames, "A C++ function to read the numbers of many frames by their byte offsets");
 }
\ No newline at end of file
@@ -155,6 +155,7 @@ class Atom(object):
         number (int): atomic number
         period (int): atomic period in element period table
         group (int): atomic group in element period table
+        mass (float): atomic mass, unit: amu
         color (str): atomic color using RGB
         order (int): atomic order in <Structure class>, default: 0
         frac_coord (np.ndarray): fractional coordinates
@@ -173,7 +174,7 @@ class Atom(object):
     """
 
     _config_file = Path(f"{RootDir}/element.yaml")
-    _attributes_yaml = ['number', 'period', 'group', 'color', '_default_bonds']
+    _attributes_yaml = ['number', 'period', 'group', 'mass', 'color', '_default_bonds']
     _load = False
     _attrs = None
 
@@ -192,7 +193,7 @@ class Atom(object):
         self.spin = spin
 
         # config atom from `element.yaml`
-        self.number, self.period, self.group, self.color, self._default_bonds = (None, None, None, None, [])
+        self.number, self.period, self.group, self.mass, self.color, self._default_bonds = (None,) * 5 + ([],)
         self.__initialize_attrs()
 
         # atom_type property
@@ -297,6 +298,7 @@ class Atoms(Atom):
             number:                 atomic number, <list>
             period:                 atomic period in element period table, <list>
             group:                  atomic group in element period table, <list>
+            mass:                   atomic mass (amu), <list>
             color:                  atomic color using RGB, <list>
             order:                  atomic order in <Structure class>, default: <list(range(len(formula)))>
             frac_coord:             fractional coordinates, <list>
@@ -78,7 +78,14 @@ R_gas = constants.R  # Gas Constant: 8.3144598 J*mol⁻¹*K⁻¹
 l_s = constants.c  # Light Speed: 299792458 m * s ⁻¹
 
 
-def thermo_adsorbent(temperature: float = 298.15):
+def thermo_adsorbent(temperature: float = 298.15, frequency=None):
+    """
+    Calculate the thermo correction for adsorbent (harmonic approximation)
+
+    Args:
+        temperature (float): temperature, unit: K
+        frequency (namedtuple): frequencies to use, e.g., from OUTCAR.normal_modes, default: OUTCAR.frequency
+    """
     beta = 1 / (k_b * temperature)
 
     def partition_function(miu):
@@ -90,7 +97,7 @@ def thermo_adsorbent(temperature: float = 298.15):
         entropy = R_gas * pf
         return enthalpy, entropy
 
-    frequency = OUTCAR("OUTCAR").frequency
+    frequency = OUTCAR("OUTCAR").frequency if frequency is None else frequency
     w_number_list, v_energy_list = list(map(list,
                                             zip(*[(frequency.wave_number[index], frequency.vib_energy[index])
                                                   for index, freq in enumerate(frequency.image) if not freq])))
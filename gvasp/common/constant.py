@@ -37,6 +37,11 @@ HIGH_SYM = {"G": [0.00000, 0.00000, 0.00000],
             "R": [0.00000, 0.50000, 0.50000],
             "A": [0.50000, 0.50000, 0.50000], }
 
+# unit conversion of the mass-weighted Hessian eigenvalues
+EV_ANGSTROM2_AMU = 9.648533212E27  # eV/(Å^2*amu) -> s^-2
+LIGHT_SPEED_CM = 2.99792458E10  # cm/s
+PLANCK_EV = 4.135667696E-15  # eV*s
+
 LOGO = """
   ______     __              
  / ___\ \   / /_ _ ___ _ __  
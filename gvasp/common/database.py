@@ -0,0 +1,220 @@
+import logging
+import os
+import sqlite3
+from pathlib import Path
+
+from gvasp.common.file import OUTCAR
+
+logger = logging.getLogger(__name__)
+
+TRACK_FILES = ("OUTCAR", "CONTCAR", "INCAR")
+
+
+class ResultIndex(object):
+    """
+    Persistent SQLite index of the calculation results in a project tree
+
+    Each directory that holds an OUTCAR is recorded with the fingerprint (size, mtime) of its OUTCAR/CONTCAR/INCAR
+    and a parsed summary, so that `refresh` only re-parses the directories whose files have changed.
+
+    Methods:
+        refresh():          walk the project tree, re-parse the changed directories and drop the vanished ones
+        unfinished():       query the unfinished jobs, optionally filtered by task type
+        lowest_energy():    query the lowest-energy job of each composition
+        query():            run a raw SQL query against the index
+    """
+
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS fingerprint ("
+              "directory TEXT, file TEXT, size INTEGER, mtime INTEGER, PRIMARY KEY (directory, file))",
+              "CREATE TABLE IF NOT EXISTS result ("
+              "directory TEXT PRIMARY KEY, task TEXT, formula TEXT, natoms INTEGER, energy REAL, force REAL, "
+              "mag REAL, ionic_steps INTEGER, finish INTEGER)",
+              "CREATE INDEX IF NOT EXISTS result_formula ON result (formula)",
+              "CREATE INDEX IF NOT EXISTS result_task ON result (task, finish)")
+
+    def __init__(self, root=".", name=".gvasp.db"):
+        """
+        Args:
+            root (str): root directory of the project
+            name (str): name of the database file, relative paths are placed under the root directory
+        """
+        self.root = Path(root).absolute()
+        self.name = Path(name) if Path(name).is_absolute() else self.root / name
+        self.connection = sqlite3.connect(self.name)
+        for sql in self.SCHEMA:
+            self.connection.execute(sql)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _walk(self):
+        """yield the directories (relative to root) which contain an OUTCAR file"""
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(item for item in dirnames if not item.startswith("."))
+            if "OUTCAR" in filenames:
+                yield Path(directory).relative_to(self.root).as_posix()
+
+    def _fingerprint(self, directory):
+        fingerprint = {}
+        for file in TRACK_FILES:
+            try:
+                stat = (self.root / directory / file).stat()
+            except FileNotFoundError:
+                continue
+            fingerprint[file] = (stat.st_size, stat.st_mtime_ns)
+        return fingerprint
+
+    def _stored_fingerprint(self, directory):
+        rows = self.connection.execute("SELECT file, size, mtime FROM fingerprint WHERE directory = ?", (directory,))
+        return {file: (size, mtime) for file, size, mtime in rows}
+
+    def refresh(self):
+        """
+        Synchronize the index with the project tree
+
+        Returns:
+            updated (int): number of re-parsed directories
+            removed (int): number of directories dropped from the index
+        """
+        known = {row[0] for row in self.connection.execute("SELECT directory FROM result")}
+        found, updated = set(), 0
+        for directory in self._walk():
+            found.add(directory)
+            fingerprint = self._fingerprint(directory)
+            if directory in known and fingerprint == self._stored_fingerprint(directory):
+                continue
+
+            logger.debug(f"Parse {directory}")
+            summary = self.summary(self.root / directory)
+            self.connection.execute("DELETE FROM fingerprint WHERE directory = ?", (directory,))
+            self.connection.executemany("INSERT INTO fingerprint VALUES (?, ?, ?, ?)",
+                                        [(directory, file, *value) for file, value in fingerprint.items()])
+            self.connection.execute("INSERT OR REPLACE INTO result VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (directory, summary['task'], summary['formula'], summary['natoms'],
+                                     summary['energy'], summary['force'], summary['mag'], summary['ionic_steps'],
+                                     summary['finish']))
+            updated += 1
+
+        removed = known - found
+        self.connection.executemany("DELETE FROM fingerprint WHERE directory = ?", [(item,) for item in removed])
+        self.connection.executemany("DELETE FROM result WHERE directory = ?", [(item,) for item in removed])
+        self.connection.commit()
+        logger.info(f"Index refreshed: {updated} updated, {len(removed)} removed, {len(found)} in total")
+        return updated, len(removed)
+
+    @staticmethod
+    def summary(directory):
+        """
+        Parse the summary of one calculation directory from its OUTCAR/CONTCAR/INCAR
+
+        Args:
+            directory (Path): calculation directory
+
+        Returns:
+            summary (dict): keys: [task, formula, natoms, energy, force, mag, ionic_steps, finish]
+        """
+        summary = {'task': ResultIndex.task_type(directory / "INCAR"), 'formula': None, 'natoms': None,
+                   'energy': None, 'force': None, 'mag': None, 'ionic_steps': None, 'finish': 0}
+
+        try:
+            outcar = OUTCAR(directory / "OUTCAR")
+            summary.update(energy=outcar.last_energy, force=outcar.last_force, mag=outcar.last_mag,
+                           ionic_steps=outcar.steps.ionic[-1] if len(outcar.steps.ionic) else 0,
+                           finish=int(outcar.finish), natoms=len(outcar.element))
+            summary['formula'] = ResultIndex.formula(outcar.element)
+        except Exception as error:  # OUTCAR of a running or crashed job, recorded as unfinished
+            logger.warning(f"{directory}/OUTCAR can't be parsed, recorded as unfinished: {error!r}")
+            summary.update(energy=None, force=None, mag=None, ionic_steps=None, finish=0, natoms=None)
+
+        contcar = directory / "CONTCAR"
+        if contcar.exists() and contcar.stat().st_size:
+            with open(contcar) as f:
+                head = [f.readline() for _ in range(7)]
+            element = sum([[name] * int(count) for name, count in zip(head[5].split(), head[6].split())], [])
+            summary.update(formula=ResultIndex.formula(element), natoms=len(element))
+
+        return summary
+
+    @staticmethod
+    def formula(element):
+        """Reduce an element list to a composition string, e.g., ['Ce', 'Ce', 'O'] -> Ce2O1"""
+        counts = {}
+        for name in element:
+            counts[name] = counts.get(name, 0) + 1
+        return "".join(f"{name}{count}" for name, count in sorted(counts.items()))
+
+    @staticmethod
+    def task_type(incar):
+        """
+        Identify the task type from the INCAR parameters
+
+        Args:
+            incar (Path): path of INCAR
+
+        Returns:
+            task (str): one of [opt, static, freq, md, neb, dimer, con-TS], None if INCAR not exist
+        """
+        if not Path(incar).exists():
+            return None
+
+        params = {}
+        with open(incar) as f:
+            for line in f:
+                line = line.split("#")[0].split("!")[0]
+                if "=" in line:
+                    key, value = line.split("=", 1)
+                    params[key.strip().upper()] = value.strip()
+
+        ibrion, nsw = params.get("IBRION", "-1"), params.get("NSW", "0")
+        if "IMAGES" in params:
+            return "neb"
+        elif params.get("ICHAIN") == "2":
+            return "dimer"
+        elif ibrion in ("5", "6", "7", "8"):
+            return "freq"
+        elif ibrion == "0":
+            return "md"
+        elif nsw in ("0", "1"):
+            return "static"
+        elif Path(incar).with_name("fort.188").exists():
+            return "con-TS"
+        return "opt"
+
+    def unfinished(self, task=None):
+        """
+        Query the unfinished jobs
+
+        Args:
+            task (str): filter by task type, default: all tasks
+
+        Returns:
+            rows (list): [(directory, task, formula, ionic_steps)]
+        """
+        sql = "SELECT directory, task, formula, ionic_steps FROM result WHERE finish = 0"
+        if task is None:
+            return self.query(sql + " ORDER BY directory")
+        return self.query(sql + " AND task = ? ORDER BY directory", (task,))
+
+    def lowest_energy(self, task=None):
+        """
+        Query the lowest-energy job of each composition
+
+        Args:
+            task (str): filter by task type, default: all tasks
+
+        Returns:
+            rows (list): [(formula, directory, energy)]
+        """
+        where = "energy IS NOT NULL" if task is None else "energy IS NOT NULL AND task = ?"
+        return self.query(f"SELECT formula, directory, MIN(energy) FROM result WHERE {where} "
+                          f"GROUP BY formula ORDER BY formula", () if task is None else (task,))
+
+    def query(self, sql, params=()):
+        return self.connection.execute(sql, params).fetchall()
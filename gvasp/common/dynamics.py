@@ -0,0 +1,337 @@
+import logging
+from collections import namedtuple
+from itertools import combinations_with_replacement
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MEMORY = 2 ** 26  # bytes of the temporary arrays of one batch
+
+
+def _lattices(lattice, NFrame):
+    """broadcast a (3, 3) lattice or (NFrame, 3, 3) lattices to shape=(NFrame, 3, 3)"""
+    lattice = np.asarray(getattr(lattice, "matrix", lattice), dtype=float)
+    return np.broadcast_to(lattice, (NFrame, 3, 3))
+
+
+def half_width(lattice):
+    """
+    Half of the smallest perpendicular width of the cells, the largest distance for which the minimum image is unique
+
+    Args:
+        lattice (np.ndarray): shape=(3, 3) or (NFrame, 3, 3)
+
+    Returns:
+        half_width (float): the minimum over all frames
+    """
+    lattice = np.asarray(getattr(lattice, "matrix", lattice), dtype=float).reshape((-1, 3, 3))
+    volume = np.abs(np.linalg.det(lattice))
+    area = np.linalg.norm(np.cross(lattice[:, [1, 2, 0]], lattice[:, [2, 0, 1]]), axis=-1)  # faces of b-c, c-a, a-b
+    return float(np.min(volume[:, None] / area)) / 2
+
+
+class RDFAccumulator(object):
+    """
+    Streaming partial radial distribution functions of all element pairs, the blocks of frames are fed in any order and
+    only the histogram counts and the sum of 1/V are kept between the blocks, so the trajectories larger than RAM can be
+    analyzed chunk by chunk
+
+    All the pair vectors of a batch of frames are computed at once (float32), wrapped by the minimum image in fractional
+    space (exact for the triclinic cells as long as r_max <= half of the smallest perpendicular width) and histogrammed
+    by one `np.bincount` with the pair type as the outer index. The input is sliced before it is cast, so a float32
+    memory-mapped trajectory is never copied as a whole.
+
+    Attributes:
+        r_max (float): cutoff of the distances, default: half of the smallest perpendicular width of the first block
+        bins (int): number of histogram bins
+        batch (int): number of frames computed at once, default: fit the temporary arrays into ~64 MB
+        histogram (np.ndarray): pair counts, shape=(NType, bins)
+        inverse_volume (float): sum over the fed frames of 1/V
+    """
+
+    def __init__(self, element, r_max=None, bins=200, batch=None):
+        self.element, self.r_max, self.bins = list(element), r_max, bins
+
+        self.species = list(dict.fromkeys(self.element))
+        self.kind = np.array([self.species.index(name) for name in self.element])
+        self.types = list(combinations_with_replacement(range(len(self.species)), 2))
+        type_index = np.full((len(self.species), len(self.species)), -1, dtype=int)
+        for index, (a, b) in enumerate(self.types):
+            type_index[a, b] = type_index[b, a] = index
+
+        self.first, self.second = np.triu_indices(len(self.element), k=1)
+        self.pair_type = type_index[self.kind[self.first], self.kind[self.second]]
+        self.batch = max(1, MEMORY // (len(self.first) * 4 * 6)) if batch is None else batch
+
+        self.histogram = np.zeros((len(self.types), bins), dtype=np.int64)
+        self.inverse_volume = 0.
+
+    def __call__(self, frac_coord, lattice):
+        """
+        Accumulate the next block of frames
+
+        Args:
+            frac_coord (np.ndarray): fractional coordinates, shape=(NFrame, NAtom, 3)
+            lattice (np.ndarray): lattice matrix shared by all frames, shape=(3, 3); or of each frame, shape=(NFrame,
+                                  3, 3)
+        """
+        frac_coord = np.asanyarray(frac_coord)  # no copy of the (float32) memmap, each batch is cast below
+        NFrame = len(frac_coord)
+        lattice = _lattices(lattice, NFrame)
+
+        limit = half_width(lattice)
+        self.r_max = limit if self.r_max is None else self.r_max
+        if self.r_max > limit + 1E-08:
+            raise ValueError(f"r_max = {self.r_max} exceeds the half width of the cell ({limit:.4f}), "
+                             f"the minimum image is not unique")
+
+        dr, bins = self.r_max / self.bins, self.bins
+        histogram = self.histogram.reshape(-1)
+        for start in range(0, NFrame, self.batch):
+            # component-major float32 layout: every step below is an element-wise pass over contiguous arrays
+            frac = np.ascontiguousarray(frac_coord[start:start + self.batch].transpose((2, 0, 1)), dtype=np.float32)
+            delta = frac[:, :, self.second]
+            delta -= frac[:, :, self.first]
+            delta -= np.round(delta)
+            matrix = lattice[start:start + self.batch].astype(np.float32)
+            square = np.zeros(delta.shape[1:], dtype=np.float32)
+            for k in range(3):
+                cart = delta[0] * matrix[:, 0, k, None] + delta[1] * matrix[:, 1, k, None] + \
+                       delta[2] * matrix[:, 2, k, None]
+                square += cart * cart
+            index = (np.sqrt(square) / dr).astype(np.int64)
+            inside = index < bins
+            histogram += np.bincount((np.broadcast_to(self.pair_type, index.shape) * bins + index)[inside],
+                                     minlength=histogram.size)
+        self.inverse_volume += float(np.sum(1 / np.abs(np.linalg.det(lattice))))
+
+    def result(self):
+        """
+        Normalize the accumulated counts
+
+        Returns:
+            RDF: namedtuple, (r, g)
+                r:      bin centers, shape=(bins,)
+                g:      dict, {(element_a, element_b): g(r)} and {"total": g(r)}
+        """
+        if not self.inverse_volume:
+            raise ValueError("no frame has been accumulated")
+
+        bins, dr, NAtom = self.bins, self.r_max / self.bins, len(self.element)
+        r = (np.arange(bins) + 0.5) * dr
+        shell = 4 / 3 * np.pi * ((np.arange(bins) + 1) ** 3 - np.arange(bins) ** 3) * dr ** 3
+        count = np.bincount(self.kind, minlength=len(self.species))
+
+        g = {}
+        for index, (a, b) in enumerate(self.types):
+            pairs = count[a] * (count[a] - 1) / 2 if a == b else count[a] * count[b]
+            g[(self.species[a], self.species[b])] = \
+                self.histogram[index] / (pairs * self.inverse_volume * shell) if pairs else np.zeros(bins)
+        g["total"] = self.histogram.sum(axis=0) / (NAtom * (NAtom - 1) / 2 * self.inverse_volume * shell)
+
+        RDF = namedtuple("RDF", ("r", "g"))
+        return RDF(r, g)
+
+
+def rdf(frac_coord, lattice, element, r_max=None, bins=200, batch=None):
+    """
+    Partial radial distribution functions of the whole trajectory at once, see `RDFAccumulator`
+
+    Args:
+        frac_coord (np.ndarray): fractional coordinates, shape=(NFrame, NAtom, 3)
+        lattice (np.ndarray): lattice matrix shared by all frames, shape=(3, 3); or of each frame, shape=(NFrame, 3, 3)
+        element (list): element names of the atoms
+        r_max (float): cutoff of the distances, default: half of the smallest perpendicular width
+        bins (int): number of histogram bins
+        batch (int): number of frames computed at once, default: fit the temporary arrays into ~64 MB
+
+    Returns:
+        RDF: namedtuple, (r, g)
+            r:      bin centers, shape=(bins,)
+            g:      dict, {(element_a, element_b): g(r)} and {"total": g(r)}
+    """
+    accumulator = RDFAccumulator(element, r_max=r_max, bins=bins, batch=batch)
+    accumulator(frac_coord, lattice)
+    return accumulator.result()
+
+
+def autocorrelation(values):
+    """
+    Time autocorrelation by FFT, averaged over the time origins: C(m) = <x(t) . x(t + m)>_t
+
+    Args:
+        values (np.ndarray): shape=(NFrame, NAtom, 3)
+
+    Returns:
+        correlation (np.ndarray): the dot product over the last axis, shape=(NFrame, NAtom)
+    """
+    NFrame = values.shape[0]
+    size = 2 ** int(np.ceil(np.log2(2 * NFrame)))  # zero padding, avoid the circular correlation
+    spectrum = np.fft.rfft(values, n=size, axis=0)
+    correlation = np.fft.irfft(np.abs(spectrum) ** 2, n=size, axis=0)[:NFrame].sum(axis=-1)
+    return correlation / (NFrame - np.arange(NFrame))[:, None]
+
+
+def _batches(NAtom, NFrame):
+    """atom batches of the FFT, fit the spectrum into ~64 MB"""
+    batch = max(1, MEMORY // (4 * NFrame * 3 * 16))
+    return [slice(start, start + batch) for start in range(0, NAtom, batch)]
+
+
+def msd(cart_coord, element, potim=1.0):
+    """
+    Mean-squared displacement by the FFT algorithm, averaged over all time origins
+
+        MSD(m) = 1/(N-m) sum_t [r(t + m) - r(t)]^2 = S1(m) - 2 S2(m),
+
+    where S2 is the position autocorrelation computed by FFT and S1 is accumulated from the squared norms.
+
+    Args:
+        cart_coord (np.ndarray): unwrapped cartesian coordinates, shape=(NFrame, NAtom, 3)
+        element (list): element names of the atoms
+        potim (float): time between two frames, unit: fs
+
+    Returns:
+        MSD: namedtuple, (time, msd)
+            time:   unit: fs, shape=(NFrame,)
+            msd:    dict, {element: MSD} and {"total": MSD}, unit: Angstrom^2
+    """
+    cart_coord = np.asarray(cart_coord, dtype=float)
+    NFrame, NAtom = cart_coord.shape[:2]
+    atom_msd = np.empty((NFrame, NAtom))
+    for batch in _batches(NAtom, NFrame):
+        coord = cart_coord[:, batch]
+        square = np.concatenate([np.zeros((1, coord.shape[1])), np.cumsum(np.sum(coord ** 2, axis=-1), axis=0)])
+        m = np.arange(NFrame)[:, None]  # S1(m) = [2 sum r^2 - sum_{t<m} r(t)^2 - sum_{t>=N-m} r(t)^2] / (N - m)
+        S1 = (square[-1] - square[:NFrame] + square[NFrame - m[:, 0]]) / (NFrame - m)
+        atom_msd[:, batch] = S1 - 2 * autocorrelation(coord)
+
+    return _per_element(atom_msd, element, potim, "MSD", "msd")
+
+
+def vacf(velocity, element, potim=1.0, normalize=True):
+    """
+    Velocity autocorrelation function by FFT, averaged over all time origins
+
+    Args:
+        velocity (np.ndarray): shape=(NFrame, NAtom, 3), e.g., the finite difference of the unwrapped coordinates
+        element (list): element names of the atoms
+        potim (float): time between two frames, unit: fs
+        normalize (bool): normalize by C(0)
+
+    Returns:
+        VACF: namedtuple, (time, vacf)
+            time:   unit: fs, shape=(NFrame,)
+            vacf:   dict, {element: VACF} and {"total": VACF}
+    """
+    velocity = np.asarray(velocity, dtype=float)
+    NFrame, NAtom = velocity.shape[:2]
+    atom_vacf = np.empty((NFrame, NAtom))
+    for batch in _batches(NAtom, NFrame):
+        atom_vacf[:, batch] = autocorrelation(velocity[:, batch])
+
+    result = _per_element(atom_vacf, element, potim, "VACF", "vacf")
+    if normalize:
+        for value in result.vacf.values():
+            value /= value[0]
+    return result
+
+
+def _per_element(values, element, potim, typename, field):
+    element = np.array(element)
+    average = {name: values[:, element == name].mean(axis=-1) for name in dict.fromkeys(element)}
+    average["total"] = values.mean(axis=-1)
+    Result = namedtuple(typename, ("time", field))
+    return Result(np.arange(values.shape[0]) * potim, average)
+
+
+def diffusion_coefficient(time, msd, start=0.2, stop=0.8):
+    """
+    Diffusion coefficient from the linear fit of MSD = 6Dt, the short-time ballistic and the long-time noisy regions
+    are excluded
+
+    Args:
+        time (np.ndarray): unit: fs
+        msd (np.ndarray): unit: Angstrom^2
+        start, stop (float): fitted fraction of the time range
+
+    Returns:
+        D (float): unit: cm^2/s
+    """
+    selected = slice(int(len(time) * start), max(int(len(time) * stop), int(len(time) * start) + 2))
+    slope = np.polyfit(time[selected], msd[selected], 1)[0]
+    return slope / 6 * 0.1  # Angstrom^2/fs -> cm^2/s
+
+
+class Unwrapper(object):
+    """
+    Streaming unwrapper of the wrapped trajectory (e.g., XDATCAR), the blocks of frames are fed in order and only
+    O(NAtom) state is kept between the blocks, so the trajectories larger than RAM can be unwrapped chunk by chunk
+
+    fixed cell:     the frame-to-frame fractional jumps are rounded and accumulated by a cumulative sum
+    variable cell:  the cartesian displacements are wrapped by the minimum image of the current cell and accumulated,
+                    the affine deformation of the cell is not counted as the atomic motion
+
+    Attributes:
+        variable (bool): whether the cell changes between the frames (NpT MD)
+        last (np.ndarray): last wrapped frame, fractional (fixed cell) or cartesian (variable cell), shape=(NAtom, 3)
+        image (np.ndarray): fixed cell, accumulated image shifts of the last frame, shape=(NAtom, 3)
+        position (np.ndarray): variable cell, unwrapped cartesian coordinates of the last frame, shape=(NAtom, 3)
+    """
+
+    def __init__(self, variable=False):
+        self.variable = variable
+        self.last, self.image, self.position = None, None, None
+
+    def __call__(self, frac_coord, lattice=None):
+        """
+        Unwrap the next block of frames
+
+        Args:
+            frac_coord (np.ndarray): wrapped fractional coordinates, shape=(NFrame, NAtom, 3)
+            lattice (np.ndarray): lattice matrix, shape=(3, 3) or (NFrame, 3, 3); necessary for the variable cell
+
+        Returns:
+            unwrapped coordinates, shape=(NFrame, NAtom, 3), cartesian if lattice is given, otherwise fractional
+        """
+        frac_coord = np.asarray(frac_coord, dtype=float)
+        if self.variable:
+            if lattice is None:
+                raise ValueError("lattice of each frame is necessary to unwrap the variable-cell trajectory")
+            return self._unwrap_variable(frac_coord, _lattices(lattice, len(frac_coord)))
+
+        previous = frac_coord[:1] if self.last is None else self.last[None]
+        jump = np.round(np.diff(np.concatenate([previous, frac_coord]), axis=0))
+        image = np.cumsum(jump, axis=0)
+        if self.image is not None:
+            image += self.image
+        self.last, self.image = frac_coord[-1].copy(), image[-1].copy()
+
+        unwrapped = frac_coord - image
+        return unwrapped if lattice is None else np.matmul(unwrapped, getattr(lattice, "matrix", lattice))
+
+    def _unwrap_variable(self, frac_coord, lattice):
+        cart_coord = np.matmul(frac_coord, lattice)
+        previous = cart_coord[:1] if self.last is None else self.last[None]
+        delta = np.diff(np.concatenate([previous, cart_coord]), axis=0)
+        shift = np.round(np.matmul(delta, np.linalg.inv(lattice)))  # minimum image in the current cell
+        delta -= np.matmul(shift, lattice)
+        unwrapped = np.cumsum(delta, axis=0) + (cart_coord[0] if self.position is None else self.position)
+        self.last, self.position = cart_coord[-1].copy(), unwrapped[-1].copy()
+        return unwrapped
+
+
+def unwrap(frac_coord, lattice=None, variable=False):
+    """
+    Unwrap the whole trajectory at once, see `Unwrapper`
+
+    Args:
+        frac_coord (np.ndarray): wrapped fractional coordinates, shape=(NFrame, NAtom, 3)
+        lattice (np.ndarray): lattice matrix, shape=(3, 3) or (NFrame, 3, 3)
+        variable (bool): whether the cell changes between the frames
+
+    Returns:
+        unwrapped coordinates, cartesian if lattice is given, otherwise fractional
+    """
+    return Unwrapper(variable=variable)(frac_coord, lattice)
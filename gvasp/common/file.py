@@ -1,35 +1,94 @@
+import json
 import logging
-import math
+import mmap
+import os
+import re
 from collections import namedtuple
 from datetime import datetime
 from functools import wraps, reduce
+from itertools import chain
 from multiprocessing import Pool as ProcessPool
 from operator import add
 from pathlib import Path
-from typing import List, Union
+from typing import Iterable, List, Union
 from xml.dom import minidom
 from xml.dom.minidom import DocumentType, parseString
 
 import numpy as np
 from lxml import etree
-from pandas import DataFrame
 
 from gvasp.common.base import Atoms, Lattice
-from gvasp.common.constant import COLUMNS_32, COLUMNS_8, ORBITALS, RED, RESET, HIGH_SYM
+from gvasp.common.constant import COLUMNS_32, COLUMNS_8, ORBITALS, RED, RESET, HIGH_SYM, EV_ANGSTROM2_AMU, \
+    LIGHT_SPEED_CM, PLANCK_EV
 from gvasp.common.descriptor import ValueDescriptor
 from gvasp.common.error import StructureNotEqualError, GridNotEqualError, AnimationError, FrequencyError, \
     AttributeNotRegisteredError, ParameterError, PotDirNotExistError
 from gvasp.common.parameter import Parameter
 from gvasp.common.setting import RootDir
 from gvasp.common.structure import Structure
-from gvasp.common.utils import remove_mapping, is_subset_recommend_pot, str_list
-from gvasp.lib import dos_cython, file_bind
+from gvasp.common.utils import remove_mapping, is_subset_recommend_pot, str_list, identify_atoms
+from gvasp.lib import file_bind
 
 POTENTIAL = ['PAW_LDA', 'PAW_PBE', 'PAW_PW91', 'USPP_LDA', 'USPP_PW91']
 
 logger = logging.getLogger(__name__)
 
 
+def write_binary(name, magic: bytes, header: dict, arrays: list):
+    """
+    Write the binary files of gvasp (caches, indexes, trajectories), the layout is: magic line, json header line padded
+    to 64 bytes, then the raw arrays (C order); the file is written to a temporary file and renamed, so a concurrent
+    reader never sees a partial file. The arrays can be a generator, e.g., the chunks of a large trajectory
+
+    @return:
+        bool:   whether the file is written, a failure (e.g., read-only directory) is logged as a warning
+    """
+    header = dict(header, offset=0)
+    length = len(magic) + len(json.dumps(header)) + 16
+    header['offset'] = (length // 64 + 1) * 64
+    head = magic + json.dumps(header).encode() + b"\n"
+
+    temp = Path(name).with_name(Path(name).name + f".{os.getpid()}")
+    try:
+        with open(temp, "wb") as f:
+            f.write(head.ljust(header['offset'], b" "))
+            for array in arrays:
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(temp, name)
+        return True
+    except OSError as error:
+        logger.warning(f"{name} is not written: {error}")
+        if temp.exists():
+            temp.unlink()
+        return False
+
+
+def read_binary_header(name, magic: bytes):
+    """
+    Read the json header of the binary files written by `write_binary`
+
+    @return:
+        header:     dict, the arrays start at header['offset'], None if the file not exists or is not of this magic
+    """
+    try:
+        with open(name, "rb") as f:
+            if f.readline() != magic:
+                return None
+            return json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+
+
+def load_trajectory(name):
+    """
+    Open a trajectory file, the gvasp binary trajectory (TrajFile) is recognized by its magic, otherwise XDATCAR
+
+    @return:
+        TrajFile or XDATCAR instance
+    """
+    return TrajFile(name) if read_binary_header(name, TrajFile.MAGIC) is not None else XDATCAR(name)
+
+
 class MetaFile(object):
 
     def __new__(cls, *args, **kwargs):
@@ -83,26 +142,105 @@ class CellFile(StructInfoFile):
 
 class ARCFile(MetaFile):
     @staticmethod
-    def write(name: str, structure: List[Structure], lattice: Lattice):
-        a, b, c = lattice.length
-        alpha, beta, gamma = lattice.angle
+    def write(name: str, structure: Iterable[Structure], lattice: Lattice):
+        """
+        Write Structures to *.arc file, the structures can be a generator (e.g., XDATCAR.iter_frames(structure=True)),
+        they are converted and written one by one
+        """
+        structure = iter(structure)
+        first = next(structure)
+
+        def frames():
+            for structure_i in chain([first], structure):
+                yield np.array([structure_i.atoms.frac_coord if None not in structure_i.atoms.frac_coord else
+                                np.dot(structure_i.atoms.cart_coord, lattice.inverse)], dtype=float)
+
+        ARCFile.write_coord(name=name, coord=frames(), element=first.atoms.formula, lattice=lattice,
+                            order=first.atoms.order, coord_type="frac")
+
+    @staticmethod
+    def arc_matrix(matrix: np.ndarray):
+        """
+        Vectorized `Lattice.arc_lattice` of many lattices
+
+        @param:
+            matrix:     lattice matrices, shape=(NFrame, 3, 3)
+
+        @return:
+            arc:        arc lattice matrices, shape=(NFrame, 3, 3)
+            length:     shape=(NFrame, 3)
+            angle:      [alpha, beta, gamma] in degree, shape=(NFrame, 3)
+        """
+        length = np.linalg.norm(matrix, axis=-1)
+        pairs = [(1, 2), (0, 2), (0, 1)]
+        angle = np.stack([np.arccos(np.einsum("ni,ni->n", matrix[:, i], matrix[:, j]) / (length[:, i] * length[:, j]))
+                          * 180 / np.pi for i, j in pairs], axis=-1)
+        cos_alpha, cos_beta, cos_gamma = np.cos(angle.T / 180. * np.pi)
+        sin_gamma = np.sin(angle[:, 2] / 180. * np.pi)
+        la, lb, lc = length.T
+
+        arc = np.zeros_like(matrix, dtype=float)
+        arc[:, 0, 0] = la
+        arc[:, 1, 0], arc[:, 1, 1] = lb * cos_gamma, lb * sin_gamma
+        arc[:, 2, 0] = lc * cos_beta
+        arc[:, 2, 1] = lc * (cos_alpha - cos_beta * cos_gamma) / sin_gamma
+        arc[:, 2, 2] = lc * (1 + 2 * cos_gamma * cos_beta * cos_alpha - cos_alpha ** 2 - cos_beta ** 2 -
+                             cos_gamma ** 2) ** 0.5 / sin_gamma
+        return arc, length, angle
+
+    @staticmethod
+    def write_coord(name: str, coord, element: List[str], lattice, order=None, coord_type="cart"):
+        """
+        Write multi-frames coordinates to *.arc file without constructing Structure instances
+
+        @param:
+            name:           name of the *.arc file
+            coord:          frames' coordinates, shape=(NFrame, NAtom, 3); or an iterable of such blocks (e.g., chunks
+                            of XDATCAR.to_array), each block can also be a (coord, lattice) pair for the variable cell,
+                            the blocks are converted and written one by one
+            element:        element list of the atoms
+            lattice:        Lattice instance shared by all frames, or lattice matrices of each frame, shape=(NFrame, 3, 3)
+            order:          atoms' order used in the labels, default: range(NAtom)
+            coord_type:     type of coord, should be one of ["frac", "cart"], default: "cart"
+        """
+        if coord_type not in ["frac", "cart"]:
+            raise TypeError(f"{coord_type} not supported, should be `cart` or `frac`")
+
+        order = range(len(element)) if order is None else order
+        date = f'!DATE {datetime.now().strftime("%a %b %d %H:%M:%S  %Y")}\n'
+        atoms_format = "".join(f"{formula + str(index + 1):5s} %14.10f %14.10f %14.10f XXXX 1       xx     "
+                               f"{formula:2s} 0.0000\n" for formula, index in zip(element, order)) + "end\nend\n"
+
+        def frame_head(length, angle):
+            (a, b, c), (alpha, beta, gamma) = length, angle
+            return "Auto Generated CAR File\n" + date + \
+                f"PBC   {a:.5f}  {b:.5f}  {c:.5f}  {alpha:.5f}  {beta:.5f}  {gamma:.5f} (P1)\n"
+
+        def transform(matrix):
+            """arc transform of one or many lattices, computed once for a shared lattice"""
+            matrix = np.asarray(matrix.matrix if isinstance(matrix, Lattice) else matrix, dtype=float)
+            matrix = matrix.reshape((-1, 3, 3))
+            arc, length, angle = ARCFile.arc_matrix(matrix)
+            if coord_type == "cart":
+                arc = np.matmul(np.linalg.inv(matrix), arc)
+            return arc, [frame_head(*item) for item in zip(length, angle)]
+
+        shared = transform(lattice) if isinstance(lattice, Lattice) else None
+        blocks = [(coord, lattice)] if isinstance(coord, np.ndarray) else coord
+
         with open(name, "w") as f:
             f.write("!BIOSYM archive 3\n")
             f.write("PBC=ON\n")
-            for frame in range(len(structure)):
-                structure[frame].atoms.set_coord(lattice)  # first set frac_coord
-                structure[frame].atoms.cart_coord = structure[frame].atoms.count * [None]  # then clear cart_coord
-                atoms = structure[frame].atoms.set_coord(Lattice.arc_lattice(lattice))  # set coord from arc_lattice
-                f.write("Auto Generated CAR File\n")
-                f.write(f'!DATE {datetime.now().strftime("%a %b %d %H:%M:%S  %Y")}\n')
-                f.write(f"PBC   {a:.5f}  {b:.5f}  {c:.5f}  {alpha:.5f}  {beta:.5f}  {gamma:.5f} (P1)\n")
-                for atom in atoms:
-                    formula, order = atom.formula, atom.order
-                    element = formula + str(order + 1)
-                    x, y, z = atom.cart_coord
-                    f.write(f"{element:5s} {x:14.10f} {y:14.10f} {z:14.10f} XXXX 1       xx     {formula:2s} 0.0000\n")
-                f.write("end\n")
-                f.write("end\n")
+            for block in blocks:
+                block, matrix = block if isinstance(block, tuple) else (block, lattice)
+                arc, heads = shared if matrix is lattice and shared is not None else transform(matrix)
+                block = np.asarray(block, dtype=float).reshape((-1, len(element), 3))
+                arc_coord = np.matmul(block, arc).reshape((block.shape[0], -1))  # all frames by one matmul
+                if len(heads) == 1:
+                    frame_format = heads[0] + atoms_format
+                    f.write("".join(frame_format % tuple(frame) for frame in arc_coord))
+                else:
+                    f.write("".join(head + atoms_format % tuple(frame) for head, frame in zip(heads, arc_coord)))
 
 
 class SubmitFile(MetaFile):
@@ -883,179 +1021,548 @@ class CONTCAR(POSCAR):
     pass
 
 
-class XDATCAR(StructInfoFile):
+class FrameSequence(object):
+    """
+    Mixin of the trajectory files which load the frames into arrays (`to_array`), the subclass should provide `__len__`,
+    `to_array`, `element`, `lattice` and `variable`
+    """
+
+    def iter_arrays(self, start=None, stop=None, stride=1, chunk=1000):
+        """
+        Generator of `to_array` chunks, only `chunk` frames are held in memory
+
+        Args:
+            start, stop (int): frame range, the same as the slice of a list
+            stride (int): keep one frame of every `stride` frames
+            chunk (int): number of frames of each chunk
+
+        Yields:
+            Trajectory (see `to_array`)
+        """
+        selected = range(len(self))[start:stop:stride]
+        for index in range(0, len(selected), chunk):
+            block = selected[index:index + chunk]
+            yield self.to_array(stride=block.step, start=block.start, stop=block.stop if block.stop >= 0 else None)
+
+    def movie(self, name, start=None, stop=None, stride=1, chunk=1000):
+        """
+        Transform the trajectory to arc file, the frames are loaded and written in chunks, no Structure is built
+
+        Args:
+            name (str): name of the *.arc file
+            start, stop (int): frame range, the same as the slice of a list
+            stride (int): keep one frame of every `stride` frames, e.g., preview a 50k-frame MD with 500 frames
+            chunk (int): number of frames held in memory at once
+        """
+
+        def blocks():
+            for trajectory in self.iter_arrays(start=start, stop=stop, stride=stride, chunk=chunk):
+                frac_coord = trajectory.frac_coord % 1  # wrapped into the cell, the same as the Structure
+                yield (frac_coord, trajectory.lattice) if self.variable else frac_coord
+
+        ARCFile.write_coord(name=name, coord=blocks(), element=self.element, lattice=self.lattice,
+                            coord_type="frac")
+
+
+class XDATCAR(StructInfoFile, FrameSequence):
+    """
+    XDATCAR of the MD (or optimization) trajectory, the file is not read into memory: the byte offsets of the frames are
+    indexed once (kept alongside the XDATCAR as .<name>.frame-index, validated by size/mtime), then any frame is read
+    by one seek
+
+    Methods:
+        frame():        read one frame by its index
+        iter_frames():  generator of the frames in range(start, stop, step)
+    """
+    INDEX_MAGIC = b"GVASP-XDATCAR-INDEX 1\n"
+
     def __init__(self, name):
         super().__init__(name)
 
-        self.lattice = Lattice.from_string(self.strings[2:5])
-        element_name = self.strings[5].split()
-        element_count = [int(item) for item in self.strings[6].split()]
+        with open(self.name, "r") as f:
+            head = [f.readline() for _ in range(7)]
+        self.lattice = Lattice.from_string(head[2:5])
+        element_name = head[5].split()
+        element_count = [int(item) for item in head[6].split()]
         self.element = sum([[name] * count for name, count in zip(element_name, element_count)], [])
-        self.frames = [i for i in range(len(self.strings)) if self.strings[i].find("Direct") != -1]
+        self._offsets = None
+        self._variable = None
         self._structure = []
 
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def index_name(self):
+        return Path(self.name).with_name(f".{Path(self.name).name}.frame-index")
+
+    @property
+    def offsets(self):
+        """
+        Byte offsets of the frames, shape=(NFrame, 2), columns: [start of the frame block, `Direct configuration` line];
+        the frame block starts from its own lattice lines in the variable-cell XDATCAR
+        """
+        if self._offsets is None:
+            stat = Path(self.name).stat()
+            fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+            header = read_binary_header(self.index_name, self.INDEX_MAGIC)
+            if header is not None and header['fingerprint'] == fingerprint:
+                self._offsets = np.memmap(self.index_name, dtype="<i8", mode="r", offset=header['offset'],
+                                          shape=(header['NFrame'], 2))
+                self._variable = header['variable']
+            else:
+                self._offsets, self._variable = self._build_index()
+                write_binary(self.index_name, self.INDEX_MAGIC,
+                             {"fingerprint": fingerprint, "NFrame": len(self._offsets), "variable": self._variable},
+                             [self._offsets.astype("<i8")])
+        return self._offsets
+
+    @property
+    def variable(self):
+        """whether the lattice is written in each frame (NpT MD)"""
+        self.offsets
+        return self._variable
+
+    def _build_index(self):
+        """one regex scan of the memory-mapped file, only the `Direct configuration` lines are matched"""
+        with open(self.name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            direct = np.array([match.start() + 1 for match in re.finditer(rb"\nDirect", buffer)], dtype=np.int64)
+            # variable-cell: the 7 header lines (title, scale, lattice, elements, counts) are repeated in each frame
+            variable = len(direct) > 1 and buffer[direct[0]:direct[1]].count(b"\n") > len(self.element) + 1
+            if not variable:
+                return np.stack((direct, direct), axis=-1), False
+
+            start = direct.copy()
+            for _ in range(7):  # back to the head of the title line
+                start = np.array([buffer.rfind(b"\n", 0, max(item - 1, 0)) + 1 for item in start], dtype=np.int64)
+            start[0] = 0
+        return np.stack((start, direct), axis=-1), True
+
+    def frame(self, index):
+        """
+        Read one frame
+
+        Args:
+            index (int): frame index (0-based, negative index is supported)
+
+        Returns:
+            Frame: namedtuple, (index, number, lattice, frac_coord), number is the configuration number written by VASP,
+                   lattice is a (3x3) np.ndarray, frac_coord shape=(NAtom, 3)
+        """
+        index = range(len(self))[index]
+        with open(self.name, "rb") as f:
+            return self._read_frame(f, index)
+
+    def _read_frame(self, f, index):
+        start, direct = self.offsets[index]
+        f.seek(start)
+        lattice = self.lattice.matrix
+        if self.variable:
+            head = [f.readline() for _ in range(7)]
+            lattice = np.fromstring(b"".join(head[2:5]).decode(), sep=" ").reshape((3, 3))
+        number = f.readline().split(b"=")[-1].strip()
+        lines = [f.readline() for _ in range(len(self.element))]
+        frac_coord = np.fromstring(b"".join(lines).decode(), sep=" ").reshape((-1, 3))
+        Frame = namedtuple("Frame", ("index", "number", "lattice", "frac_coord"))
+        return Frame(index, int(number) if number.isdigit() else index + 1, lattice, frac_coord)
+
+    def iter_frames(self, start=None, stop=None, step=None, structure=False):
+        """
+        Generator of the frames, only one frame is held in memory
+
+        Args:
+            start, stop, step (int): the same as the slice of a list
+            structure (bool): yield the Structure instead of the lightweight Frame
+
+        Yields:
+            Frame (see `frame`) or Structure
+        """
+        with open(self.name, "rb") as f:
+            for index in range(len(self))[start:stop:step]:
+                frame = self._read_frame(f, index)
+                if structure:
+                    atoms = Atoms(formula=self.element, frac_coord=frame.frac_coord)
+                    yield Structure(atoms=atoms, lattice=Lattice(frame.lattice))
+                else:
+                    yield frame
+
+    def to_array(self, stride=1, start=None, stop=None):
+        """
+        Load the (strided) frames into arrays in bulk, the numbers are read by one native pass over the frame offsets
+        (file_bind.read_frames, GIL released), no Structure is built
+
+        Args:
+            stride (int): keep one frame of every `stride` frames
+            start, stop (int): frame range, the same as the slice of a list
+
+        Returns:
+            Trajectory: namedtuple, (frac_coord, lattice, element, number)
+                frac_coord:     shape=(NFrame, NAtom, 3)
+                lattice:        shape=(NFrame, 3, 3), a broadcast (read-only) view of the same lattice for the
+                                fixed-cell XDATCAR
+                element:        list of the element names
+                number:         configuration numbers written by VASP, shape=(NFrame,)
+        """
+        selected = np.arange(len(self))[start:stop:stride]
+        starts = np.ascontiguousarray(self.offsets[selected, 0], dtype=np.int64)
+        head = 7 if self.variable else 0  # repeated header lines before `Direct configuration`
+
+        frac_coord = file_bind.read_frames(str(self.name), starts, head + 1, len(self.element), 3)
+        frac_coord = frac_coord.reshape((len(selected), -1, 3))
+        if self.variable:
+            lattice = file_bind.read_frames(str(self.name), starts, 2, 3, 3).reshape((-1, 3, 3))
+        else:
+            lattice = np.broadcast_to(self.lattice.matrix, (len(selected), 3, 3))
+
+        with open(self.name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            number = [buffer[item:buffer.find(b"\n", item)].split(b"=")[-1].strip() for item in
+                      self.offsets[selected, 1].tolist()]
+        number = np.array([int(item) if item.isdigit() else index + 1 for item, index in zip(number, selected)],
+                          dtype=int)
+
+        Trajectory = namedtuple("Trajectory", ("frac_coord", "lattice", "element", "number"))
+        return Trajectory(frac_coord, lattice, self.element, number)
+
     @property
     def structure(self):  # overwrite <structure method>
         if len(self._structure) == 0:
-            for frame in self.frames:
-                frac_coord = np.array([[float(item) for item in line.split()] for line in
-                                       self.strings[frame + 1:frame + 1 + len(self.element)]])
-                atoms = Atoms(formula=self.element, frac_coord=frac_coord)
-                self._structure.append(Structure(atoms=atoms, lattice=self.lattice))
+            self._structure = list(self.iter_frames(structure=True))
         return self._structure
 
-    def movie(self, name):
-        """Transform the XDATCAR to arc file"""
-        ARCFile.write(name=name, structure=self.structure, lattice=self.lattice)
+
+class TrajFile(MetaFile, FrameSequence):
+    """
+    Compact binary trajectory of gvasp (e.g., md.gtraj), written once from XDATCAR (and OUTCAR) and memory-mapped for
+    reads, so any frame is a slice of the mapped file
+
+    Layout (see `write_binary`): magic line, json header (element, NFrame, variable, lattice), then
+        records:        float32, shape=(NFrame, NAtom * 3 + 9 if variable else NAtom * 3), fractional coordinates
+                        followed by the lattice of the frame for the variable cell
+        number:         int64, shape=(NFrame,), configuration numbers written by VASP
+        energy:         float64, shape=(NFrame,), energy without entropy, NaN if not available
+        temperature:    float64, shape=(NFrame,), unit: K, NaN if not available
+
+    Methods:
+        write():        convert the XDATCAR (and OUTCAR) to the binary trajectory
+        frame():        read one frame by its index
+        to_array():     the frames' arrays (mapped, not loaded)
+        to_structure(): construct the Structure of one frame
+    """
+    MAGIC = b"GVASP-TRAJ 1\n"
+
+    def __init__(self, name):
+        super().__init__(name)
+
+        header = read_binary_header(name, self.MAGIC)
+        if header is None:
+            raise ValueError(f"{name} is not a gvasp trajectory file")
+        self.element, self.variable = header['element'], header['variable']
+        self.lattice = Lattice(np.array(header['lattice'], dtype=float))
+
+        NFrame, width, offset = header['NFrame'], len(self.element) * 3 + (9 if header['variable'] else 0), \
+            header['offset']
+        self.records = np.memmap(name, dtype="<f4", mode="r", offset=offset, shape=(NFrame, width))
+        offset += self.records.nbytes
+        self.number = np.memmap(name, dtype="<i8", mode="r", offset=offset, shape=(NFrame,))
+        offset += self.number.nbytes
+        self.energy = np.memmap(name, dtype="<f8", mode="r", offset=offset, shape=(NFrame,))
+        offset += self.energy.nbytes
+        self.temperature = np.memmap(name, dtype="<f8", mode="r", offset=offset, shape=(NFrame,))
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def write(name, xdatcar="XDATCAR", outcar="OUTCAR", chunk=1000):
+        """
+        Convert the XDATCAR to the binary trajectory, the frames are streamed in chunks
+
+        Args:
+            name (str): name of the binary trajectory
+            xdatcar (str): name of the XDATCAR
+            outcar (str): name of the OUTCAR to read the energy and temperature, skipped if not exists
+            chunk (int): number of frames held in memory at once
+        """
+        source = XDATCAR(xdatcar)
+        energy, temperature = TrajFile._read_outcar(outcar) if outcar is not None and Path(outcar).exists() else \
+            (np.array([]), np.array([]))
+        header = {"element": source.element, "NFrame": len(source), "variable": source.variable,
+                  "lattice": source.lattice.matrix.tolist()}
+        numbers = []
+
+        def per_frame(values, number):  # the configuration number is the ionic step
+            result = np.full(len(number), np.nan)
+            valid = (number >= 1) & (number <= len(values))
+            result[valid] = values[number[valid] - 1]
+            return result
+
+        def arrays():
+            for trajectory in source.iter_arrays(chunk=chunk):
+                numbers.append(trajectory.number)
+                record = trajectory.frac_coord.reshape((len(trajectory.number), -1))
+                if source.variable:
+                    record = np.hstack([record, trajectory.lattice.reshape((-1, 9))])
+                yield record.astype("<f4")
+            number = np.concatenate(numbers) if numbers else np.array([], dtype=int)
+            yield number.astype("<i8")
+            yield per_frame(energy, number).astype("<f8")
+            yield per_frame(temperature, number).astype("<f8")
+
+        return write_binary(name, TrajFile.MAGIC, header, arrays())
+
+    @staticmethod
+    def _read_outcar(name):
+        """energy without entropy and temperature of each ionic step, by one regex scan of the memory-mapped OUTCAR"""
+        with open(name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            energy = [float(match.group(1)) for match in re.finditer(rb"energy  without entropy=\s*(\S+)", buffer)]
+            temperature = [float(match.group(1)) for match in re.finditer(rb"\(temperature\s+(\S+)\s+K\)", buffer)]
+        return np.array(energy), np.array(temperature)
+
+    def frame(self, index):
+        """
+        Read one frame, the same as `XDATCAR.frame`
+
+        Returns:
+            Frame: namedtuple, (index, number, lattice, frac_coord)
+        """
+        index = range(len(self))[index]
+        record, NCoord = self.records[index], len(self.element) * 3
+        lattice = record[NCoord:].reshape((3, 3)).astype(float) if self.variable else self.lattice.matrix
+        Frame = namedtuple("Frame", ("index", "number", "lattice", "frac_coord"))
+        return Frame(index, int(self.number[index]), lattice, record[:NCoord].reshape((-1, 3)).astype(float))
+
+    def to_array(self, stride=1, start=None, stop=None):
+        """
+        The (strided) frames' arrays, the same as `XDATCAR.to_array`, but the coordinates are float32 views of the mapped
+        file, nothing is read until they are used
+
+        Returns:
+            Trajectory: namedtuple, (frac_coord, lattice, element, number)
+        """
+        selected, NCoord = slice(start, stop, stride), len(self.element) * 3
+        records = self.records[selected]
+        frac_coord = records[:, :NCoord].reshape((len(records), -1, 3))
+        if self.variable:
+            lattice = records[:, NCoord:].reshape((-1, 3, 3))
+        else:
+            lattice = np.broadcast_to(self.lattice.matrix, (len(records), 3, 3))
+        Trajectory = namedtuple("Trajectory", ("frac_coord", "lattice", "element", "number"))
+        return Trajectory(frac_coord, lattice, self.element, np.asarray(self.number[selected]))
+
+    def to_structure(self, index):
+        """construct the Structure of one frame"""
+        frame = self.frame(index)
+        return Structure(atoms=Atoms(formula=self.element, frac_coord=frame.frac_coord), lattice=Lattice(frame.lattice))
 
 
 class DOSCAR(MetaFile):
     ISPIN = ValueDescriptor("ISPIN", [1, 2])
     LORBIT = ValueDescriptor("LORBIT", [0, 1, 2, 5, 10, 11, 12, 13, 14])
 
+    CACHE_MAGIC = b"GVASP-DOS 1\n"
+
     def __init__(self, name, ISPIN=2, LORBIT=12):
         super(DOSCAR, self).__init__(name=name)
         self.ISPIN = ISPIN
         self.LORBIT = LORBIT
-        self.NAtom = int(self.strings[0].split()[0])
-        self.Emax, self.Emin, self.NDOS, self.fermi = tuple(map(float, self.strings[5].split()[:4]))
+        with open(self.name, "r") as f:  # only the header, the whole file is read lazily by self.strings
+            head = [f.readline() for _ in range(6)]
+        self.NAtom = int(head[0].split()[0])
+        self.Emax, self.Emin, self.NDOS, self.fermi = tuple(map(float, head[5].split()[:4]))
         self.NDOS = int(self.NDOS)
 
         if self.LORBIT not in [10, 12]:
             logger.error(f"LORBIT = {self.LORBIT} is not supported in this version!")
             exit(1)
 
-    def load(self):
-        def merge_dos(energy_list, Total_up, Total_down, atom_list, length):
-            """TODO:  need  optimize, deprecate DataFrame"""
-            atom_data = [energy_list]
-            columns, orbitals = [], []
-
-            Total_Dos = DataFrame(index=energy_list, columns=['tot_up', 'tot_down'], dtype='object')
-            Total_Dos['tot_up'] = Total_up
-            Total_Dos['tot_down'] = Total_down if self.ISPIN == 2 else [0.0] * len(Total_Dos['tot_up'])
-
-            if self.LORBIT == 10:
-                columns = COLUMNS_8[:length] if self.ISPIN == 2 else COLUMNS_8[:length * 2]
-                orbitals = []
-            elif self.LORBIT == 12:
-                columns = COLUMNS_32[:length] if self.ISPIN == 2 else COLUMNS_32[:length * 2]
-                orbitals = ORBITALS[1:int(math.sqrt(length / 2))] if self.ISPIN == 2 else ORBITALS[
-                                                                                          1:int(math.sqrt(length))]
-
-            for data in atom_list:
-                data_ispin = np.zeros(shape=(len(energy_list), len(columns)))
-
-                if self.ISPIN == 2:
-                    data_ispin = np.array(data)
-                else:
-                    data_ispin[:, ::2] += np.array(data)
-
-                DATA = DataFrame(data_ispin, index=energy_list, columns=columns)
-                DATA['up'] = 0.0
-                DATA['down'] = 0.0
-
-                # LORBIT = 12, sum projected-orbitals, e.g., px+py+pz = p
-                for orbital in orbitals:
-                    DATA[orbital + '_up'] = 0.0
-                    DATA[orbital + '_down'] = 0.0
-                    orbital_p_up = [item for item in DATA.columns.values if
-                                    item.startswith(orbital) and item.endswith('up') and item != f'{orbital}_up'
-                                    and item != 'up']
-                    orbital_p_down = [item for item in DATA.columns.values if
-                                      item.startswith(orbital) and item.endswith(
-                                          'down') and item != f'{orbital}_down'
-                                      and item != 'down']
-
-                    for item in orbital_p_up:
-                        DATA[f'{orbital}_up'] += DATA[item]
-                    for item in orbital_p_down:
-                        DATA[f'{orbital}_down'] += DATA[item]
-                    DATA['up'] += DATA[f'{orbital}_up']
-                    DATA['down'] += DATA[f'{orbital}_down']
-
-                # LORBIT = 10
-                if self.LORBIT == 10:
-                    for item in columns:
-                        if item.endswith("up") and not item.startswith("s"):
-                            DATA['up'] += DATA[item]
-                        elif item.endswith("down") and not item.startswith("s"):
-                            DATA['down'] += DATA[item]
-
-                # for both LORBIT=10/12
-                DATA['up'] += DATA['s_up']
-                DATA['down'] += DATA['s_down']
-
-                atom_data.append(DATA)
-
-            self.TDOS = Total_Dos  # DataFrame(NDOS, 2) / DataFrame(NDOS, 1)
-            self.LDOS = atom_data  # energy + List(NAtom, NDOS, NOrbital+8)
+    def _parse_block(self):
+        """
+        Convert the whole DOSCAR into one array, the per-atom header lines are skipped by the known NDOS
+
+        @return:
+            block:  np.ndarray, shape=(NAtom+1, NDOS, NColumn), block[0] is the total DOS (zero padded to NColumn),
+                    block[1:] is the projected DOS of each atom; column 0 is E - E_fermi, spin-down columns negated
+        """
+        total = np.fromstring(" ".join(self.strings[6:6 + self.NDOS]), sep=" ").reshape((self.NDOS, -1))
+
+        # atom i (1-based): header at line 5 + (NDOS+1)*i, followed by NDOS data lines
+        starts = range(6 + self.NDOS + 1, len(self.strings) - self.NDOS + 1, self.NDOS + 1)
+        atom_lines = chain.from_iterable(self.strings[start:start + self.NDOS] for start in starts)
+        atom = np.fromstring(" ".join(atom_lines), sep=" ").reshape((len(starts), self.NDOS, -1)) if len(starts) \
+            else np.zeros((0, self.NDOS, 1))
+
+        block = np.zeros((len(starts) + 1, self.NDOS, max(total.shape[-1], atom.shape[-1])))
+        block[0, :, :total.shape[-1]] = total
+        block[1:, :, :atom.shape[-1]] = atom
+        block[..., 0] -= self.fermi
+        if self.ISPIN == 2:  # columns: E, up, down, up, down, ...
+            block[..., 2::2] *= -1
+        return block
+
+    @property
+    def cache_name(self):
+        return Path(self.name).with_name(f".{Path(self.name).name}.dos-cache")
+
+    def _fingerprint(self):
+        stat = Path(self.name).stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "ISPIN": self.ISPIN, "LORBIT": self.LORBIT}
+
+    def read_cache(self):
+        """
+        Memory-map the binary cache (see `write_binary`), the json header holds the fingerprint of DOSCAR, NAtom and
+        columns, followed by float64 energy (NDOS), TDOS (NDOS, 2) and LDOS (NAtom, NDOS, NChannel)
+
+        @return:
+            bool:   whether the cache exists and matches the current DOSCAR
+        """
+        header = read_binary_header(self.cache_name, self.CACHE_MAGIC)
+        if header is None or header['fingerprint'] != self._fingerprint():
+            return False
+
+        NChannel = len(header['columns'])
+        data = np.memmap(self.cache_name, dtype="<f8", mode="r", offset=header['offset'],
+                         shape=(self.NDOS * (3 + header['NAtom'] * NChannel),))
+        self.energy = data[:self.NDOS]
+        self.TDOS = data[self.NDOS:3 * self.NDOS].reshape((self.NDOS, 2))
+        self.LDOS = data[3 * self.NDOS:].reshape((header['NAtom'], self.NDOS, NChannel))
+        self.columns = header['columns']
+        return True
+
+    def _write_cache(self):
+        header = {"fingerprint": self._fingerprint(), "NAtom": self.LDOS.shape[0], "columns": self.columns}
+        write_binary(self.cache_name, self.CACHE_MAGIC, header,
+                     [np.asarray(array, dtype="<f8") for array in (self.energy, self.TDOS, self.LDOS)])
+
+    def load(self, cache=False):
+        """
+        Load the total and projected DOS into dense arrays
+
+        @param:
+            cache:  whether use the binary cache alongside the DOSCAR, it's written after the first parse and
+                    re-written once the size/mtime of the DOSCAR changes; the arrays are memory-mapped (read-only)
 
+        @return:
+            self.energy:    E - E_fermi, shape=(NDOS,)
+            self.TDOS:      [tot_up, tot_down], shape=(NDOS, 2), tot_down is zero for ISPIN=1
+            self.LDOS:      shape=(NAtom, NDOS, NChannel), channels are named by self.columns
+            self.columns:   the projected orbitals (e.g., px_up), the orbital sums (LORBIT=12, e.g., p_up) and the
+                            atom sums (up, down)
+        """
+        if cache and self.read_cache():
+            logger.debug(f"Load DOS from {self.cache_name}")
             return self
 
-        return merge_dos(*dos_cython.load(self.strings, self.NDOS, self.ISPIN, self.fermi))
+        block = self._parse_block()
+        self.energy = block[0, :, 0]
+        self.TDOS = np.stack([block[0, :, 1], block[0, :, 2] if self.ISPIN == 2 else np.zeros(self.NDOS)], axis=-1)
+
+        # ISPIN=1 only has the spin-up columns, place them into the spin-resolved layout
+        length = len(self.strings[6 + self.NDOS + 1].split()) - 1 if block.shape[0] > 1 else 0
+        raw_columns = (COLUMNS_8 if self.LORBIT == 10 else COLUMNS_32)[:length * (3 - self.ISPIN)]
+        raw = np.zeros((block.shape[0] - 1, self.NDOS, len(raw_columns)))
+        raw[..., ::3 - self.ISPIN] = block[1:, :, 1:length + 1]
+
+        self.LDOS, self.columns = DOSCAR.project(raw, raw_columns)
+
+        if cache:
+            self._write_cache()
+        return self
+
+    @staticmethod
+    def orbital_names(count):
+        """
+        Orbital names of the DOSCAR columns, the vasprun.xml/PROCAR names (s, py, ..., x2-y2, fy3x2, ...) are given in
+        the same order, e.g., 9 -> ['s', 'py', 'pz', 'px', 'dxy', 'dyz', 'dz2', 'dxz', 'dx2'], 3 -> ['s', 'p', 'd']
+        """
+        return [column[:-3] for column in (COLUMNS_32 if count > len(ORBITALS) else COLUMNS_8)[::2]][:count]
+
+    @staticmethod
+    def project(raw, raw_columns):
+        """
+        Append the atom sums (up, down) and the orbital sums (LORBIT=12, e.g., p_up) to the projected DOS
+
+        @param:
+            raw:            shape=(NAtom, NDOS, NRaw), the spin-resolved channels named by raw_columns
+            raw_columns:    e.g., ['s_up', 's_down', 'py_up', 'py_down', ...]
+
+        @return:
+            LDOS:       shape=(NAtom, NDOS, NChannel)
+            columns:    raw_columns + ['up', 'down'] + the orbital sums
+        """
+        orbitals = [orbital for orbital in ORBITALS[1:] if f"{orbital}_up" not in raw_columns and
+                    any(column.startswith(orbital) for column in raw_columns)]
+        columns = raw_columns + ['up', 'down'] + [f"{orbital}_{spin}" for orbital in orbitals for spin in
+                                                  ['up', 'down']]
+
+        # projection[i, j] = 1 if raw column i contributes to channel j, e.g., py_up/pz_up/px_up -> p_up
+        channels = [column.rpartition("_")[::2] for column in columns]
+        projection = np.array([[column.startswith(orbital) and column.endswith(f"_{spin}") for orbital, spin in
+                                channels] for column in raw_columns], dtype=float)
+        return raw @ projection, columns
 
 
 class EIGENVAL(MetaFile):
     def __init__(self, name):
         super(EIGENVAL, self).__init__(name=name)
+        self.ISPIN = int(self.strings[0].split()[3])
         self.NKPoint, self.NBand = tuple(map(int, self.strings[5].split()[1:]))
         self.KPoint_coord = None
+        self.KPoint_weight = None
         self.KPoint_dist = None
         self.KPoint_label = None
+        self.block = None
         self.energy = None
+        self.occupation = None
 
         self._parse()
 
     def _parse(self):
         """
-        load Eigenval obtain the band-energy
+        load Eigenval obtain the band-energy, the numeric part (blank lines carry no number) is converted in one call
 
         @return:
-            self.energy:    shape=(NKPoint, NBand, 2)
+            self.KPoint_coord:  shape=(NKPoint, 3)
+            self.KPoint_weight: shape=(NKPoint,)
+            self.block:         shape=(NKPoint, NBand, NCol), columns: [energy_up, (energy_down), (occ_up, occ_down)],
+                                the occupations are absent in the EIGENVAL of the old VASP versions
+            self.energy:        shape=(NKPoint, NBand, ISPIN)
+            self.occupation:    shape=(NKPoint, NBand, ISPIN), None if absent
         """
-        self.KPoint_coord = []
-        self.energy = []
-        energy_flag = False
-        sBand = []
-        for index, line in enumerate(self.strings):
-            if index % (self.NBand + 2) == 7:
-                self.KPoint_coord.append(tuple(map(float, line.split()[0:3])))
-                energy_flag = True
-                continue
-            elif energy_flag:
-                sBand.append(list(map(float, line.split()[1:3])))
-                if len(sBand) == self.NBand:
-                    energy_flag = False
-                    self.energy.append(sBand)
-                    sBand = []
-
-        self.KPoint_coord = np.array(self.KPoint_coord)
-
-        self.KPoint_dist = []
-        self.KPoint_label = []
-        for index, k_point in enumerate(self.KPoint_coord):
-            if index == 0:
-                self.KPoint_dist.append(0.)
-            else:
-                k_before = self.KPoint_coord[index - 1]
-                dist = np.sum((k_point - k_before) ** 2) ** 0.5
-                self.KPoint_dist.append(self.KPoint_dist[-1] + dist)
-
-            for label, value in HIGH_SYM.items():
-                if np.sum((np.array(value) - k_point) ** 2) ** 0.5 <= 1E-02 and (
-                        not len(self.KPoint_label) or self.KPoint_label[-1] != label):
-                    self.KPoint_label.append(label)
-                    break
-            else:
-                self.KPoint_label.append("")
-        self.energy = np.array(self.energy)
+        numbers = np.fromstring(" ".join(self.strings[7:]), sep=" ").reshape((self.NKPoint, -1))
+        self.KPoint_coord, self.KPoint_weight = numbers[:, :3], numbers[:, 3]
+        self.block = numbers[:, 4:].reshape((self.NKPoint, self.NBand, -1))[..., 1:]  # drop the band index
+        self.energy = self.block[..., :self.ISPIN]
+        self.occupation = self.block[..., self.ISPIN:] if self.block.shape[-1] == 2 * self.ISPIN else None
+
+        self.KPoint_dist, self.KPoint_label = EIGENVAL.kpoint_path(self.KPoint_coord)
 
         return self
 
+    @staticmethod
+    def kpoint_path(KPoint_coord):
+        """
+        Distances along the k-path and the high-symmetry labels of the k-points
+
+        @param:
+            KPoint_coord:   fractional coordinates of the k-points, shape=(NKPoint, 3)
+
+        @return:
+            KPoint_dist:    accumulated distance, shape=(NKPoint,)
+            KPoint_label:   label of each k-point, '' for the non-high-symmetry points
+        """
+        KPoint_dist = np.concatenate(([0.], np.cumsum(np.linalg.norm(np.diff(KPoint_coord, axis=0), axis=1))))
+
+        # label the k-points within 1E-02 of the high-symmetry points, a repeated point (segment joint) is labeled once
+        labels, points = np.array(list(HIGH_SYM.keys()) + [""]), np.array(list(HIGH_SYM.values()))
+        match = np.linalg.norm(KPoint_coord[:, np.newaxis] - points, axis=-1) <= 1E-02  # (NKPoint, NHighSym)
+        label = labels[np.where(match.any(axis=1), match.argmax(axis=1), len(points))]
+        label[1:][label[1:] == label[:-1]] = ""
+        return KPoint_dist, label.tolist()
+
     def write(self, directory='band_data'):
         """
-        Write band-data to file, each band corresponding to one file and named as band_{index}
+        Write band-data to file, each band corresponding to one file and named as band_{index}, for many bands, the
+        single-file `export` is recommended
 
         @params:
             dir:    save directory, default: $CWD/band_data
@@ -1065,6 +1572,136 @@ class EIGENVAL(MetaFile):
             np.savetxt(f"{directory}/band_{index + 1}", self.energy[:, index])
         logger.info(f"Band data has been saved to {directory} directory")
 
+    def export(self, name="band.npz"):
+        """
+        Export all bands into one file, which can be read back by `read_export` (or PlotBand(type="export"))
+
+        @params:
+            name:   *.npz: binary archive of the energy, occupation, KPoint_coord/weight/dist and KPoint_label arrays;
+                    other suffix: text table, rows are k-points, columns are [k_dist, band_1(_up, _down), ...] and the
+                    labels are recorded in the header
+        """
+        if Path(name).suffix == ".npz":
+            arrays = {"energy": self.energy, "KPoint_coord": self.KPoint_coord, "KPoint_weight": self.KPoint_weight,
+                      "KPoint_dist": self.KPoint_dist, "KPoint_label": np.array(self.KPoint_label)}
+            if self.occupation is not None:
+                arrays['occupation'] = self.occupation
+            np.savez(name, **arrays)
+        else:
+            spins = [""] if self.ISPIN == 1 else ["_up", "_down"]
+            columns = ["k_dist"] + [f"band_{index + 1}{spin}" for index in range(self.NBand) for spin in spins]
+            labels = " ".join(f"{index}:{label}" for index, label in enumerate(self.KPoint_label) if len(label))
+            header = f"ISPIN={self.ISPIN} NKPoint={self.NKPoint} NBand={self.NBand}\nlabel: {labels}\n" + \
+                     " ".join(columns)
+            np.savetxt(name, np.column_stack((self.KPoint_dist, self.energy.reshape((self.NKPoint, -1)))),
+                       fmt="%.6f", header=header)
+        logger.info(f"Band data has been exported to {name}")
+
+    @staticmethod
+    def read_export(name):
+        """
+        Read the band-data exported by `export`, without parsing the EIGENVAL
+
+        @return:
+            Band:   namedtuple, (dist, label, energy), energy shape=(NKPoint, NBand, ISPIN)
+        """
+        Band = namedtuple("Band", ("dist", "label", "energy"))
+        if Path(name).suffix == ".npz":
+            with np.load(name) as archive:
+                return Band(archive['KPoint_dist'], archive['KPoint_label'].tolist(), archive['energy'])
+
+        with open(name, "r") as f:
+            head = [f.readline().lstrip("# ").strip() for _ in range(2)]
+        ISPIN = int(head[0].split()[0].split("=")[1])
+        table = np.loadtxt(name, ndmin=2)
+        label = [""] * table.shape[0]
+        for item in head[1].split()[1:]:
+            index, value = item.split(":", 1)
+            label[int(index)] = value
+        return Band(table[:, 0], label, table[:, 1:].reshape((table.shape[0], -1, ISPIN)))
+
+
+class PROCAR(MetaFile):
+    """
+    PROCAR reader for the projected (fat) bands, the file is memory-mapped and converted one k-point block at a time:
+    the projection tables of all bands in the block are located by one regex and converted by one numpy call, then
+    reduced to the selected atoms && orbitals before the next block, so the memory is bounded by the result array
+
+    Attributes:
+        NKPoint, NBand, NAtom, ISPIN
+        columns:        orbital columns of the PROCAR in the DOSCAR naming, e.g., ['s', 'py', 'pz', 'px', ..., 'dx2']
+        atoms:          selected atoms (1-based)
+        orbitals:       selected orbitals, e.g., ['s', 'p'] ('p' sums py/pz/px), default: all columns
+        KPoint_coord:   shape=(NKPoint, 3)
+        KPoint_weight:  shape=(NKPoint,)
+        energy:         shape=(NKPoint, NBand, ISPIN), the layout of `EIGENVAL.energy`
+        occupation:     shape=(NKPoint, NBand, ISPIN)
+        projection:     float32, shape=(ISPIN, NKPoint, NBand, NSelectedAtom, NSelectedOrbital)
+    """
+
+    def __init__(self, name="PROCAR", atoms=None, orbitals=None, elements=None):
+        """
+        @param:
+            atoms:      the selector of `identify_atoms`, e.g., 1, [1, 2], '1-10' or 'Ce', default: all atoms
+            orbitals:   list, e.g., ['s', 'p'] or ['dxy'], missing orbitals contribute zero
+            elements:   element of each atom, e.g., ['Ce', 'Ce', 'O'], required by the element selector
+        """
+        super(PROCAR, self).__init__(name=name)
+        with open(self.name, "r") as f:
+            f.readline()
+            self.NKPoint, self.NBand, self.NAtom = tuple(map(int, re.findall(r"\d+", f.readline())))
+
+        if elements is not None and len(elements) != self.NAtom:
+            raise ValueError(f"{len(elements)} elements are given, but {self.name} has {self.NAtom} atoms")
+        elements = [' '] + (list(elements) if elements is not None else [' '] * self.NAtom)
+        self.atoms = sorted(identify_atoms(atoms, elements))
+        self.orbitals = [orbitals] if isinstance(orbitals, str) else orbitals
+        self.columns = None
+        self.ISPIN = None
+        self.KPoint_coord, self.KPoint_weight = None, None
+        self.energy, self.occupation, self.projection = None, None, None
+
+        self._parse()
+
+    def _parse(self):
+        with open(self.name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            header = re.search(rb"^ion +(.*?) +tot\s*$", buffer, re.MULTILINE).group(1).decode().split()
+            self.columns = DOSCAR.orbital_names(len(header))
+            self.orbitals = self.columns if self.orbitals is None else self.orbitals
+
+            # matrix[i, j] = 1 if column i contributes to orbital j, e.g., py/pz/px -> p
+            matrix = np.array([[column == orbital or (orbital in ORBITALS and column.startswith(orbital)) for orbital
+                                in self.orbitals] for column in self.columns], dtype=np.float32)
+            atoms = np.array(self.atoms, dtype=int) - 1
+
+            # the patterns start with a literal "\n...", which is searched much faster than a "^" anchor
+            starts = [match.start() for match in re.finditer(rb"\n *k-point +\d+ *:", buffer)]
+            self.ISPIN = len(starts) // self.NKPoint
+            self.KPoint_coord, self.KPoint_weight = np.zeros((self.NKPoint, 3)), np.zeros(self.NKPoint)
+            band = np.zeros((self.ISPIN, self.NKPoint, self.NBand, 2))
+            self.projection = np.zeros((self.ISPIN, self.NKPoint, self.NBand, len(atoms), len(self.orbitals)),
+                                       dtype=np.float32)
+
+            for index, (start, end) in enumerate(zip(starts, starts[1:] + [len(buffer)])):
+                spin, kpoint = divmod(index, self.NKPoint)
+                block = buffer[start:end]
+                head = re.match(rb"\n *k-point +\d+ *:(.*?)weight *= *(\S+)", block)
+                self.KPoint_coord[kpoint] = np.array(re.findall(rb"-?\d+\.\d+", head.group(1))[:3]).astype(float)
+                self.KPoint_weight[kpoint] = float(head.group(2))
+                band[spin, kpoint] = np.array(re.findall(rb"\nband +\d+ # energy +(\S+) # occ\. +(\S+)",
+                                                         block)).astype(float)
+
+                # the table rows are between the "ion ... tot" header and the "tot" line, the first table of each band
+                # is the total projection (followed by mx/my/mz for non-collinear)
+                heads = [match.end() for match in re.finditer(rb"\nion [^\n]*tot\s*\n", block)]
+                tots = np.array([match.start() for match in re.finditer(rb"\ntot ", block)])
+                tables = [block[head:tots[np.searchsorted(tots, head)]] for head in heads]
+                table = np.fromstring(b"\n".join(tables).decode(), dtype=np.float32, sep=" ")
+                table = table.reshape((self.NBand, -1, self.NAtom, len(self.columns) + 2))[:, 0, :, 1:-1]
+                self.projection[spin, kpoint] = table[:, atoms] @ matrix
+
+        self.energy, self.occupation = band.transpose((3, 1, 2, 0))  # (NKPoint, NBand, ISPIN)
+
 
 class CHGBase(StructInfoFile):
     """
@@ -1379,6 +2016,7 @@ class OUTCAR(MetaFile):
                         enumerate(self.strings) if "direct lattice vectors" in line}
         self.lattice = list(self.lattice)[0] if len(self.lattice) == 1 else self.lattice
         self._frequency = [i for i in range(len(self.strings)) if "Hz" in self.strings[i]]
+        self._hessian = [i for i in range(len(self.strings)) if "SECOND DERIVATIVES" in self.strings[i]]
         self._neb = [line for line in self.strings if "NEB:" in line]
         self._fort = [line for line in self.strings if "fort.1881" in line]
         self.spin, self.bands, self.kpoints, self.fermi, self.steps = None, None, None, None, None
@@ -1387,14 +2025,19 @@ class OUTCAR(MetaFile):
         self.finish = "reached" in self.strings[-30]
         self._parse_base()
 
+        self.timing = None
+        self._parse_timing()
+
         self.frequency = None
         if len(self._frequency):
             self._parse_freq()
 
-        self.kpoint_info, self.band_info = None, None
+        self.hessian = None
+        if len(self._hessian):
+            self._parse_hessian()
 
-        if self.finish:
-            self._parse_band()
+        self.kpoint_coord, self.eigenvalue = None, None
+        self._parse_band()
 
         self.tangent, self.last_tangent = 0., 0.
         if len(self._neb):
@@ -1404,6 +2047,19 @@ class OUTCAR(MetaFile):
         if len(self._fort):
             self._parse_fort()
 
+    @staticmethod
+    def read_force(name):
+        """
+        Read the force (the same column as `OUTCAR.force`) of each ionic step without parsing the whole OUTCAR, the
+        memory-mapped file is scanned by one regex, no line is decoded
+
+        @return:
+            force:      shape=(NIonic,)
+        """
+        with open(name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            force = re.findall(rb"FORCES: max atom, RMS +\S+ +(\S+)", buffer)
+        return np.array(force, dtype=float)
+
     def _parse_base(self):
         self.spin = [int(line.split()[2]) for line in self.strings if "ISPIN" in line][0]
         self.bands, self.kpoints = \
@@ -1423,86 +2079,142 @@ class OUTCAR(MetaFile):
         self.last_force = self.force[-1] if len(self.force) else None
         self.last_mag = self.mag[-1] if len(self.mag) else None
 
+    def _parse_timing(self):
+        """
+        Parse the timing and memory information from OUTCAR
+
+        @return:
+            register self.timing attr (type: namedtuple)
+                loop:           [cpu, real] time (sec) of each electronic step (LOOP), shape=(NElectronic, 2)
+                loop_plus:      [cpu, real] time (sec) of each finished ionic step (LOOP+), shape=(NIonic, 2)
+                scf:            electronic steps of each ionic step, shape=(NIonic,)
+                memory:         memory used on root node (kB), None if not found
+                max_memory:     maximum memory used (kB), None if the job is not finished
+                elapsed:        elapsed time (sec), None if the job is not finished
+                nsw:            NSW of the job
+        """
+        loop, loop_plus, memory, max_memory, elapsed, nsw = [], [], None, None, None, 0
+        for line in self.strings:
+            if "LOOP" in line:
+                item = line.split("time")  # `LOOP:  cpu time    0.7887: real time    1.1137`
+                value = (float(item[1].split(":")[0]), float(item[2]))
+                loop_plus.append(value) if "LOOP+" in line else loop.append(value)
+            elif "total amount of memory used by VASP" in line:  # `on root node` or `MPI-rank0`
+                memory = float(line.split()[-2])
+            elif "Maximum memory used" in line:
+                max_memory = float(line.split()[-1])
+            elif "Elapsed time" in line:
+                elapsed = float(line.split()[-1])
+            elif line.startswith("   NSW "):
+                nsw = int(line.split()[2])
+
+        _, scf = np.unique(self.steps.ionic, return_counts=True)
+        self.timing = namedtuple("Timing", ("loop", "loop_plus", "scf", "memory", "max_memory", "elapsed", "nsw"))(
+            np.array(loop).reshape(-1, 2), np.array(loop_plus).reshape(-1, 2), scf, memory, max_memory, elapsed, nsw)
+
     def _parse_freq(self):
         """
         Parse frequency information from OUTCAR
 
         @return:
-            register self.frequency attr (type: namedtuple)
-        """
-        image, wave_number, vib_energy, coord, vibration = [], [], [], [], []
-        for index in self._frequency:
-            item = self.strings[index].split()
-            image.append(False) if item[1] == "f" else image.append(True)
-            wave_number.append(float(item[-4]))
-            vib_energy.append(float(item[-2]))
-            item = list(map(lambda x: [float(i) for i in x],
-                            np.char.split(self.strings[index + 2:index + 2 + len(self.element)])))
-            coord.append(np.array(item)[:, :3])
-            vibration.append(np.array(item)[:, 3:])
+            register self.frequency attr (type: namedtuple), coord/vibration shape=(NMode, NAtom, 3)
+        """
+        head = [self.strings[index].split() for index in self._frequency]
+        image = [item[1] != "f" for item in head]
+        wave_number = np.array([item[-4] for item in head], dtype=float)
+        vib_energy = np.array([item[-2] for item in head], dtype=float)
+
+        # one bulk conversion of all modes' `X Y Z dx dy dz` lines
+        line_index = (np.array(self._frequency)[:, np.newaxis] + 2 + np.arange(len(self.element))).reshape(-1)
+        block = np.array(" ".join([self.strings[index] for index in line_index]).split(), dtype=float)
+        block = block.reshape((len(self._frequency), len(self.element), 6))
 
         self.frequency = namedtuple("Frequency",
                                     ("image", "wave_number", "vib_energy", "coord", "vibration"))(image,
-                                                                                                  np.array(wave_number),
-                                                                                                  np.array(vib_energy),
-                                                                                                  np.array(coord),
-                                                                                                  np.array(vibration))
+                                                                                                  wave_number,
+                                                                                                  vib_energy,
+                                                                                                  block[..., :3],
+                                                                                                  block[..., 3:])
 
-    def _parse_band(self):
+    def _parse_hessian(self):
         """
-        Parse band information from OUTCAR
+        Parse the SECOND DERIVATIVES matrix from OUTCAR
 
         @return:
-            register self.kpoint_info (type: tuple(List[KPoint(coord, value)], List[KPoint(coord, value)]))
+            register self.hessian attr (type: namedtuple)
+                atom:       atom index (0-based) of each degree of freedom, shape=(NDof,)
+                axis:       cartesian axis (0-x, 1-y, 2-z) of each degree of freedom, shape=(NDof,)
+                matrix:     symmetrized force constant matrix d2E/dxdy (eV/Å^2), shape=(NDof, NDof)
         """
+        start = self._hessian[-1] + 2  # skip the title and `-----` lines
+        label = self.strings[start].split()
+        block = np.array(" ".join(self.strings[start + 1:start + 1 + len(label)]).split())
+        matrix = -block.reshape((len(label), len(label) + 1))[:, 1:].astype(float)  # VASP prints -d2E/dxdy
 
-        def spin_obtain(kpoint_group):
-            """
-            According to the index-list of kpoint in OUTCAR, parse the band_info
-
-            @param:
-                kpoint_group:       list, record the index of 'k-point' field occurrence in OUTCAR
-
-            @return:
-                spin:      List[KPoint(coord, value)], record the each k-point info
-            """
+        atom = np.array([int(item[:-1]) - 1 for item in label])
+        axis = np.array(["XYZ".index(item[-1]) for item in label])
+        self.hessian = namedtuple("Hessian", ("atom", "axis", "matrix"))(atom, axis, (matrix + matrix.T) / 2)
 
-            spin = []
-            trans_func = lambda x: [int(x[0]), float(x[1]) - self.fermi, float(x[2])]  # format transform
-            # parse band_info
-            for index in kpoint_group:
-                coord = list(map(float, band_info[index].split()[3:]))
-                value = list(map(trans_func, np.char.split(band_info[index + 2:index + 2 + self.bands])))
-                spin.append(KPoint(coord, np.array(value)))
-
-            return spin
+    def _parse_band(self):
+        """
+        Parse band information of the last step from OUTCAR
 
-        def transform_band(spin):
-            band = []
-            for kpoint in spin:
-                band.append(kpoint.value[:, 1])
+        @return:
+            register self.kpoint_coord (type: np.ndarray, shape=(NKPoint, 3))
+            register self.eigenvalue (type: np.ndarray, shape=(ISPIN, NKPoint, NBand, 2)), [energy - E_fermi, occupation]
+        """
+        content = self.strings[self.steps.index[-1]:]  # calculate bandgap from last step
+        start_index = [index for index, line in enumerate(content) if "E-fermi" in line]
+        if not len(start_index):  # the last step is not converged yet
+            return
+        start_index = start_index[0]
+        end_index = [index for index, line in enumerate(content) if "-----" in line and index > start_index]
+        band_info = content[start_index:end_index[0] if len(end_index) else len(content)]  # band_info in last step
+
+        kpoint_index = np.array([index for index, line in enumerate(band_info) if "k-point" in line])
+        if len(kpoint_index) != self.spin * self.kpoints:  # the block of a running job is still being written
+            logger.debug(f"{self.name}: found {len(kpoint_index)} k-point blocks in the last step, "
+                           f"expected {self.spin * self.kpoints}, skip the band parsing")
+            return
+
+        # one bulk conversion of all `band No.  energy  occupation` lines
+        band_index = (kpoint_index[:, np.newaxis] + 2 + np.arange(self.bands)).reshape(-1)
+        value = np.array(" ".join([band_info[index] for index in band_index]).split(), dtype=float).reshape(-1, 3)
+        value = value.reshape((self.spin, self.kpoints, self.bands, 3))[..., 1:]
+        value[..., 0] -= self.fermi
+
+        coord = " ".join(band_info[index].split(":")[1] for index in kpoint_index[:self.kpoints])
+        self.kpoint_coord = np.array(coord.split(), dtype=float).reshape(-1, 3)
+        self.eigenvalue = value
 
-            band = np.array(band)
-            band = band.transpose((1, 0))
-            return band
+    @property
+    def kpoint_info(self):
+        """
+        Per-k-point view of the last-step eigenvalues, kept for compatibility, `eigenvalue` is preferred
 
-        content = self.strings[self.steps.index[-1]:]  # calculate bandgap from last step
-        start_index = [index for index, line in enumerate(content) if "E-fermi" in line][0]
-        end_index = [index for index, line in enumerate(content) if "-----" in line and index > start_index][0]
-        band_info = content[start_index:end_index]  # band_info content in last step
-        KPoint = namedtuple("KPoint", ("coord", "value"))  # including `kpoint coord` and `each band energy`
-        if self.spin == 2:
-            kpoint_index = [index for index, line in enumerate(band_info) if "k-point" in line]
-            half_len = int(len(kpoint_index) / 2)
-            kpoint_up, kpoint_down = kpoint_index[:half_len], kpoint_index[half_len:]  # 'k-point' occurrence index
+        @return:
+            KPoint_info:    namedtuple, (up, down) for ISPIN = 2, (up,) for ISPIN = 1
+                            each field is List[KPoint(coord, value)], value: [band No., energy - E_fermi, occupation]
+        """
+        if self.eigenvalue is None:
+            return None
+        KPoint = namedtuple("KPoint", ("coord", "value"))
+        number = np.arange(1, self.bands + 1, dtype=float)[:, np.newaxis]
+        spins = [[KPoint(coord.tolist(), np.hstack((number, value))) for coord, value in
+                  zip(self.kpoint_coord, channel)] for channel in self.eigenvalue]
+        return namedtuple("KPoint_info", ("up", "down")[:self.spin])(*spins)
 
-            spin_up = spin_obtain(kpoint_up)
-            spin_down = spin_obtain(kpoint_down)
+    @property
+    def band_info(self):
+        """
+        Band energies (relative to E-fermi) of the last step, kept for compatibility, `eigenvalue` is preferred
 
-            self.kpoint_info = namedtuple("KPoint_info", ("up", "down"))(spin_up, spin_down)
-            self.band_info = namedtuple("Band_info", ("up", "down"))(transform_band(spin_up), transform_band(spin_down))
-        else:
-            logger.warning("Non-spin polarized calculation may have error, please check!!")
+        @return:
+            Band_info:      namedtuple, (up, down) for ISPIN = 2, (up,) for ISPIN = 1, shape=(NBand, NKPoint)
+        """
+        if self.eigenvalue is None:
+            return None
+        return namedtuple("Band_info", ("up", "down")[:self.spin])(*self.eigenvalue[..., 0].transpose((0, 2, 1)))
 
     def _parse_neb(self):
         self.tangent = [float(line.split()[-1]) for line in self.strings if line.find("tangent") != -1]
@@ -1512,6 +2224,35 @@ class OUTCAR(MetaFile):
         self.condist = [float(line.split()[-1]) for line in self.strings if line.find("distance after opt") != -1]
         self.last_condist = self.condist[-1]
 
+    def band_edge(self, cutoff=0.01):
+        """
+        Locate the HOMO and LUMO of each spin channel from the last-step eigenvalues
+
+        @param:
+            cutoff:     any occupy lower than cutoff will be treated as the empty state
+
+        @return:
+            BandEdge:   namedtuple, each field has shape=(ISPIN,)
+                        homo/lumo:                  energy of HOMO/LUMO (relative to E-fermi)
+                        homo_kpoint/lumo_kpoint:    k-point index of HOMO/LUMO
+                        gap:                        fundamental gap of each spin
+                        direct_gap:                 minimum direct (vertical) gap of each spin
+        """
+        if self.eigenvalue is None:
+            raise AttributeError(None, f"{self.name} don't include the band information")
+
+        energy, occupation = self.eigenvalue[..., 0], self.eigenvalue[..., 1]
+        occupied = occupation > cutoff
+        homo_k = np.where(occupied, energy, -np.inf).max(axis=-1)  # shape=(ISPIN, NKPoint)
+        lumo_k = np.where(occupied, np.inf, energy).min(axis=-1)
+
+        homo_kpoint, lumo_kpoint = homo_k.argmax(axis=-1), lumo_k.argmin(axis=-1)
+        homo, lumo = homo_k.max(axis=-1), lumo_k.min(axis=-1)
+        direct_gap = (lumo_k - homo_k).min(axis=-1)
+
+        return namedtuple("BandEdge", ("homo", "lumo", "homo_kpoint", "lumo_kpoint", "gap", "direct_gap"))(
+            homo, lumo, homo_kpoint, lumo_kpoint, lumo - homo, direct_gap)
+
     def bandgap(self, cutoff=0.01):
         """
         Calculated the bandgap from OUTCAR file
@@ -1523,44 +2264,124 @@ class OUTCAR(MetaFile):
             type:       type of bandgap, ['direct', 'indirect']
             bandgap:    value of bandgap
         """
+        edge = self.band_edge(cutoff=cutoff)
+        homo_spin, lumo_spin = edge.homo.argmax(), edge.lumo.argmin()
+        bandgap = edge.lumo[lumo_spin] - edge.homo[homo_spin]
+        if edge.homo_kpoint[homo_spin] == edge.lumo_kpoint[lumo_spin]:
+            return "direct", bandgap
+        else:
+            return "indirect", bandgap
 
-        def MO_obtain(spin):
-            """
-            According to the kpoint_info, return the homo and lumo
+    def performance(self, window=5):
+        """
+        Summarize the performance profile of the job
 
-            @param:
-                spin:       List[KPoint(coord, value)], record the each k-point info
+        @param:
+            window:     number of the last ionic steps used to project the remaining time
 
-            @return:
-                homo_spin:      KPoint(coord, value), record the homo information
-                lumo_spin:      KPoint(coord, value), record the lumo information
-            """
+        @return:
+            Performance:    namedtuple
+                wall:           wall time (sec) of each finished ionic step, shape=(NIonic,)
+                scf:            electronic steps of each finished ionic step, shape=(NIonic,)
+                wall_per_scf:   wall time (sec) per electronic step of each finished ionic step, shape=(NIonic,)
+                total:          wall time (sec) of the job so far
+                remaining:      projected wall time (sec) to finish NSW ionic steps, an upper bound as the job may
+                                converge earlier; 0 if the job is ended
+        """
+        wall = self.timing.loop_plus[:, 1]
+        scf = self.timing.scf[:len(wall)]
+        total = self.timing.elapsed if self.timing.elapsed is not None else wall.sum()
+        remaining = 0. if self.timing.elapsed is not None or not len(wall) else \
+            max(self.timing.nsw - len(wall), 0) * wall[-window:].mean()
+        return namedtuple("Performance", ("wall", "scf", "wall_per_scf", "total", "remaining"))(
+            wall, scf, wall / np.maximum(scf, 1), total, remaining)
+
+    def _hessian_mass(self, mass=None):
+        """
+        Resolve the atomic masses used to mass-weight the Hessian
 
-            # calculate homo and lumo
-            homo_spin, lumo_spin = None, None
-            for item in spin:
-                lumo_index = np.where(item.value[:, 2] <= cutoff)[0][0]
-                homo_index = lumo_index - 1
-                homo, lumo = item.value[homo_index], item.value[lumo_index]
-                homo_spin = KPoint(item.coord, homo) if homo_spin is None or homo_spin.value[1] < homo[1] else homo_spin
-                lumo_spin = KPoint(item.coord, lumo) if lumo_spin is None or lumo_spin.value[1] > lumo[1] else lumo_spin
-            return homo_spin, lumo_spin
+        @param:
+            mass:   None, masses from element.yaml
+                    dict, isotope substitution of an element or an atom (1-based), e.g., {"H": 2.014, 12: 18.0}
+                    list of dict, a batch of isotope substitutions
+                    np.ndarray, explicit masses, shape=(NAtom,) or (NSet, NAtom)
 
-        KPoint = namedtuple("KPoint", ("coord", "value"))  # including `kpoint coord` and `each band energy`
-        if self.spin == 2:
+        @return:
+            masses:     np.ndarray, shape=(NSet, NAtom)
+            batch:      whether the mass is a batch of mass sets
+        """
+        if mass is not None and not isinstance(mass, dict) and not (
+                isinstance(mass, (list, tuple)) and len(mass) and isinstance(mass[0], dict)):
+            mass = np.array(mass, dtype=float)
+            if mass.shape[-1] != len(self.element) or mass.ndim > 2:
+                raise ValueError(f"mass should have shape=({len(self.element)},) or (NSet, {len(self.element)})")
+            return np.atleast_2d(mass), mass.ndim == 2
+
+        batch = isinstance(mass, (list, tuple))
+        mass = [{}] if mass is None else [mass] if isinstance(mass, dict) else mass
+        masses = np.repeat(np.array(Atoms(formula=self.element).mass, dtype=float)[np.newaxis], len(mass), axis=0)
+        for masses_i, substitution in zip(masses, mass):
+            for key, value in substitution.items():
+                if isinstance(key, str):
+                    masses_i[np.array(self.element) == key] = value
+                else:
+                    masses_i[key - 1] = value
+        return masses, batch
 
-            homo_up, lumo_up = MO_obtain(self.kpoint_info[0])
-            homo_down, lumo_down = MO_obtain(self.kpoint_info[1])
+    def normal_modes(self, atoms=None, mass=None, project=False):
+        """
+        Recompute the frequencies by re-diagonalizing the mass-weighted Hessian, without rerunning VASP
 
-            homo_real = homo_up if homo_up.value[1] > homo_down.value[1] else homo_down
-            lumo_real = lumo_up if lumo_up.value[1] < lumo_down.value[1] else lumo_down
+        @param:
+            atoms:      atoms kept in the (partial) Hessian, format same as `identify_atoms`, default: all displaced atoms
+            mass:       masses of the mass-weighting, see `_hessian_mass`; a batch is diagonalized in one call
+            project:    project out the rigid translations before diagonalizing
 
-            if homo_real.coord == lumo_real.coord:
-                return "direct", lumo_real.value[1] - homo_real.value[1]
-            else:
-                return "indirect", lumo_real.value[1] - homo_real.value[1]
-        else:
-            raise NotImplementedError("Non-spin polarized calculation has not been implemented")
+        @return:
+            Frequency:  namedtuple same as self.frequency (imaginary modes last), a list of it if mass is a batch
+        """
+        if self.hessian is None:
+            raise FrequencyError(f"{self.name} don't include the SECOND DERIVATIVES")
+
+        keep = np.ones(len(self.hessian.atom), dtype=bool) if atoms is None else \
+            np.isin(self.hessian.atom, np.array(identify_atoms(atoms, [""] + self.element)) - 1)
+        if not keep.any():
+            raise FrequencyError(f"None of the atoms {atoms} is displaced in {self.name}")
+        atom, axis = self.hessian.atom[keep], self.hessian.axis[keep]
+        matrix = self.hessian.matrix[np.ix_(keep, keep)]
+
+        masses, batch = self._hessian_mass(mass)
+        sqrt_mass = np.sqrt(masses[:, atom])  # shape=(NSet, NDof)
+        dynamic = matrix / (sqrt_mass[:, :, np.newaxis] * sqrt_mass[:, np.newaxis, :])
+
+        # P = 1 - sum(t_a * t_a^T), t_a: mass-weighted unit translation along axis a
+        translation = np.zeros((len(masses), 3, len(atom)))
+        if project:
+            translation[:, axis, np.arange(len(atom))] = sqrt_mass
+            norm = np.linalg.norm(translation, axis=-1, keepdims=True)
+            translation = np.divide(translation, norm, out=translation, where=norm > 0)
+            projector = np.eye(len(atom)) - np.einsum("sai,saj->sij", translation, translation)
+            dynamic = projector @ dynamic @ projector
+
+        # eigenvalues of -H in ascending order: real modes from high to low, then the imaginary ones
+        eigenvalue, eigenvector = np.linalg.eigh(-dynamic)
+        if project:  # drop the projected (zero) translational modes
+            order = np.sort(np.argsort(np.abs(eigenvalue), axis=-1)[:, len(set(axis)):], axis=-1)
+            eigenvalue = np.take_along_axis(eigenvalue, order, axis=-1)
+            eigenvector = np.take_along_axis(eigenvector, order[:, np.newaxis, :], axis=-1)
+
+        hz = np.sqrt(np.abs(eigenvalue) * EV_ANGSTROM2_AMU) / (2 * np.pi)
+        wave_number, vib_energy = hz / LIGHT_SPEED_CM, hz * PLANCK_EV * 1000
+        coord = self.frequency.coord[0] if self.frequency is not None else np.zeros((len(self.element), 3))
+        vibration = np.zeros(eigenvector.shape[:1] + eigenvector.shape[-1:] + (len(self.element), 3))
+        vibration[:, :, atom, axis] = eigenvector.transpose((0, 2, 1))
+
+        Frequency = namedtuple("Frequency", ("image", "wave_number", "vib_energy", "coord", "vibration"))
+        result = [Frequency(list(eigenvalue_i > 0), wave_number_i, vib_energy_i,
+                            np.repeat(coord[np.newaxis], len(eigenvalue_i), axis=0), vibration_i)
+                  for eigenvalue_i, wave_number_i, vib_energy_i, vibration_i in
+                  zip(eigenvalue, wave_number, vib_energy, vibration)]
+        return result if batch else result[0]
 
     def animation_freq(self, freq: [str, int] = "image", frames: int = 30, scale: float = 0.6):
         """
@@ -1593,26 +2414,267 @@ class OUTCAR(MetaFile):
         direction_all = np.concatenate([direction_001, direction_010, direction_101, direction_110])
         direction_all = direction_all[:, np.newaxis, np.newaxis]
 
-        # generate multi-frames new coordinates
-        coord_freq = []
-        for freq_index in freq:
-            logger.info(f"Processing freq{freq_index + 1} file ...")
-            coord = np.repeat(self.frequency.coord[freq_index][np.newaxis, :], direction_all.shape[0], axis=0)
-            vibration = np.repeat(self.frequency.vibration[freq_index][np.newaxis, :], direction_all.shape[0], axis=0)
-            coord_freq.append(coord + vibration * direction_all)
-
         # generate the *.arc file
         if not isinstance(self.lattice, Lattice):
             raise NotImplementedError("we here only considered the lattice unchangeable for the whole calculation")
 
-        for freq_index, coord_index in zip(freq, coord_freq):
-            structure = [Structure(atoms=Atoms(formula=self.element, cart_coord=cart_coord), lattice=self.lattice)
-                         for cart_coord in coord_index]
-            ARCFile.write(name=f"freq{freq_index + 1}.arc", structure=structure, lattice=self.lattice)
+        for freq_index in freq:
+            logger.info(f"Processing freq{freq_index + 1} file ...")
+            coord = self.frequency.coord[freq_index] + self.frequency.vibration[freq_index] * direction_all
+            ARCFile.write_coord(name=f"freq{freq_index + 1}.arc", coord=coord, element=self.element,
+                                lattice=self.lattice)
 
         logger.info(f"All freq transform to corresponding *.arc files")
 
 
+class OSZICAR(MetaFile):
+    """
+    OSZICAR reader, a lightweight substitute of OUTCAR to monitor the optimization (or MD): the ionic lines are matched
+    by regex over the whole file and each column is converted by one numpy cast
+
+    Attributes:
+        step:               ionic step numbers, shape=(NIonic,)
+        free_energy:        F, free energy TOTEN, shape=(NIonic,)
+        energy:             E0, energy(sigma->0), shape=(NIonic,)
+        dE:                 energy change of the ionic step, None for MD
+        mag:                magnetization, None if ISPIN=1
+        scf:                number of electronic steps of each ionic step, shape=(NIonic,)
+        temperature:        T, MD only, None otherwise
+        total_energy:       E, total energy (with the kinetic energy), MD only
+        kinetic_energy:     EK, MD only
+    """
+    COLUMNS = {"free_energy": rb"\bF= *(\S+)", "energy": rb"\bE0= *(\S+)", "dE": rb"\bd E *= *(\S+)",
+               "mag": rb"\bmag= *(\S+)", "temperature": rb"\bT= *(\S+)", "total_energy": rb"\bE= *(\S+)",
+               "kinetic_energy": rb"\bEK= *(\S+)"}
+
+    def __init__(self, name="OSZICAR"):
+        super(OSZICAR, self).__init__(name=name)
+        with open(self.name, "rb") as f:
+            content = f.read()
+
+        ionic = list(re.finditer(rb"^ *(\d+) +[TF]=.*$", content, re.MULTILINE))
+        self.step = np.array([match.group(1) for match in ionic], dtype=int)
+        lines = b"\n".join(match.group(0) for match in ionic)
+        for attr, pattern in self.COLUMNS.items():  # a column is kept only if it appears in every ionic line
+            values = re.findall(pattern, lines)
+            setattr(self, attr, np.array(values).astype(float) if len(values) == len(ionic) and len(ionic) else None)
+
+        # the electronic lines (DAV:, RMM:, CG :, ...) belong to the next ionic line
+        electronic = np.array([match.start() for match in re.finditer(rb"^[A-Z][A-Z ]{1,3}: +\d+", content,
+                                                                       re.MULTILINE)], dtype=np.int64)
+        ionic_start = np.array([match.start() for match in ionic], dtype=np.int64)
+        self.scf = np.bincount(np.searchsorted(ionic_start, electronic), minlength=len(ionic) + 1)[:len(ionic)]
+
+    def __len__(self):
+        return len(self.step)
+
+    @property
+    def last_energy(self):
+        return self.energy[-1] if len(self) else None
+
+
+class VASPRUN(MetaFile):
+    """
+    vasprun.xml reader, the file is streamed by `etree.iterparse`: each block is converted into numpy arrays as soon as
+    it's closed and then released, so the memory is bounded by the largest block (one ionic step, one k-point of the
+    eigenvalues or one atom of the projected DOS) instead of the whole xml tree
+
+    Attributes:
+        element:            element of each atom, e.g., ['Ce', 'Ce', 'O']
+        selective:          selective dynamics flags of the initial structure, shape=(NAtom, 3), None if absent
+        KPoint_coord:       fractional coordinates of the k-points, shape=(NKPoint, 3)
+        KPoint_weight:      shape=(NKPoint,)
+        lattice:            lattice of each ionic step, shape=(NIonic, 3, 3)
+        position:           fractional coordinates of each ionic step, shape=(NIonic, NAtom, 3)
+        free_energy:        e_fr_energy, free energy TOTEN, shape=(NIonic,)
+        energy:             e_wo_entrp, energy without entropy (the same as `OUTCAR.energy`), shape=(NIonic,)
+        energy_sigma0:      e_0_energy, energy(sigma->0), shape=(NIonic,)
+        force:              shape=(NIonic, NAtom, 3)
+        stress:             shape=(NIonic, 3, 3), None if absent
+        scf:                number of electronic steps of each ionic step, shape=(NIonic,)
+        eigenvalue:         shape=(NKPoint, NBand, ISPIN), the layout of `EIGENVAL.energy`
+        occupation:         shape=(NKPoint, NBand, ISPIN)
+        fermi:              E-fermi
+        dos_energy:         energy points of the DOS (not shifted), shape=(NDOS,)
+        total_dos:          shape=(ISPIN, NDOS)
+        partial_dos:        projected DOS, shape=(NAtom, ISPIN, NDOS, NOrbital), None if absent
+        orbitals:           orbital names of partial_dos, e.g., ['s', 'py', 'pz', 'px', ...]
+    """
+    TAGS = ("atominfo", "kpoints", "structure", "varray", "energy", "scstep", "set", "eigenvalues", "total", "partial",
+            "dos", "projected", "calculation")
+
+    def __init__(self, name="vasprun.xml"):
+        super(VASPRUN, self).__init__(name=name)
+        self.element, self.selective = None, None
+        self.KPoint_coord, self.KPoint_weight = None, None
+        self.lattice, self.position, self.force, self.stress, self.scf = None, None, None, None, None
+        self.free_energy, self.energy, self.energy_sigma0 = None, None, None
+        self.eigenvalue, self.occupation, self.fermi = None, None, None
+        self.dos_energy, self.total_dos, self.partial_dos, self.orbitals = None, None, None, None
+
+        self._parse()
+
+    def __len__(self):
+        return len(self.energy)
+
+    @staticmethod
+    def _numbers(elem, tag):
+        """convert the text of all the <tag> (r or v) under elem in one call"""
+        return np.fromstring(" ".join(item.text for item in elem.iter(tag)), sep=" ")
+
+    @staticmethod
+    def _release(elem, siblings=False):
+        """free the parsed element, also drop its (parsed) previous siblings, otherwise the empty shells pile up"""
+        elem.clear()
+        if siblings:
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    @staticmethod
+    def _atominfo(elem):
+        return [rc[0].text.strip() for rc in elem.find("array[@name='atoms']/set")]
+
+    @staticmethod
+    def read_element(name):
+        """read the element list only, the file is streamed until the <atominfo> block (near the top)"""
+        for _, elem in etree.iterparse(str(name), events=("end",), tag="atominfo"):
+            return VASPRUN._atominfo(elem)
+        raise ValueError(f"<atominfo> not found in {name}")
+
+    def _parse(self):
+        steps = {key: [] for key in ("lattice", "position", "force", "stress", "free_energy", "energy",
+                                     "energy_sigma0", "scf")}
+        current, kpoints, ions, scf = {}, [], [], 0
+
+        for _, elem in etree.iterparse(str(self.name), events=("end",), tag=self.TAGS, huge_tree=True):
+            parent = elem.getparent()
+            parent_tag = parent.tag if parent is not None else None
+            if elem.tag == "set":
+                comment = elem.get("comment", "")
+                if not comment.startswith(("kpoint", "ion")):
+                    continue
+                block = next(elem.iterancestors("eigenvalues", "partial", "projected"), None)
+                if block is not None and block.tag == "eigenvalues" and comment.startswith("kpoint"):
+                    kpoints.append(self._numbers(elem, "r").reshape((-1, 2)))  # NBand x [energy, occupation]
+                elif block is not None and block.tag == "partial" and comment.startswith("ion"):
+                    ions.append(np.array([self._numbers(spin, "r").reshape((len(spin), -1))[:, 1:] for spin in elem]))
+                self._release(elem, siblings=True)
+            elif elem.tag == "atominfo":
+                self.element = self._atominfo(elem)
+                self._release(elem)
+            elif elem.tag == "kpoints" and parent_tag == "modeling":
+                self.KPoint_coord = self._numbers(elem.find("varray[@name='kpointlist']"), "v").reshape((-1, 3))
+                self.KPoint_weight = self._numbers(elem.find("varray[@name='weights']"), "v")
+                self._release(elem)
+            elif elem.tag == "structure" and parent_tag == "calculation":
+                current['lattice'] = self._numbers(elem.find("crystal/varray[@name='basis']"), "v").reshape((3, 3))
+                current['position'] = self._numbers(elem.find("varray[@name='positions']"), "v").reshape((-1, 3))
+                self._release(elem)
+            elif elem.tag == "structure" and elem.get("name") == "initialpos":
+                selective = elem.find("varray[@name='selective']")
+                if selective is not None:
+                    flags = " ".join(item.text for item in selective).split()
+                    self.selective = np.array(flags).reshape((-1, 3)) == "T"
+                self._release(elem)
+            elif elem.tag == "varray" and parent_tag == "calculation" and elem.get("name") in ("forces", "stress"):
+                current[{"forces": "force", "stress": "stress"}[elem.get("name")]] = \
+                    self._numbers(elem, "v").reshape((-1, 3))
+                self._release(elem)
+            elif elem.tag == "energy" and parent_tag == "calculation":
+                energy = {item.get("name"): float(item.text) for item in elem.iter("i")}
+                current.update(free_energy=energy['e_fr_energy'], energy=energy['e_wo_entrp'],
+                               energy_sigma0=energy['e_0_energy'])
+                self._release(elem)
+            elif elem.tag == "scstep":
+                scf += 1
+                self._release(elem)
+            elif elem.tag == "eigenvalues":
+                if parent_tag == "calculation" and len(kpoints):
+                    block = np.array(kpoints).reshape((-1, len(self.KPoint_coord)) + kpoints[0].shape)
+                    self.eigenvalue, self.occupation = block.transpose((3, 1, 2, 0))  # (NKPoint, NBand, ISPIN)
+                kpoints = []
+                self._release(elem)
+            elif elem.tag == "total":
+                total = np.array([self._numbers(spin, "r").reshape((len(spin), -1)) for spin in elem.iter("set") if
+                                  spin.get("comment", "").startswith("spin")])  # ISPIN x NDOS x [E, DOS, integrated]
+                self.dos_energy, self.total_dos = total[0, :, 0], total[..., 1]
+                self._release(elem)
+            elif elem.tag == "partial":
+                self.orbitals = [field.text.strip() for field in elem.iter("field")][1:]
+                self.partial_dos = np.array(ions) if len(ions) else None
+                ions = []
+                self._release(elem)
+            elif elem.tag == "dos" and parent_tag == "calculation":
+                self.fermi = float(elem.findtext("i[@name='efermi']"))
+                self._release(elem)
+            elif elem.tag == "projected":
+                self._release(elem)
+            elif elem.tag == "calculation":
+                current['scf'], scf = scf, 0
+                for key, value in steps.items():
+                    value.append(current.get(key))
+                current = {}
+                self._release(elem, siblings=True)
+
+        for key, value in steps.items():  # the stress is absent for some ISIF
+            setattr(self, key, None if any(item is None for item in value) else np.array(value))
+        if self.energy is None:
+            self.energy = np.array([])
+
+    @property
+    def last_energy(self):
+        return self.energy[-1] if len(self) else None
+
+    @property
+    def force_max(self):
+        """
+        Max atomic force of each ionic step (the same quantity as `OUTCAR.force`), the components fixed by the
+        selective dynamics are excluded
+
+        @return:
+            force_max:  shape=(NIonic,)
+        """
+        force = self.force if self.selective is None else self.force * self.selective
+        return np.linalg.norm(force, axis=-1).max(axis=1)
+
+    @property
+    def force_rms(self):
+        """
+        RMS of the force components of each ionic step, averaged over the components unfixed by the selective dynamics
+
+        @return:
+            force_rms:  shape=(NIonic,)
+        """
+        if self.selective is None:
+            return np.sqrt((self.force ** 2).mean(axis=(1, 2)))
+        return np.sqrt(((self.force * self.selective) ** 2).sum(axis=(1, 2)) / max(int(self.selective.sum()), 1))
+
+    def dos(self):
+        """
+        The DOS in the layout of `DOSCAR.load`
+
+        @return:
+            energy:     E - E_fermi, shape=(NDOS,)
+            TDOS:       [tot_up, tot_down], shape=(NDOS, 2), tot_down is negated and is zero for ISPIN=1
+            LDOS:       shape=(NAtom, NDOS, NChannel), the spin-down channels are negated
+            columns:    channel names of LDOS, see `DOSCAR.project`
+        """
+        sign = np.array([1., -1.])[:len(self.total_dos)]
+        TDOS = np.zeros((len(self.dos_energy), 2))
+        TDOS[:, :len(self.total_dos)] = (self.total_dos * sign[:, np.newaxis]).T
+
+        if self.partial_dos is None:
+            return self.dos_energy - self.fermi, TDOS, np.zeros((0, len(self.dos_energy), 2)), ['up', 'down']
+
+        NAtom, ISPIN, NDOS, NOrbital = self.partial_dos.shape
+        names = DOSCAR.orbital_names(NOrbital)
+        raw = np.zeros((NAtom, NDOS, NOrbital, 2))
+        raw[..., :ISPIN] = (self.partial_dos * sign[:, np.newaxis, np.newaxis]).transpose((0, 2, 3, 1))
+        LDOS, columns = DOSCAR.project(raw.reshape((NAtom, NDOS, -1)), [f"{name}_{spin}" for name in names for
+                                                                         spin in ['up', 'down']])
+        return self.dos_energy - self.fermi, TDOS, LDOS, columns
+
+
 class MODECAR(MetaFile):
     @staticmethod
     def write_from_freq(freq: int, scale: float, outcar="OUTCAR"):
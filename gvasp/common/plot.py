@@ -1,66 +1,80 @@
+import json
 import logging
-from collections import defaultdict, namedtuple
-from functools import wraps
-from itertools import product
+from collections import defaultdict, namedtuple, OrderedDict
+from multiprocessing import Pool as ProcessPool, cpu_count
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
-from pandas import DataFrame
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
 from scipy import interpolate
 from scipy.integrate import simps
 
-from gvasp.common.constant import COLUMNS_32
 from gvasp.common.figure import Figure, SolidLine, DashLine, Text, plot_wrapper, PchipLine
-from gvasp.common.file import CONTCAR, DOSCAR, EIGENVAL, OUTCAR, POSCAR, LOCPOT, CHGCAR_diff
+from gvasp.common.file import CONTCAR, DOSCAR, EIGENVAL, OUTCAR, OSZICAR, POSCAR, PROCAR, LOCPOT, CHGCAR_diff, \
+    VASPRUN
 from gvasp.common.structure import Structure
 from gvasp.common.task import NEBTask
-from gvasp.common.utils import identify_atoms, search_peak
+from gvasp.common.utils import identify_atoms, search_peaks
 
 pd.set_option('display.max_columns', None)  # show all columns
 pd.set_option('display.max_rows', None)  # show all rows
 
 logger = logging.getLogger(__name__)
 
+_DOSCAR_CACHE = OrderedDict()  # (path, size, mtime, ISPIN, LORBIT) -> (energy, TDOS, LDOS, columns), read-only arrays
+_DOSCAR_CACHE_SIZE = 8  # least recently used DOSCARs beyond this number are dropped
 
-def interpolated_wrapper(func):
-    @wraps(func)
-    def wrapper(self):
-        DOSL_data = namedtuple("DOSL_data", ("energy", "up", "down"))
-        x_out, y_out = [], []
-        for x, y, number, magnification in func(self):
-            x_arr = np.array(x)
-            y_arr = np.array(y)
-            x_new = np.linspace(np.min(x_arr), np.max(x_arr), len(x) * magnification)
-            f = interpolate.interp1d(x_arr, y_arr, kind='cubic')
-            y_new = f(x_new)
 
-            if not self.avgflag:
-                number = 1
-
-            x_out.append(x_new)
-            y_out.append(y_new / number)
-
-        DOSL_data.energy = x_out[0]
-        DOSL_data.up = y_out[0]
-        DOSL_data.down = y_out[1]
+def interpolate_curves(energy, curves, grid):
+    """
+    Evaluate the cubic splines of many curves sampled on the same energy points in one call
 
-        return DOSL_data
+    Args:
+        energy (np.ndarray): sampled energy points, shape=(NDOS,)
+        curves (np.ndarray): sampled values, shape=(NCurve, NDOS)
+        grid (np.ndarray): new energy grid, the points outside the sampled energy range are dropped
 
-    return wrapper
+    Returns:
+        grid (np.ndarray): new energy grid inside the sampled energy range
+        values (np.ndarray): shape=(NCurve, len(grid))
+    """
+    grid = grid[(grid >= energy[0]) & (grid <= energy[-1])]
+    return grid, interpolate.CubicSpline(energy, curves, axis=-1)(grid)
 
 
 class PostDOS(Figure):
 
-    def __init__(self, dos_files: list, pos_files: list, ISPIN=2, LORBIT=12, align=None, xlabel="Energy (eV)",
-                 ylabel="Density of States (a.u.)", **kargs):
+    def __init__(self, dos_files: list, pos_files: list, ISPIN=2, LORBIT=12, align=None, prominence=None, dpi=None,
+                 cache=False, xlabel="Energy (eV)", ylabel="Density of States (a.u.)", **kargs):
         super(PostDOS, self).__init__(xlabel=xlabel, ylabel=ylabel, **kargs)
 
-        self.managers = [DOSData(dos_file=dos_file, pos_file=pos_file, ISPIN=ISPIN, LORBIT=LORBIT) for
-                         dos_file, pos_file in zip(dos_files, pos_files)]
+        self.managers = DOSData.load_many(dos_files=dos_files, pos_files=pos_files, ISPIN=ISPIN, LORBIT=LORBIT,
+                                          cache=cache)
 
         self.align = align
+        self.prominence = prominence
+        self.dpi = self.fig.dpi if dpi is None else dpi
+
+    def grid(self, shift=None):
+        """
+        Shared energy grid of the interpolation, two points per output pixel along the xlim range
+
+        Args:
+            shift (dict): energy shift of each DOSCAR (key: index str), used when xlim is not set
+
+        Returns:
+            grid (np.ndarray): energy grid
+        """
+        if self.xlim is not None:
+            lower, upper = self.xlim
+        else:
+            shift = {} if shift is None else shift
+            lower = min(manager.energy[0] - shift.get(str(index), 0.) for index, manager in enumerate(self.managers))
+            upper = max(manager.energy[-1] - shift.get(str(index), 0.) for index, manager in enumerate(self.managers))
+        return np.linspace(lower, upper, int(self.width * self.dpi * 2))
 
     @plot_wrapper
     def plot(self, selector: dict):
@@ -68,8 +82,11 @@ class PostDOS(Figure):
         <Plot DOS Method>
 
         Args:
-            selector (dict): keys: [atoms, orbitals, color, method, alpha]
+            selector (dict): keys: [atoms, orbitals, color, method, alpha, interpolate]
             selector.method (optional): ["line", "dash line", "fill", "output"]
+            selector.interpolate (optional): whether smooth the line on the shared grid (limited to xlim if set),
+                                             default: True, except False for `output`, whose file then keeps the raw
+                                             DOSCAR points of the full energy range
 
             Examples
             ---------
@@ -90,32 +107,35 @@ class PostDOS(Figure):
                 DOSdata[key].append(self.managers[int(key)].get_data(**line_argument))
 
         # Align the DOS
+        shift = defaultdict(float)
         if self.align is not None:
             if len(self.align) == len(self.managers):
                 logger.info(" +" + "-".center(80, "-") + "+")
                 logger.info(" |" + f"Align DOS relative to the first system".center(80, " ") + "|")
                 logger.info(" |" + "-".center(80, "-") + "|")
-                for index, item in enumerate(self.align):
-                    if len(item) == 2:
-                        if index == 0:
-                            reference = self.managers[index].atom_list[item[0] + 1][item[1] + '_up']
-                            refer_extremes = search_peak(reference)
-                        current = self.managers[index].atom_list[item[0] + 1][item[1] + '_up']
-                        current_extremes = search_peak(current)
-                        diff_extreme = current_extremes[0] - refer_extremes[0]
-                        for dos_line in DOSdata[str(index)]:
-                            dos_line.energy -= diff_extreme
-                        logger.info("|" + f" Align {index + 1}".center(10) + "|"
-                                    + f"atom: {item[0]} orbital: {item[1]}".center(24) + "|"
-                                    + f"ε_ref: {current_extremes[0]:.4f} eV".center(22)
-                                    + f"Δε: {diff_extreme:+.4f} eV".center(22) + "|")
-                    else:
-                        raise TypeError(f"<align> should specify the atom and orbital at the same time, e.g. (10, 's')")
-
+                for index, (item, peak) in enumerate(zip(self.align, self.alignment())):
+                    shift[str(index)] = peak.shift
+                    logger.info("|" + f" Align {index + 1}".center(10) + "|"
+                                + f"atom: {item[0]} orbital: {item[1]}".center(24) + "|"
+                                + f"ε_ref: {peak.energy:.4f} eV".center(22)
+                                + f"Δε: {peak.shift:+.4f} eV".center(22) + "|")
                 logger.info("|" + "-".center(80, "-") + "|")
             else:
                 logger.warning(f"The number of `align` is not equal to that of the files, ignore it.")
 
+        # one cubic spline over all the selected curves of each DOSCAR, evaluated on the shared grid
+        grid = self.grid(shift)
+        for key in selector.keys():
+            DOSdata[key] = [dos_line._replace(energy=dos_line.energy - shift[key]) for dos_line in DOSdata[key]]
+            smooth = [index for index, line_argument in enumerate(selector[key]) if
+                      line_argument.get("interpolate", line_argument.get("method", "line") != "output")]
+            if not len(smooth):
+                continue
+            curves = np.array([[DOSdata[key][index].up, DOSdata[key][index].down] for index in smooth])
+            energy, values = interpolate_curves(DOSdata[key][smooth[0]].energy, curves, grid)
+            for index, (up, down) in zip(smooth, values):
+                DOSdata[key][index] = DOSdata[key][index]._replace(energy=energy, up=up, down=down)
+
         for key in selector.keys():
             for index, line_argument in enumerate(selector[key]):
                 method = line_argument.get("method", "line")
@@ -135,37 +155,37 @@ class PostDOS(Figure):
                     np.savetxt(f"DOS_F{key}_L{index}", DOSL_ndata, fmt='%.6e', delimiter="\t",
                                header="energy, up, down")
 
+    def alignment(self, tol=0.0001):
+        """
+        Locate the reference peak (the lowest-energy peak of the `align` orbital) of all systems in one peak search
+
+        Args:
+            tol (float): a peak must exceed both of its neighbours by more than tol, see utils.find_peaks
+
+        Returns:
+            peaks (list): namedtuple Align(energy, index, shift) of each system, index is the position in the DOSCAR
+                          energy points and shift is the energy relative to that of the first system
+        """
+        curves = []
+        for manager, item in zip(self.managers, self.align):
+            if len(item) != 2:
+                raise TypeError(f"<align> should specify the atom and orbital at the same time, e.g. (10, 's')")
+            curves.append(manager.select([item[0] + 1], [item[1]])[0])
+
+        peaks = search_peaks([manager.energy for manager in self.managers], curves, tol=tol,
+                             prominence=self.prominence)
+        for item, peak in zip(self.align, peaks):
+            if not len(peak.index):
+                raise ValueError(f"No peak is found for the <align> item {item}")
+
+        Align = namedtuple("Align", ("energy", "index", "shift"))
+        return [Align(peak.energy[0], peak.index[0], peak.energy[0] - peaks[0].energy[0]) for peak in peaks]
+
     def center(self, selector: dict):
         """Calculate Band-Center Value"""
 
-        manager = self.managers[0]
-        elements = manager.elements
-        total_dos = manager.total_dos
-        atom_list = manager.atom_list
-
-        atoms = identify_atoms(selector.get("atoms", None), elements)
-        orbitals = selector.get("orbitals", None)
-        xlim = selector["xlim"]
-
-        y = 0
-        rang = (total_dos.index.values < xlim[1]) & (total_dos.index.values > xlim[0])
-        if len(atoms) == len(elements) - 1 and orbitals is None:
-            orbitals = "All"
-            y += total_dos.loc[rang, 'tot_up']
-            y -= total_dos.loc[rang, 'tot_down']
-        elif orbitals is None:
-            orbitals = "All"
-            for atom in atoms:
-                y += atom_list[atom].loc[rang, 'up']
-                y -= atom_list[atom].loc[rang, 'down']
-        else:
-            for atom in atoms:
-                for orbital in orbitals:
-                    y += atom_list[atom].loc[rang, f'{orbital}_up']
-                    y -= atom_list[atom].loc[rang, f'{orbital}_down']
-
-        e_count = simps(y.values, y.index.values)  # Simpson Integration method for obtain the electrons' num
-        dos = simps([a * b for a, b in zip(y.values, y.index.values)], y.index.values)
+        atoms = identify_atoms(selector.get("atoms", None), self.managers[0].elements)
+        result = self.band_centers([selector])[0]
 
         # format atoms output
         format_atoms = ""
@@ -186,35 +206,127 @@ class PostDOS(Figure):
         print("|" + f"Band-Center Calculation".center(55, " ") + "|")
         print("|" + "-".center(55, "-") + "|")
         print(f"| Selected Atoms: {format_atoms}")
-        print(f"| Selected Orbitals: {orbitals}".ljust(56, ) + "|")
-        print(f"| Energy Range: {xlim}".ljust(56, ) + "|")
-        print(f"| Number of Electrons: {e_count:.4f}".ljust(56, ) + "|")
-        print(f"| Center Value: {dos / e_count:.4f}".ljust(56, ) + "|")
+        print(f"| Selected Orbitals: {result['orbitals']}".ljust(56, ) + "|")
+        print(f"| Energy Range: {result['xlim']}".ljust(56, ) + "|")
+        print(f"| Number of Electrons: {result['electrons']:.4f}".ljust(56, ) + "|")
+        print(f"| Center Value: {result['center']:.4f}".ljust(56, ) + "|")
+        print(f"| Band Width: {result['width']:.4f}".ljust(56, ) + "|")
         print("+" + "-".center(55, "-") + "+")
 
+    def band_centers(self, selectors: list, xlim=None):
+        """
+        Calculate the band-center of many atom/orbital selections (the first DOSCAR) in one array reduction
+
+        Args:
+            selectors (list): list of dict, keys: [atoms, orbitals, xlim], xlim (optional) overrides the shared one
+            xlim (list): shared energy range, default: the whole energy range
+
+        Returns:
+            rows (list): list of dict, keys: [atoms, orbitals, xlim, electrons, center, width], where electrons,
+                         center and width are the zeroth moment, the first moment and the square root of the second
+                         central moment of the selected DOS
+        """
+        manager = self.managers[0]
+        elements, energy = manager.elements, manager.energy
+        xlim = [energy[0], energy[-1]] if xlim is None else xlim
+
+        # group the selections sharing the same orbitals, one matmul over the LDOS for each group
+        curves = np.zeros((len(selectors), len(energy)))
+        weight = np.zeros((len(selectors), len(elements) - 1))
+        groups, rows = defaultdict(list), []
+        for index, selector in enumerate(selectors):
+            atoms = identify_atoms(selector.get("atoms", None), elements)
+            orbitals = selector.get("orbitals", None)
+            weight[index, np.array(atoms, dtype=int) - 1] = 1.
+            if len(atoms) == len(elements) - 1 and orbitals is None:
+                groups["total"].append(index)
+            else:
+                groups[None if orbitals is None else tuple([orbitals] if isinstance(orbitals, str) else orbitals)] \
+                    .append(index)
+            rows.append({"atoms": atoms, "orbitals": "All" if orbitals is None else orbitals,
+                         "xlim": list(selector.get("xlim", xlim))})
+
+        for orbitals, index in groups.items():
+            if orbitals == "total":
+                curves[index] = manager.total_dos[:, 0] - manager.total_dos[:, 1]
+            else:
+                up, down = manager.channel_index(orbitals)
+                sign = np.zeros(len(manager.columns))
+                sign[up], sign[down] = 1., -1.  # spin-down channels are stored negative
+                curves[index] = weight[index] @ (manager.atom_dos @ sign)
+
+        # Simpson integration of the zeroth/first/second moments, once per distinct energy range
+        bounds = defaultdict(list)
+        for index, row in enumerate(rows):
+            bounds[tuple(row["xlim"])].append(index)
+        for (lower, upper), index in bounds.items():
+            rang = (energy < upper) & (energy > lower)
+            x, y = energy[rang], curves[index][:, rang]
+            moments = [simps(y * x ** order, x, axis=-1) for order in range(3)]
+            center = moments[1] / moments[0]
+            width = np.sqrt(np.maximum(moments[2] / moments[0] - center ** 2, 0.))
+            for row_index, electrons, center_i, width_i in zip(index, moments[0], center, width):
+                rows[row_index].update(electrons=float(electrons), center=float(center_i), width=float(width_i))
+
+        return rows
+
+    @staticmethod
+    def write_centers(rows: list, name: str):
+        """
+        Write the band_centers table, format decided by the suffix of name: *.json or *.csv
+
+        Args:
+            rows (list): results of band_centers
+            name (str): output file name
+        """
+        if Path(name).suffix == ".json":
+            with open(name, "w") as f:
+                json.dump(rows, f, indent=2)
+        elif Path(name).suffix == ".csv":
+            table = pd.DataFrame(rows)
+            for column in ["atoms", "orbitals", "xlim"]:
+                table[column] = [" ".join(map(str, item)) if isinstance(item, (list, tuple)) else item for item in
+                                 table[column]]
+            table.to_csv(name, index=False)
+        else:
+            raise ValueError(f"{name} should be *.json or *.csv")
+
 
 class DOSData():
     """
     <DOSData main class>
 
+    Attributes:
+        energy:     E - E_fermi, shape=(NDOS,)
+        total_dos:  [tot_up, tot_down], shape=(NDOS, 2)
+        atom_dos:   projected DOS, shape=(NAtom, NDOS, NChannel)
+        columns:    channel names of atom_dos, e.g., ['s_up', 's_down', ..., 'up', 'down', 'p_up', ...]
+
     Methods:
         get_data():     get_data main func
-        center():   calculate the band-center
+        select():       sum the projected DOS of the atoms && orbitals
+        channel_index():    locate the channels of the orbitals
+        load_many():    construct many DOSData, the uncached DOSCARs are parsed in parallel
+        clear_cache():  drop the parsed DOSCARs kept in memory (the last 8 used DOSCARs are kept)
 
         contcar_parse:  parse CONTCAR data
         doscar_parse:   parse DOSCAR data
+
+    The dos_file can also be a vasprun.xml (*.xml), then ISPIN/LORBIT are read from the file, no binary cache is
+    written and the elements are read from the vasprun.xml if pos_file is None.
     """
 
-    def __init__(self, dos_file, pos_file, ISPIN=2, LORBIT=12, magnification=100):
+    def __init__(self, dos_file, pos_file=None, ISPIN=2, LORBIT=12, cache=False):
         self.dos_file = dos_file
-        self.pos_file = pos_file
+        self.pos_file = pos_file if pos_file is not None else dos_file
         self.elements = DOSData.parse_contcar(self.pos_file)
-        self.total_dos, self.atom_list = DOSData.parse_doscar(self.dos_file, ISPIN, LORBIT)
-        self.magnification = magnification
+        self.energy, self.total_dos, self.atom_dos, self.columns = DOSData.parse_doscar(self.dos_file, ISPIN, LORBIT,
+                                                                                        cache)
+        self._channel = {column: index for index, column in enumerate(self.columns)}
 
         self.atoms, self.orbitals, self.method, self.avgflag = None, None, None, None
 
-    def get_data(self, atoms=None, exclude=None, orbitals=None, avgflag=False, **kargs):
+    def get_data(self, atoms=None, exclude=None, orbitals=None, avgflag=False, grid=None, **kargs):
         """
         <Get_Data Main Func>
 
@@ -223,6 +335,10 @@ class DOSData():
             exclude:    remove specified atoms in <atoms parameters>
             orbitals:   list, e.g., ['s',  'p']
             avgflag (bool):    whether calculate the average dos
+            grid (np.ndarray): interpolate the up/down lines onto this energy grid, default: the DOSCAR points
+
+        Returns:
+            DOSL_data:  namedtuple, (energy, up, down)
         """
 
         self.atoms = atoms
@@ -230,96 +346,219 @@ class DOSData():
         self.orbitals = orbitals
         self.avgflag = avgflag
 
-        @interpolated_wrapper
-        def TDOS_data(self):
-            """Get Total DOS"""
-            for column in self.total_dos.columns.values:
-                yield self.total_dos.index.values, list(self.total_dos[column].values), 1, self.magnification
-
-        @interpolated_wrapper
-        def LDOS_data(self):
-            """Get DOS of atom list"""
-            plus_tot = defaultdict(list)
-            plus_tot = DataFrame(plus_tot, index=self.atom_list[0],
-                                 columns=['up', 'down', 'p_up', 'p_down', 'd_up', 'd_down', 'f_up', 'f_down'] +
-                                         COLUMNS_32, dtype='object')
-            plus_tot.iloc[:, :] = 0.0
-            for atom in self.atoms:
-                for column in plus_tot.columns.values:
-                    try:
-                        plus_tot[column] += self.atom_list[atom][column]
-                    except KeyError:
-                        plus_tot[column] = 0
-
-            if self.orbitals is None:
-                orbitals = [plus_tot['up'].values, plus_tot['down'].values]
-            else:
-                orbitals_up = np.array([plus_tot[item[0] + item[1]] for item in product(self.orbitals, ['_up'])])
-                orbitals_down = np.array([plus_tot[item[0] + item[1]] for item in product(self.orbitals, ['_down'])])
-                orbitals = [np.sum(orbitals_up, axis=0), np.sum(orbitals_down, axis=0)]
-
-            for orbital_value in orbitals:
-                yield plus_tot.index.values, orbital_value, len(self.atoms), self.magnification
-
-        """Main Content of get_data func"""
         if self.atoms is None:
-            return TDOS_data(self)
+            up, down = self.total_dos.T
         elif isinstance(self.atoms, (list, int, str)):
             self.atoms = identify_atoms(self.atoms, self.elements)
             if self.exclude is not None:
                 self.exclude = identify_atoms(self.exclude, self.elements)
                 self.atoms = list(set(self.atoms) - set(self.exclude))
-            return LDOS_data(self)
+            up, down = self.select(self.atoms, self.orbitals)
+            if self.avgflag:
+                up, down = up / len(self.atoms), down / len(self.atoms)
         else:
             raise ValueError(f"The format of {self.atoms} is not correct!")
 
+        energy = self.energy
+        if grid is not None:
+            energy, (up, down) = interpolate_curves(energy, np.array([up, down]), grid)
+        return namedtuple("DOSL_data", ("energy", "up", "down"))(energy, up, down)
+
+    def select(self, atoms, orbitals=None):
+        """
+        Sum the projected DOS of the atoms && orbitals
+
+        Args:
+            atoms (list): atom indexes (1-based)
+            orbitals (list): e.g., ['s', 'p'] or ['dxy'], default: all orbitals; missing channels contribute zero
+
+        Returns:
+            up, down:   np.ndarray, shape=(NDOS,)
+        """
+        atom_dos = self.atom_dos[np.array(atoms, dtype=int) - 1].sum(axis=0)  # shape=(NDOS, NChannel)
+        return [atom_dos[:, index].sum(axis=-1) for index in self.channel_index(orbitals)]
+
+    def channel_index(self, orbitals=None):
+        """
+        Locate the channels of the orbitals
+
+        Args:
+            orbitals (list): e.g., ['s', 'p'] or ['dxy'], default: all orbitals; missing channels are skipped
+
+        Returns:
+            up, down:   list of the channel indexes
+        """
+        orbitals = [orbitals] if isinstance(orbitals, str) else orbitals
+        spins = []
+        for spin in ['up', 'down']:
+            names = [spin] if orbitals is None else [f"{orbital}_{spin}" for orbital in orbitals]
+            spins.append([self._channel[name] for name in names if name in self._channel])
+        return spins
+
     @staticmethod
     def parse_contcar(name):
         """
         read CONTCAR file, obtain the elements' list.
 
         Args:
-            name:       CONTCAR file name
+            name:       CONTCAR file name, or a vasprun.xml (*.xml)
 
         Returns:
             element:    elements list, e.g., ['','Be','Be','C']
         """
+        if Path(name).suffix == ".xml":
+            return [' '] + VASPRUN.read_element(name)
 
         structure = CONTCAR(name=name).structure
         elements = [' '] + structure.atoms.formula
         return elements
 
     @staticmethod
-    def parse_doscar(name, ISPIN, LORBIT):
+    def parse_doscar(name, ISPIN, LORBIT, cache=False):
+        """
+        read DOSCAR file, obtain the TDOS && LDOS, the parsed arrays are cached by the file fingerprint.
+
+        Args:
+            name:       DOSCAR file name, or a vasprun.xml (*.xml)
+            cache:      whether use the binary DOS cache alongside the DOSCAR, see DOSCAR.load
+
+        Returns:
+            energy:     np.ndarray(NDOS)
+            TDOS:       np.ndarray(NDOS, 2)
+            LDOS:       np.ndarray(NAtom, NDOS, NChannel)
+            columns:    channel names of LDOS
+        """
+        key = DOSData.fingerprint(name, ISPIN, LORBIT)
+        if key in _DOSCAR_CACHE:
+            _DOSCAR_CACHE.move_to_end(key)
+            return _DOSCAR_CACHE[key]
+        return DOSData._cache(key, _load_doscar(name, ISPIN, LORBIT, cache))
+
+    @staticmethod
+    def fingerprint(name, ISPIN, LORBIT):
+        """cache key of a parsed DOSCAR, a rewritten file (size or mtime changed) is parsed again"""
+        stat = Path(name).stat()
+        return str(Path(name).absolute()), stat.st_size, stat.st_mtime_ns, ISPIN, LORBIT
+
+    @staticmethod
+    def _cache(key, result, trim=True):
+        for stale in [item for item in _DOSCAR_CACHE if item[0] == key[0] and item[1:3] != key[1:3]]:
+            del _DOSCAR_CACHE[stale]  # the file has been rewritten
+        for array in result[:3]:
+            array.setflags(write=False)  # shared by all the DOSData of the same DOSCAR
+        _DOSCAR_CACHE[key] = result
+        if trim:
+            DOSData._trim_cache()
+        return result
+
+    @staticmethod
+    def _trim_cache(size=None):
+        size = _DOSCAR_CACHE_SIZE if size is None else size
+        while len(_DOSCAR_CACHE) > size:
+            _DOSCAR_CACHE.popitem(last=False)
+
+    @staticmethod
+    def clear_cache():
+        """drop all the parsed DOSCARs kept in memory, the binary caches on disk are not touched"""
+        _DOSCAR_CACHE.clear()
+
+    @classmethod
+    def load_many(cls, dos_files, pos_files, ISPIN=2, LORBIT=12, cache=False, processes=None):
         """
-        read DOSCAR file, obtain the TDOS && LDOS.
+        Construct the DOSData of many DOSCAR && CONTCAR pairs, the DOSCARs missing from the cache are parsed in a
+        process pool, so the wall time is about that of the largest file
 
         Args:
-            name:       DOSCAR file name
+            dos_files (list): DOSCAR file names
+            pos_files (list): CONTCAR file names
+            cache (bool): whether use the binary DOS cache alongside the DOSCARs, see DOSCAR.load
+            processes (int): pool size, default: min(cpu_count, number of the uncached DOSCARs)
 
         Returns:
-            TDOS:       DataFrame(NDOS, 2)
-            LDOS:       energy_list + List(NAtom * DataFrame(NDOS, NOrbital+8))
+            managers (list): list of DOSData
         """
-        dos_instance = DOSCAR(name=name, ISPIN=ISPIN, LORBIT=LORBIT).load()
-        return dos_instance.TDOS, dos_instance.LDOS
+        pending = {}
+        for dos_file in dos_files:
+            key = cls.fingerprint(dos_file, ISPIN, LORBIT)
+            if key not in _DOSCAR_CACHE:
+                pending.setdefault(key, dos_file)
+
+        for key, name in list(pending.items()) if cache else []:  # memory-map the valid binary caches, no parse
+            if Path(name).suffix == ".xml":
+                continue
+            dos_instance = DOSCAR(name=name, ISPIN=ISPIN, LORBIT=LORBIT)
+            if dos_instance.read_cache():
+                cls._cache(key, (dos_instance.energy, dos_instance.TDOS, dos_instance.LDOS, dos_instance.columns),
+                           trim=False)
+                del pending[key]
+
+        processes = min(cpu_count(), len(pending)) if processes is None else processes
+        if len(pending) > 1 and processes > 1:  # otherwise, parsed one by one in DOSData.__init__
+            logger.debug(f"Parse {len(pending)} DOSCARs in {processes} processes")
+            with ProcessPool(processes=processes) as pool:
+                results = {key: pool.apply_async(_load_doscar, args=(name, ISPIN, LORBIT, cache)) for key, name in
+                           pending.items()}
+                for key, result in results.items():
+                    cls._cache(key, result.get(), trim=False)
+
+        # the cache is trimmed after all the managers are built, so a long list doesn't evict its own DOSCARs
+        managers = [cls(dos_file=dos_file, pos_file=pos_file, ISPIN=ISPIN, LORBIT=LORBIT, cache=cache) for
+                    dos_file, pos_file in zip(dos_files, pos_files)]
+        cls._trim_cache(size=max(_DOSCAR_CACHE_SIZE, len(set(dos_files))))
+        return managers
+
+
+def _load_doscar(name, ISPIN, LORBIT, cache=False):
+    """worker of DOSData.load_many, only the compact arrays are sent back to the parent process"""
+    if Path(name).suffix == ".xml":
+        return VASPRUN(name).dos()
+    dos_instance = DOSCAR(name=name, ISPIN=ISPIN, LORBIT=LORBIT).load(cache=cache)
+    return dos_instance.energy, dos_instance.TDOS, dos_instance.LDOS, dos_instance.columns
 
 
 class PlotOpt(Figure):
-    def __init__(self, name="OUTCAR", width=16, title="Structure Optimization", xlabel="Steps", **kargs):
+    def __init__(self, name="OUTCAR", source="OUTCAR", oszicar="OSZICAR", vasprun="vasprun.xml", plot_force=True,
+                 width=16, title="Structure Optimization", xlabel="Steps", **kargs):
+        """
+        Args:
+            name (str): name of the OUTCAR
+            source (str): source of the energies, `OUTCAR`, `OSZICAR` or `vasprun`; the OSZICAR is much smaller than
+                          OUTCAR, the forces are then read from OUTCAR (by `OUTCAR.read_force`) only if `plot_force`.
+                          The OUTCAR and vasprun plot the energy without entropy, while the OSZICAR plots E0 (the
+                          energy(sigma->0)), they differ by half of the entropy term T*S when the smearing is not zero;
+                          for `vasprun`, the forces are the max atomic forces of the unfixed atoms (see
+                          `VASPRUN.force_max`), the same quantity as the OUTCAR
+            oszicar (str): name of the OSZICAR
+            vasprun (str): name of the vasprun.xml
+            plot_force (bool): whether plot the forces
+        """
         super(PlotOpt, self).__init__(width=width, title=title, xlabel=xlabel, **kargs)
         self.name = name
-        outcar = OUTCAR(name=self.name)
-        self.energy = outcar.energy
-        self.force = outcar.force
+        self.source = source
+        self.plot_force = plot_force
+        if self.source == "OUTCAR":
+            outcar = OUTCAR(name=self.name)
+            self.energy = outcar.energy
+            self.force = outcar.force
+        elif self.source == "OSZICAR":
+            self.energy = OSZICAR(name=oszicar).energy
+            self.force = OUTCAR.read_force(self.name) if self.plot_force else None
+        elif self.source == "vasprun":
+            run = VASPRUN(name=vasprun)
+            self.energy = run.energy
+            self.force = run.force_max
+        else:
+            raise ValueError(f"source = {self.source} not supported, should be `OUTCAR`, `OSZICAR` or `vasprun`")
 
     def plot(self, color=("#ed0345", "#009734")):
         self._plot_energy(color=color[0])
-        self._plot_force(color=color[1])
+        if self.plot_force:
+            self._plot_force(color=color[1])
 
     @plot_wrapper
     def _plot_energy(self, color):
-        plt.subplot(121)
+        if self.plot_force:
+            plt.subplot(121)
         plt.plot(self.energy, "-o", color=color)
 
     @plot_wrapper
@@ -329,41 +568,98 @@ class PlotOpt(Figure):
 
 
 class PlotBand(Figure):
-    def __init__(self, name="EIGENVAL", type="EIGENVAL", title='Band Structure', **kargs):
+    def __init__(self, name="EIGENVAL", type="EIGENVAL", atoms=None, orbitals=None, pos_file="CONTCAR",
+                 fat_color="#ed0345", fat_scale=100., title='Band Structure', **kargs):
+        """
+        Args:
+            name (str): name of the band file
+            type (str): `EIGENVAL`, `export` (written by `EIGENVAL.export`), `OUTCAR`, `vasprun` (vasprun.xml, the
+                        E-fermi is also read from it instead of the OUTCAR) or `PROCAR` (fat bands)
+            atoms: the fat-band atoms of `PROCAR`, the same syntax as the DOS selector, e.g., 'Ce' or '1-10'
+            orbitals (list): the fat-band orbitals of `PROCAR`, e.g., ['s', 'p'] or ['dxy'], default: all orbitals
+            pos_file (str): CONTCAR to name the elements of the atoms, ignored if None or not exist
+            fat_color (str): color of the fat-band markers
+            fat_scale (float): marker size of the unit projection
+        """
         self.name = name
         self.type = type
+        self.fermi = None
+        self.fat_weight = None  # fat-band weight, shape=(NKPoint, NBand)
+        self.fat_color, self.fat_scale = fat_color, fat_scale
         if self.type == "EIGENVAL":
             eigenval = EIGENVAL(self.name)
             self.energy, self.kcoord, self.klabel = eigenval.energy, eigenval.KPoint_dist, eigenval.KPoint_label
+        elif self.type == "export":  # single-file band-data written by EIGENVAL.export
+            self.kcoord, self.klabel, self.energy = EIGENVAL.read_export(self.name)
         elif self.type == "OUTCAR":
-            energy = OUTCAR(self.name).band_info
-            self.energy = np.concatenate((energy.up[:, :, np.newaxis], energy.down[:, :, np.newaxis]), axis=2)
-            self.energy = self.energy.transpose((1, 0, 2))
+            outcar = OUTCAR(self.name)
+            if outcar.eigenvalue is None:
+                raise AttributeError(None, f"{self.name} don't include the band information")
+            self.energy = outcar.eigenvalue[..., 0].transpose((1, 2, 0)) + outcar.fermi  # (NKPoint, NBand, ISPIN)
+            self.fermi = outcar.fermi
+            self.kcoord, self.klabel = EIGENVAL.kpoint_path(outcar.kpoint_coord)
+        elif self.type == "vasprun":
+            run = VASPRUN(self.name)
+            self.energy, self.fermi = run.eigenvalue, run.fermi
+            self.kcoord, self.klabel = EIGENVAL.kpoint_path(run.KPoint_coord)
+        elif self.type == "PROCAR":
+            elements = CONTCAR(pos_file).structure.atoms.formula if pos_file and Path(pos_file).exists() else None
+            procar = PROCAR(self.name, atoms=atoms, orbitals=orbitals, elements=elements)
+            self.energy = procar.energy
+            self.kcoord, self.klabel = EIGENVAL.kpoint_path(procar.KPoint_coord)
+            self.fat_weight = procar.projection.sum(axis=(-2, -1)).mean(axis=0)  # spin-averaged as the energy
 
         super(PlotBand, self).__init__(title=title, xlim=[self.kcoord[0], self.kcoord[-1]], **kargs)
 
-        try:
-            self.fermi = OUTCAR("OUTCAR").fermi
-        except FileNotFoundError:
-            logger.warning("`OUTCAR` not found, set E-fermi=0.0")
-            self.fermi = 0.
+        if self.fermi is None:
+            try:
+                self.fermi = OUTCAR("OUTCAR").fermi
+            except FileNotFoundError:
+                logger.warning("`OUTCAR` not found, set E-fermi=0.0")
+                self.fermi = 0.
 
     @plot_wrapper
-    def plot(self):
+    def plot(self, color=None, marker=True):
         """
         Plot Band Structure, for spin-system, the average energy was applied
+
+        All bands are drawn as one LineCollection (and one scatter for the markers), the bands entirely outside the
+        ylim are dropped before drawing. For the fat bands (type `PROCAR`), the projections are drawn as one more
+        scatter, whose marker area is proportional to the projection.
+
+        Args:
+            color (str): color of all bands, default: the matplotlib color cycle
+            marker (bool): whether mark the k-points
         """
-        energy_avg = self.energy.mean(axis=-1) - self.fermi
-        for band_index in range(energy_avg.shape[1]):
-            plt.plot(self.kcoord, energy_avg[:, band_index], "-o")
+        energy_avg = self.energy.mean(axis=-1) - self.fermi  # (NKPoint, NBand)
+        visible = np.arange(energy_avg.shape[1])
+        if self.ylim is not None:
+            visible = visible[(energy_avg.max(axis=0) >= self.ylim[0]) & (energy_avg.min(axis=0) <= self.ylim[1])]
+        bands = energy_avg[:, visible].T  # (NVisible, NKPoint)
+
+        if color is None:
+            cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+            colors = to_rgba_array([cycle[index % len(cycle)] for index in visible])
+        else:
+            colors = to_rgba_array([color] * len(visible))
+        segments = np.stack((np.broadcast_to(self.kcoord, bands.shape), bands), axis=-1)  # (NVisible, NKPoint, 2)
+
+        ax = plt.gca()
+        ax.add_collection(LineCollection(segments, colors=colors, linewidths=plt.rcParams['lines.linewidth']))
+        if marker:
+            ax.scatter(segments[..., 0].ravel(), segments[..., 1].ravel(), s=plt.rcParams['lines.markersize'] ** 2,
+                       c=np.repeat(colors, bands.shape[1], axis=0))
+        if self.fat_weight is not None:
+            ax.scatter(segments[..., 0].ravel(), segments[..., 1].ravel(), s=self.fat_scale *
+                       self.fat_weight[:, visible].T.ravel(), c=self.fat_color, alpha=0.5, edgecolors="none", zorder=3)
+        ax.autoscale_view()
 
         pticks, plabel = list(
             map(list, zip(*[(self.kcoord[index], self.klabel[index]) for index, label in enumerate(self.klabel) if
                             len(label)])))
-        for line in pticks:
-            if line == 0. or line == self.kcoord[-1]:
-                continue
-            plt.vlines(line, ymin=self.ylim[0], ymax=self.ylim[1], linestyles="dashed", linewidth=2)
+        ymin, ymax = ax.get_ylim() if self.ylim is None else self.ylim
+        plt.vlines([line for line in pticks if line != 0. and line != self.kcoord[-1]], ymin=ymin, ymax=ymax,
+                   linestyles="dashed", linewidth=2)
 
         plt.xticks(ticks=pticks, labels=plabel)
 
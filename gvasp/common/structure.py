@@ -2,7 +2,7 @@ import copy
 import itertools
 import logging
 import os
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, namedtuple
 
 import numpy as np
 
@@ -139,43 +139,84 @@ class Structure(object):
 
     def find_neighbour_table(self, neighbour_num: int = 12, cut_radius=None, adj_matrix=None, sort=True,
                              including_self=False):
-        new_atoms = []
-        neighbour_table = NeighbourTable(list)
-        for atom_i in self.atoms:
-            neighbour_table_i = []
-            atom_j_list = self.atoms if adj_matrix is None else [self.atoms[atom_j_order] for atom_j_order in
-                                                                 adj_matrix[atom_i.order]]
-            for atom_j in atom_j_list:
-                if not including_self and atom_i == atom_j:
-                    continue
-                image = Atom.search_image(atom_i, atom_j)
-                atom_j_image = Atom(formula=atom_j.formula, frac_coord=atom_j.frac_coord + image).set_coord(
-                    lattice=self.lattice)
-                distance = np.linalg.norm(atom_j_image.cart_coord - atom_i.cart_coord)
-                logger.debug(f"distance={distance}")
-                if f'Element {atom_j.formula}' in atom_i._default_bonds.keys() \
-                        and distance <= atom_i._default_bonds[f'Element {atom_j.formula}'] * 1.1:
-                    neighbour_table_i.append((atom_j, distance, (atom_j_image.cart_coord - atom_i.cart_coord), 1))
-                else:
-                    neighbour_table_i.append((atom_j, distance, (atom_j_image.cart_coord - atom_i.cart_coord), 0))
-
-            neighbour_table_i = sorted(neighbour_table_i,
-                                       key=lambda x: x[1]) if adj_matrix is None and sort else neighbour_table_i
-            if neighbour_num is not None:
-                neighbour_table[atom_i] = neighbour_table_i[:neighbour_num]
-            else:
-                neighbour_table[atom_i] = neighbour_table_i
-
-            if cut_radius is not None:
-                neighbour_table[atom_i] = [item for item in neighbour_table[atom_i] if item[1] <= cut_radius]
-
-            # update bonds && coordination number
-            atom_i.bonds = [(item[0], item[1]) for item in neighbour_table_i if item[3]]
-            atom_i.coordination_number = sum([item[3] for item in neighbour_table_i])
-            new_atoms.append(atom_i)
+        """
+        Find the neighbours of each atom, the pairs are searched by `neighbour_list` (linked cells) instead of looping
+        over all the atom pairs, and the result is kept as the CSR arrays of NeighbourTable
 
-        self.atoms = Atoms.from_list(new_atoms)
-        setattr(self, "neighbour_table", neighbour_table)
+        @param:
+            neighbour_num:      keep the nearest neighbour_num neighbours of each atom, None: keep all
+            cut_radius:         drop the neighbours farther than cut_radius
+            adj_matrix:         candidate neighbours (atom orders) of each atom, default: all atoms
+            sort:               whether sort the neighbours by distance (always False for the adj_matrix), otherwise
+                                they are in the atoms' order
+            including_self:     whether the atom itself is a neighbour (distance 0)
+
+        The bonds && coordination number of each atom are counted over all the candidates, bonded if the distance <=
+        1.1 * default bond-length (element.yaml)
+        """
+        atom_list = list(self.atoms)
+        frac_coord = np.array([atom.frac_coord for atom in atom_list], dtype=float)
+        matrix = self.lattice.matrix
+
+        # bond[type_i, type_j]: 1.1 * default bond-length, -1 if the elements are not bonded
+        types, type_index = np.unique([atom.formula for atom in atom_list], return_inverse=True)
+        default_bonds = {atom.formula: atom._default_bonds for atom in atom_list}
+        bond = np.array([[default_bonds[type_i][f'Element {type_j}'] * 1.1 if f'Element {type_j}' in
+                          default_bonds[type_i] else -1. for type_j in types] for type_i in types])
+
+        if adj_matrix is not None:
+            adj = [np.array(adj_matrix[atom.order], dtype=int) for atom in atom_list]
+            i = np.repeat(np.arange(len(atom_list)), [len(item) for item in adj])
+            j = np.concatenate(adj) if len(adj) else np.zeros(0, dtype=int)
+            if not including_self:
+                i, j = i[i != j], j[i != j]
+            diff = frac_coord[j] - frac_coord[i]
+            vector = (diff - np.round(diff)) @ matrix
+            distance = np.linalg.norm(vector, axis=1)
+        else:
+            # all pairs are needed for the unlimited table or the first neighbour_num atoms (unsorted), otherwise the
+            # cutoff is enlarged until each atom has neighbour_num neighbours; the bonds are always covered
+            reach = 0.5 * np.linalg.norm(matrix, axis=1).sum() * (1 + 1E-08)  # upper bound of a minimum image
+            possible = len(atom_list) - 1 + including_self
+            if neighbour_num is None or not sort or cut_radius is not None:
+                cutoff = cut_radius if cut_radius is not None and (neighbour_num is None or sort) else reach
+            else:
+                density = len(atom_list) / abs(np.linalg.det(matrix))
+                cutoff = 1.2 * (3 * (neighbour_num + 1) / (4 * np.pi * density)) ** (1 / 3)
+            cutoff = max(cutoff, bond.max())
+
+            while True:
+                i, j, distance, vector = neighbour_list(frac_coord, matrix, min(cutoff, reach), including_self)
+                count = np.bincount(i, minlength=len(atom_list))
+                if cutoff >= reach or neighbour_num is None or cut_radius is not None or \
+                        count.min() >= min(neighbour_num, possible):
+                    break
+                cutoff *= 1.5
+
+            order = np.lexsort((j, distance, i) if sort else (j, i))
+            i, j, distance, vector = i[order], j[order], distance[order], vector[order]
+
+        bonded = distance <= bond[type_index[i], type_index[j]]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(i, minlength=len(atom_list)))))
+
+        # update bonds && coordination number
+        for index, atom_i in enumerate(atom_list):
+            row = slice(indptr[index], indptr[index + 1])
+            atom_i.bonds = [(atom_list[item], value) for item, value in
+                            zip(j[row][bonded[row]].tolist(), distance[row][bonded[row]].tolist())]
+            atom_i.coordination_number = int(bonded[row].sum())
+
+        # the table keeps the first neighbour_num neighbours within cut_radius
+        keep = np.ones(len(i), dtype=bool)
+        if neighbour_num is not None:
+            keep &= np.arange(len(i)) - indptr[i] < neighbour_num
+        if cut_radius is not None:
+            keep &= distance <= cut_radius
+        i, j, distance, vector, bonded = i[keep], j[keep], distance[keep], vector[keep], bonded[keep]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(i, minlength=len(atom_list)))))
+
+        self.atoms = Atoms.from_list(atom_list)
+        setattr(self, "neighbour_table", NeighbourTable.from_csr(atom_list, indptr, j, distance, vector, bonded))
 
         return self
 
@@ -285,26 +326,125 @@ class Structure(object):
 
 
 class NeighbourTable(defaultdict):
+    """
+    Neighbour table, {atom_i: [(atom_j, distance, vector, bond), ...]}, vector = r_j (nearest image) - r_i
+
+    The table built by `Structure.find_neighbour_table` keeps the compact CSR arrays: the neighbours of the i-th atom
+    are indptr[i]:indptr[i + 1] of indices (position of atom_j), distances, vectors and bonds; the array properties are
+    read from them directly
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(NeighbourTable, self).__init__(*args, **kwargs)
+        self.indptr, self.indices, self.distances, self.vectors, self.bonds, self.orders = (None,) * 6
+
+    def __reduce__(self):  # keep the CSR arrays when pickled (e.g., returned from a process pool)
+        return self.__class__, (self.default_factory,), self.__dict__, None, iter(self.items())
 
     def __repr__(self):
         return " ".join([f"{key} <---> <{value[0]}> \n" for key, value in self.items()])
 
+    @classmethod
+    def from_csr(cls, atoms, indptr, indices, distances, vectors, bonds):
+        """
+        Construct the table from the CSR arrays
+
+        @param:
+            atoms:      Atom list, indices refer to its positions
+            indptr:     shape=(NAtom + 1,)
+            indices:    shape=(NPair,)
+            distances:  shape=(NPair,)
+            vectors:    shape=(NPair, 3)
+            bonds:      bonded flags, shape=(NPair,)
+        """
+        table = cls(list)
+        table.indptr, table.indices, table.distances, table.vectors, table.bonds = \
+            indptr, indices, distances, vectors, bonds.astype(int)
+        table.orders = np.array([atom.order for atom in atoms])
+        for index, atom in enumerate(atoms):
+            row = slice(indptr[index], indptr[index + 1])
+            table[atom] = [(atoms[item], distance, vector, bond) for item, distance, vector, bond in
+                           zip(indices[row].tolist(), distances[row].tolist(), vectors[row], table.bonds[row].tolist())]
+        return table
+
+    def _rows(self, values):
+        """split the CSR values into the rows of atoms, a dense array if all atoms have the same number of neighbours"""
+        counts = np.diff(self.indptr)
+        if len(counts) and np.all(counts == counts[0]):
+            return values.reshape((len(counts), counts[0]) + values.shape[1:])
+        return np.array(np.split(values, self.indptr[1:-1]), dtype=object)
+
     @property
     def index(self):  # adj_matrix
+        if self.indptr is not None:
+            return self._rows(self.orders[self.indices])
         return np.array([[value[0].order for value in values] for key, values in self.items()])
 
     @property
     def index_tuple(self):  # adj_matrix_tuple
+        if self.indptr is not None:
+            i = np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+            return self._rows(np.stack((self.orders[i], self.orders[self.indices]), axis=-1))
         return np.array([[(key.order, value[0].order) for value in values] for key, values in self.items()])
 
     @property
     def dist(self):
+        if self.indptr is not None:
+            return self._rows(self.distances)
         return np.array([[value[1] for value in values] for _, values in self.items()])
 
     @property
     def dist3d(self):
+        if self.indptr is not None:
+            return self._rows(self.vectors)
         return np.array([[value[2] for value in values] for _, values in self.items()])
 
     @property
     def coordination(self):
+        if self.indptr is not None:
+            return np.diff(np.concatenate(([0], np.cumsum(self.bonds)))[self.indptr])
         return np.array([sum([value[3] for value in values]) for _, values in self.items()])
+
+
+def neighbour_list(frac_coord, matrix, cutoff, including_self=False):
+    """
+    Find all the atom pairs within the cutoff by a linked-cell search, O(N) for a fixed density
+
+    Each pair (i, j) is counted once at its nearest image in fractional space (the convention of `Atom.search_image`).
+    The cells are not thinner than the cutoff along each lattice-plane normal, so the candidates of an atom are the
+    atoms in its cell && the 26 adjacent cells (the repeated cells of the thin axes are merged); the candidates are
+    generated for one adjacent cell at a time, all atoms at once.
+
+    @param:
+        frac_coord:     shape=(NAtom, 3)
+        matrix:         lattice matrix, shape=(3, 3)
+        cutoff:         Å
+        including_self: whether include the pairs (i, i)
+
+    @return:
+        Neighbour:  namedtuple, (i, j, distance, vector), vector = r_j (nearest image) - r_i, the pairs are unordered
+    """
+    frac_coord, matrix = np.asarray(frac_coord, dtype=float), np.asarray(matrix, dtype=float)
+    width = abs(np.linalg.det(matrix)) / np.linalg.norm(np.cross(matrix[[1, 2, 0]], matrix[[2, 0, 1]]), axis=1)
+    shape = np.clip(np.floor(width / cutoff), 1, max(round(len(frac_coord) ** (1 / 3)), 1)).astype(int)
+
+    cell = np.minimum(((frac_coord - np.floor(frac_coord)) * shape).astype(int), shape - 1)  # (NAtom, 3)
+    cell_id = np.ravel_multi_index(cell.T, shape)
+    members = np.argsort(cell_id, kind="stable")  # atoms sorted by cell
+    count = np.bincount(cell_id, minlength=shape.prod())
+    start = np.cumsum(count) - count
+
+    pairs = []
+    for shift in itertools.product(*[np.unique(np.arange(-1, 2) % size) for size in shape]):
+        neighbour = np.ravel_multi_index(((cell + shift) % shape).T, shape)
+        number = count[neighbour]  # candidates of each atom
+        i = np.repeat(np.arange(len(frac_coord)), number)
+        j = members[np.repeat(start[neighbour] - (np.cumsum(number) - number), number) + np.arange(number.sum())]
+        diff = frac_coord[j] - frac_coord[i]
+        vector = (diff - np.round(diff)) @ matrix
+        distance = np.linalg.norm(vector, axis=1)
+        keep = (distance <= cutoff) & ((i != j) | including_self)
+        pairs.append((i[keep], j[keep], distance[keep], vector[keep]))
+
+    i, j, distance, vector = (np.concatenate(item) for item in zip(*pairs))
+    return namedtuple("Neighbour", ("i", "j", "distance", "vector"))(i, j, distance, vector.reshape((-1, 3)))
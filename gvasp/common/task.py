@@ -3,6 +3,7 @@ import copy
 import logging
 import os
 import shutil
+import tempfile
 from functools import wraps
 from pathlib import Path
 
@@ -13,9 +14,10 @@ from seekpath import get_path
 from gvasp.common.utils import str_list
 from gvasp.common.base import Atom
 from gvasp.common.constant import GREEN, YELLOW, RESET, RED
-from gvasp.common.error import XSDFileNotFoundError, TooManyXSDFileError, ConstrainError
+from gvasp.common.dynamics import RDFAccumulator, msd, vacf, diffusion_coefficient, Unwrapper
+from gvasp.common.error import XSDFileNotFoundError, TooManyXSDFileError, ConstrainError, AttributeNotRegisteredError
 from gvasp.common.file import POSCAR, OUTCAR, ARCFile, XSDFile, KPOINTS, POTCAR, XDATCAR, CHGCAR, AECCAR0, AECCAR2, \
-    CHGCAR_mag, INCAR, SubmitFile, CONTCAR, Fort188File
+    CHGCAR_mag, INCAR, SubmitFile, CONTCAR, Fort188File, load_trajectory
 from gvasp.common.setting import WorkDir, ConfigManager
 from gvasp.neb.path import IdppPath, LinearPath
 
@@ -343,11 +345,17 @@ class XDATMovie(Animatable):
         return super(XDATMovie, cls).__new__(cls)
 
     @staticmethod
-    def movie(name="movie.arc"):
+    def movie(name="movie.arc", start=None, stop=None, stride=1, file="XDATCAR"):
         """
         make arc file to visualize the optimization steps
+
+        Args:
+            name (str): the name of the output *.arc file
+            start, stop (int): frame range, the same as the slice of a list
+            stride (int): keep one frame of every `stride` frames
+            file (str): XDATCAR or the gvasp binary trajectory
         """
-        XDATCAR("XDATCAR").movie(name=name)
+        load_trajectory(file).movie(name=name, start=start, stop=stop, stride=stride)
 
 
 class NormalTask(BaseTask):
@@ -739,6 +747,81 @@ class MDTask(NormalTask, XDATMovie):
         self.incar.TEBEG = 300.
         self.incar.TEEND = 300.
 
+    @staticmethod
+    def analysis(file="XDATCAR", potim=None, analysis=("rdf", "msd", "vacf"), start=None, stop=None, stride=1,
+                 r_max=None, bins=200, prefix="md"):
+        """
+        Analyze the MD trajectory, the results are saved as `{prefix}_rdf.dat`, `{prefix}_msd.dat` and
+        `{prefix}_vacf.dat`
+
+        Args:
+            file (str): XDATCAR or the gvasp binary trajectory
+            potim (float): time step of MD, unit: fs, default: POTIM in INCAR
+            analysis (tuple): subset of ["rdf", "msd", "vacf"]
+            start, stop (int): frame range, the same as the slice of a list
+            stride (int): keep one frame of every `stride` frames
+            r_max (float): cutoff of RDF, default: half of the smallest perpendicular width of the cell (of the first
+                           chunk for the variable cell)
+            bins (int): number of RDF bins
+            prefix (str): prefix of the output files
+        """
+        if potim is None:
+            try:
+                potim = INCAR("INCAR").POTIM
+            except (FileNotFoundError, AttributeNotRegisteredError):
+                potim = None
+            if not potim:  # not set, or 0 of the non-MD INCAR
+                potim = 1.0
+                logger.warning("POTIM can't be read from INCAR, use 1.0 fs")
+
+        source = load_trajectory(file)
+        element, selected = source.element, range(len(source))[start:stop:stride]
+        number = [source.frame(index).number for index in selected[:2]]
+        dt = potim * (number[1] - number[0] if len(number) == 2 else 1)  # XDATCAR is written every NBLOCK steps
+        logger.info(f"{len(selected)} frames selected, {dt} fs between two frames")
+
+        if "rdf" in analysis:
+            accumulator = RDFAccumulator(element, r_max=r_max, bins=bins)
+            for trajectory in source.iter_arrays(start=start, stop=stop, stride=stride):
+                accumulator(trajectory.frac_coord, trajectory.lattice)
+            result = accumulator.result()
+            names = ["-".join(key) if isinstance(key, tuple) else key for key in result.g]
+            np.savetxt(f"{prefix}_rdf.dat", np.column_stack([result.r] + list(result.g.values())), fmt="%.6f",
+                       header=" ".join(["r"] + names))
+
+        if "msd" not in analysis and "vacf" not in analysis:
+            return
+
+        # stream the chunks through the unwrapper into the atom-major on-disk arrays, the correlations read them
+        # atom batch by atom batch, so the trajectory is never held in memory
+        with tempfile.TemporaryDirectory(dir=Path(file).absolute().parent) as tmp:
+            shape = (len(element), len(selected), 3)
+            cart_coord = np.lib.format.open_memmap(Path(tmp) / "position.npy", mode="w+", dtype=float, shape=shape)
+            unwrapper, index = Unwrapper(variable=source.variable), 0
+            for trajectory in source.iter_arrays(start=start, stop=stop, stride=stride):
+                count = len(trajectory.number)
+                cart_coord[:, index:index + count] = unwrapper(trajectory.frac_coord, trajectory.lattice).swapaxes(0, 1)
+                index += count
+
+            if "msd" in analysis:
+                result = msd(cart_coord.swapaxes(0, 1), element, potim=dt)
+                np.savetxt(f"{prefix}_msd.dat", np.column_stack([result.time] + list(result.msd.values())),
+                           fmt="%.6f", header=" ".join(["time(fs)"] + list(result.msd)))
+                for name, value in result.msd.items():
+                    logger.info(f"Diffusion coefficient of {name}: "
+                                f"{diffusion_coefficient(result.time, value):.4E} cm^2/s")
+
+            if "vacf" in analysis:
+                shape = (len(element), len(selected) - 1, 3)
+                velocity = np.lib.format.open_memmap(Path(tmp) / "velocity.npy", mode="w+", dtype=float, shape=shape)
+                for atom in range(len(element)):
+                    velocity[atom] = np.diff(cart_coord[atom], axis=0) / dt
+                result = vacf(velocity.swapaxes(0, 1), element, potim=dt)
+                np.savetxt(f"{prefix}_vacf.dat", np.column_stack([result.time] + list(result.vacf.values())),
+                           fmt="%.6f", header=" ".join(["time(fs)"] + list(result.vacf)))
+                del velocity
+            del cart_coord  # release the memory-mapped file before removing the directory
+
 
 class STMTask(NormalTask):
     """
@@ -1,10 +1,12 @@
 import logging
 import os
 import sys
+from collections import namedtuple
 from pathlib import Path
 
 import numpy as np
 from pandas import Series
+from scipy.signal import peak_prominences
 
 from gvasp.common.constant import RecommendPot
 
@@ -81,15 +83,58 @@ def redefine_frac(frac):
     return frac - np.floor(frac)
 
 
-def search_peak(dos_data: Series, tol: float = 0.0001):
-    extremes = []
-    for index, value in enumerate(dos_data):
-        if 0 < index < len(dos_data) - 1:
-            before_value = dos_data.values[index - 1]
-            after_value = dos_data.values[index + 1]
-            if value > before_value + tol and value > after_value + tol:
-                extremes.append(index)
-    energy_extremes = dos_data.index[extremes].values
+def find_peaks(values, tol: float = 0.0001, prominence: float = None):
+    """
+    Vectorized local-maximum search of one or many curves
+
+    Args:
+        values (np.ndarray): shape=(N,) or (NCurve, N), shorter curves can be right-padded with NaN
+        tol (float): a peak must exceed both of its neighbours by more than tol
+        prominence (float): drop the peaks whose prominence is lower than it, default: keep all peaks
+
+    Returns:
+        mask (np.ndarray): bool, the same shape as values, True at the peaks
+    """
+    values = np.asarray(values, dtype=float)
+    mask = np.zeros(values.shape, dtype=bool)
+    centre = values[..., 1:-1]
+    mask[..., 1:-1] = (centre > values[..., :-2] + tol) & (centre > values[..., 2:] + tol)  # NaN compares False
+
+    if prominence is not None:
+        for row, peaks in zip(values.reshape(-1, values.shape[-1]), mask.reshape(-1, values.shape[-1])):
+            index = np.flatnonzero(peaks)
+            if len(index):
+                row = row[:np.count_nonzero(~np.isnan(row))]
+                peaks[index] = peak_prominences(row, index)[0] >= prominence
+    return mask
+
+
+def search_peaks(energies: list, curves: list, tol: float = 0.0001, prominence: float = None):
+    """
+    Search the peaks of many curves in one call, the curves may have different lengths
+
+    Args:
+        energies (list): energy points of each curve
+        curves (list): values of each curve
+        tol (float): see find_peaks
+        prominence (float): see find_peaks
+
+    Returns:
+        peaks (list): namedtuple Peak(energy, index) of each curve, both are np.ndarray in ascending energy
+    """
+    lengths = [len(curve) for curve in curves]
+    values = np.full((len(curves), max(lengths, default=0)), np.nan)
+    for row, curve in zip(values, curves):
+        row[:len(curve)] = curve
+    mask = find_peaks(values, tol=tol, prominence=prominence)
+
+    Peak = namedtuple("Peak", ("energy", "index"))
+    return [Peak(np.asarray(energy)[index], index) for energy, index in
+            zip(energies, map(np.flatnonzero, mask))]
+
+
+def search_peak(dos_data: Series, tol: float = 0.0001, prominence: float = None):
+    energy_extremes = dos_data.index.values[find_peaks(dos_data.values, tol=tol, prominence=prominence)]
     return energy_extremes
 
 
@@ -12,14 +12,15 @@ from typing import Iterable
 from gvasp.common.error import ArgsNotRegisteredError
 from gvasp.common.calculator import surface_energy, electrostatic_energy, thermo_adsorbent
 from gvasp.common.constant import RED, RESET, Version, Platform, GREEN, YELLOW, LOGO, BOLD
+from gvasp.common.database import ResultIndex
 from gvasp.common.figure import Figure
-from gvasp.common.file import POTENTIAL
+from gvasp.common.file import POTENTIAL, OUTCAR, TrajFile
 from gvasp.common.logger import init_root_logger
 from gvasp.common.plot import PlotOpt, PlotBand, PlotNEB, PlotPES, DOSData, PlotEPotential, PostDOS
 from gvasp.common.setting import ConfigManager, RootDir, HomeDir
 from gvasp.common.task import OptTask, ConTSTask, ChargeTask, DOSTask, FreqTask, MDTask, STMTask, NEBTask, DimerTask, \
     SequentialTask, OutputTask, WorkFuncTask
-from gvasp.common.utils import colors_generator
+from gvasp.common.utils import colors_generator, identify_atoms
 
 logger = logging.getLogger(__name__)
 
@@ -85,12 +86,41 @@ def main_parser() -> argparse.ArgumentParser:
     movie_parser.add_argument("task", choices=["opt", "con-TS", "freq", "md", "neb", "dimer"], type=str,
                               help='specify job type for movie')
     movie_parser.add_argument("-n", "--name", default="movie.arc", type=str, help='specify name of *.arc')
+    xdat_movie_group = movie_parser.add_argument_group(title='opt/con-TS/md/dimer-task')
+    xdat_movie_group.add_argument("--start", type=int, help='specify the first frame')
+    xdat_movie_group.add_argument("--stop", type=int, help='specify the stop frame (excluded)')
+    xdat_movie_group.add_argument("--stride", default=1, type=int, help='keep one frame of every `stride` frames')
+    xdat_movie_group.add_argument("--traj", default="XDATCAR", type=str,
+                                  help='specify the trajectory, XDATCAR or the gvasp binary trajectory')
     freq_movie_group = movie_parser.add_argument_group(title='freq-task')
     freq_movie_group.add_argument("-f", "--freq", default='image', help='specify freq index')
     neb_movie_group = movie_parser.add_argument_group(title='neb-task')
     neb_movie_group.add_argument("-p", "--pos", default='CONTCAR', help='which type of file to generate neb movie')
     movie_parser.set_defaults(which="movie")
 
+    # md-analysis parser
+    md_parser = subparsers.add_parser(name="md-analysis", help="RDF, MSD and VACF of the MD trajectory")
+    md_parser.add_argument("-f", "--file", default="XDATCAR", type=str,
+                           help="specify the trajectory, XDATCAR or the gvasp binary trajectory")
+    md_parser.add_argument("-a", "--analysis", nargs="+", choices=["rdf", "msd", "vacf"], default=["rdf", "msd", "vacf"],
+                           help="specify the analysis, default: all")
+    md_parser.add_argument("--potim", type=float, help="specify the MD time step (fs), default: POTIM in INCAR")
+    md_parser.add_argument("--start", type=int, help="specify the first frame")
+    md_parser.add_argument("--stop", type=int, help="specify the stop frame (excluded)")
+    md_parser.add_argument("--stride", default=1, type=int, help="keep one frame of every `stride` frames")
+    md_parser.add_argument("--r-max", type=float, help="specify the RDF cutoff, default: half width of the cell")
+    md_parser.add_argument("--bins", default=200, type=int, help="specify the number of RDF bins")
+    md_parser.add_argument("-o", "--output", default="md", type=str, help="specify the prefix of the output files")
+    md_parser.set_defaults(which="md-analysis")
+
+    # traj parser
+    traj_parser = subparsers.add_parser(name="traj", help="convert XDATCAR to the compact binary trajectory")
+    traj_parser.add_argument("-f", "--file", default="XDATCAR", type=str, help="specify the XDATCAR")
+    traj_parser.add_argument("--outcar", default="OUTCAR", type=str,
+                             help="specify the OUTCAR to read the energy and temperature, skipped if not exists")
+    traj_parser.add_argument("-n", "--name", default="md.gtraj", type=str, help="specify the name of the trajectory")
+    traj_parser.set_defaults(which="traj")
+
     # sort parser
     sort_parser = subparsers.add_parser(name="sort", help="sort two POSCAR for neb task submit")
     sort_parser.add_argument("-ini", "--ini_poscar", type=str, help='specify ini poscar for neb task')
@@ -111,6 +141,9 @@ def main_parser() -> argparse.ArgumentParser:
     # band-center parser
     band_center_parser = subparsers.add_parser(name="band-center", help="calculate the band-center of the DOS")
     band_center_parser.add_argument("-j", "--json", type=str, help='*.json file to quick setting', required=True)
+    band_center_parser.add_argument("--all-atoms", action="store_true",
+                                    help="calculate the band-center of each atom in `atoms` (default: all atoms)")
+    band_center_parser.add_argument("-o", "--output", type=str, help="write the band-center table to *.json or *.csv")
     band_center_parser.set_defaults(which="band-center")
 
     # sum parser
@@ -139,8 +172,28 @@ def main_parser() -> argparse.ArgumentParser:
     electrostatic_calc_group.add_argument("-w", "--workdir", default=".", help="specify the workdir")
     thermo_calc_group = calc_parser.add_argument_group(title='thermo correction')
     thermo_calc_group.add_argument("-t", "--temperature", type=float, default=298.15, help="specify the temperature")
+    thermo_calc_group.add_argument("--hessian", action="store_true",
+                                   help="recompute the frequencies from the SECOND DERIVATIVES in OUTCAR")
+    thermo_calc_group.add_argument("--mass", nargs="+", type=str,
+                                   help="isotope substitution for --hessian, e.g., H=2.014 12=18.0 (element or atom)")
+    thermo_calc_group.add_argument("--project", action="store_true",
+                                   help="project out the translational modes for --hessian")
     calc_parser.set_defaults(which="calc")
 
+    # index parser
+    index_parser = subparsers.add_parser(name="index", help="index the calculation results of a project")
+    index_parser.add_argument("-w", "--workdir", default=".", type=str, help="specify the project directory")
+    index_parser.add_argument("-q", "--query", choices=["unfinished", "lowest"], type=str,
+                              help="query the unfinished jobs or the lowest energy per composition")
+    index_parser.add_argument("-t", "--type", type=str, help="filter the query by task type, e.g. opt")
+    index_parser.set_defaults(which="index")
+
+    # perf parser
+    perf_parser = subparsers.add_parser(name="perf", help="report the performance profile of jobs from OUTCAR")
+    perf_parser.add_argument("-w", "--workdir", nargs="+", default=["."], type=str,
+                             help="specify the job directories, the per-step profile is shown for a single one")
+    perf_parser.set_defaults(which="perf")
+
     return parser
 
 
@@ -336,7 +389,8 @@ def main(argv=None):
                             }
             if args.task in normal_tasks.keys():
                 logger.info(f"`{args.task}` task movie")
-                normal_tasks[args.task](name=args.name)
+                normal_tasks[args.task](name=args.name, start=args.start, stop=args.stop, stride=args.stride,
+                                        file=args.traj)
 
             if args.task == 'freq':
                 FreqTask.movie(freq=args.freq)
@@ -344,6 +398,14 @@ def main(argv=None):
             if args.task == 'neb':
                 NEBTask.movie(name=args.name, file=args.pos)
 
+        elif args.which == 'md-analysis':  # MD analysis task
+            MDTask.analysis(file=args.file, potim=args.potim, analysis=args.analysis, start=args.start, stop=args.stop,
+                            stride=args.stride, r_max=args.r_max, bins=args.bins, prefix=args.output)
+
+        elif args.which == 'traj':  # binary trajectory task
+            TrajFile.write(name=args.name, xdatcar=args.file, outcar=args.outcar)
+            logger.info(f"Trajectory has been saved as `{args.name}`")
+
         elif args.which == 'sort':  # sort task
             if args.ini_poscar is None or args.fni_poscar is None:
                 raise AttributeError(None, "ini_poscar and fni_poscar arguments must be set!")
@@ -376,7 +438,7 @@ def main(argv=None):
                 plotter.plot()
             elif args.task == 'band':
                 plotter = PlotBand(**arguments)
-                plotter.plot()
+                plotter.plot(color=None if color_lack else colors)
             elif args.task == 'dos':
                 if not isinstance(arguments['dos_file'], list) or not isinstance(arguments['pos_file'], list):
                     raise TypeError("`dos_file` and `pos_file` arguments should be a list")
@@ -393,6 +455,7 @@ def main(argv=None):
                 del arguments['pos_file']
                 del arguments['data']
 
+                arguments.setdefault("cache", True)  # the binary DOS cache speeds up the re-plot of the same json
                 poster = PostDOS(dos_files=dos_files, pos_files=pos_files, **arguments)
                 poster.plot(selector=selector)
 
@@ -454,8 +517,26 @@ def main(argv=None):
             del arguments['ISPIN']
             del arguments['LORBIT']
 
-            post_dos = PostDOS(dos_files=dos_files, pos_files=pos_files, LORBIT=LORBIT, ISPIN=ISPIN)
-            post_dos.center(arguments)
+            post_dos = PostDOS(dos_files=dos_files, pos_files=pos_files, LORBIT=LORBIT, ISPIN=ISPIN,
+                               cache=arguments.pop("cache", True))
+            if args.all_atoms or "selectors" in arguments or args.output:
+                if args.all_atoms:  # one selection per atom
+                    atoms = identify_atoms(arguments.get("atoms", None), post_dos.managers[0].elements)
+                    selectors = [{"atoms": atom, "orbitals": arguments.get("orbitals", None)} for atom in atoms]
+                else:
+                    selectors = arguments.get("selectors", [arguments])
+                rows = post_dos.band_centers(selectors, xlim=arguments.get("xlim", None))
+                if args.output:
+                    PostDOS.write_centers(rows, args.output)
+                    logger.info(f"Band-center table has been saved as `{args.output}`")
+                else:
+                    print(f"{'atoms':<20s}{'orbitals':>10s}{'electrons':>12s}{'center':>10s}{'width':>10s}")
+                    for row in rows:
+                        orbitals = row['orbitals'] if isinstance(row['orbitals'], str) else ' '.join(row['orbitals'])
+                        print(f"{' '.join(map(str, row['atoms'])):<20s}{orbitals:>10s}"
+                              f"{row['electrons']:>12.4f}{row['center']:>10.4f}{row['width']:>10.4f}")
+            else:
+                post_dos.center(arguments)
 
         elif args.which == 'sum':  # sum task
             ChargeTask.sum()
@@ -472,4 +553,45 @@ def main(argv=None):
             elif args.task == 1:
                 electrostatic_energy(atoms=args.atoms, workdir=args.workdir)
             elif args.task == 2:
-                thermo_adsorbent(temperature=args.temperature)
+                frequency = None
+                if args.hessian:  # partial Hessian of `--atoms`, isotope `--mass`
+                    atoms = [int(item) if item.isdigit() else item for item in args.atoms] if args.atoms else None
+                    mass = {(int(key) if key.isdigit() else key): float(value) for key, value in
+                            [item.split("=") for item in args.mass]} if args.mass else None
+                    frequency = OUTCAR("OUTCAR").normal_modes(atoms=atoms, mass=mass, project=args.project)
+                thermo_adsorbent(temperature=args.temperature, frequency=frequency)
+
+        elif args.which == 'perf':  # performance report task
+            reports = []  # each OUTCAR is parsed once, an unparsable one is skipped
+            for workdir in args.workdir:
+                try:
+                    outcar = OUTCAR(Path(workdir) / "OUTCAR")
+                    reports.append((workdir, outcar.performance(), outcar.timing))
+                except Exception as error:
+                    logger.warning(f"{workdir}/OUTCAR can't be parsed, skipped: {error!r}")
+
+            if len(args.workdir) == 1 and len(reports):
+                perf = reports[0][1]
+                print(f"{'step':>6s}{'SCF':>6s}{'wall(s)':>12s}{'wall/SCF(s)':>14s}")
+                for step, (scf, wall, wall_per_scf) in enumerate(zip(perf.scf, perf.wall, perf.wall_per_scf)):
+                    print(f"{step + 1:>6d}{scf:>6d}{wall:>12.2f}{wall_per_scf:>14.3f}")
+            print(f"{'directory':<40s}{'steps':>6s}{'SCF/step':>10s}{'wall/step(s)':>14s}{'wall/SCF(s)':>13s}"
+                  f"{'total(h)':>10s}{'remain(h)':>11s}{'memory(MB)':>12s}")
+            for workdir, perf, timing in reports:
+                memory = timing.max_memory if timing.max_memory is not None else timing.memory
+                print(f"{workdir:<40s}{len(perf.wall):>6d}{perf.scf.mean() if len(perf.scf) else 0:>10.1f}"
+                      f"{perf.wall.mean() if len(perf.wall) else 0:>14.2f}"
+                      f"{perf.wall.sum() / max(perf.scf.sum(), 1):>13.3f}{perf.total / 3600:>10.2f}"
+                      f"{perf.remaining / 3600:>11.2f}{(memory or 0) / 1024:>12.1f}")
+
+        elif args.which == 'index':  # index task
+            with ResultIndex(root=args.workdir) as index:
+                index.refresh()
+                if args.query == "unfinished":
+                    print(f"{'directory':<50s}{'task':>10s}{'formula':>20s}{'steps':>8s}")
+                    for directory, task, formula, steps in index.unfinished(task=args.type):
+                        print(f"{directory:<50s}{str(task):>10s}{str(formula):>20s}{str(steps):>8s}")
+                elif args.query == "lowest":
+                    print(f"{'formula':<20s}{'directory':<50s}{'energy':>16s}")
+                    for formula, directory, energy in index.lowest_energy(task=args.type):
+                        print(f"{str(formula):<20s}{directory:<50s}{energy:>16.6f}")
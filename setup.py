@@ -44,8 +44,7 @@ setup(
         'scipy',
         'pytest',
         'seekpath'],
-    ext_modules=cythonize([Extension(name='gvasp.lib.dos_cython', sources=['extension/dos_cython.pyx']),
-                           Extension(name='gvasp.lib.path_cython', sources=['extension/path_cython.pyx'])],
+    ext_modules=cythonize([Extension(name='gvasp.lib.path_cython', sources=['extension/path_cython.pyx'])],
                           language_level=3) +
                 [Extension(name='gvasp.lib.file_bind', sources=['extension/file_bind.cpp',
                                                                 'extension/file_lib.cpp'],
@@ -0,0 +1,58 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from gvasp.common.database import ResultIndex
+from gvasp.common.setting import RootDir
+
+TestDir = Path(RootDir).parent / "tests"
+
+
+@pytest.fixture()
+def project(tmp_path):
+    (tmp_path / "opt").mkdir()
+    shutil.copy(TestDir / "OUTCAR", tmp_path / "opt")
+    shutil.copy(TestDir / "CONTCAR", tmp_path / "opt")
+    (tmp_path / "freq").mkdir()
+    shutil.copy(TestDir / "freq" / "OUTCAR", tmp_path / "freq")
+    with open(tmp_path / "freq" / "INCAR", "w") as f:
+        f.write("  IBRION = 5 \n  NSW = 1 \n")
+    return tmp_path
+
+
+class TestResultIndex(object):
+    def test_refresh(self, project):
+        with ResultIndex(root=project) as index:
+            assert index.refresh() == (2, 0)
+            assert index.refresh() == (0, 0)
+
+            (project / "opt" / "OUTCAR").touch()
+            assert index.refresh() == (1, 0)
+
+            shutil.rmtree(project / "freq")
+            assert index.refresh() == (0, 1)
+
+    def test_query(self, project):
+        with ResultIndex(root=project) as index:
+            index.refresh()
+            assert [row[0] for row in index.unfinished(task="freq")] == ["freq"]
+            lowest = index.lowest_energy()
+            assert len(lowest) == 2
+            assert all(energy is not None for _, _, energy in lowest)
+
+    def test_broken_outcar(self, project):
+        (project / "broken").mkdir()
+        with open(TestDir / "OUTCAR") as f, open(project / "broken" / "OUTCAR", "w") as g:
+            g.writelines(f.readlines()[:414])  # cut in the header, raises TypeError
+        with ResultIndex(root=project) as index:
+            assert index.refresh() == (3, 0)  # the other directories are still indexed
+            assert "broken" in [row[0] for row in index.unfinished()]
+
+    def test_task_type(self, project):
+        assert ResultIndex.task_type(project / "freq" / "INCAR") == "freq"
+        assert ResultIndex.task_type(project / "opt" / "INCAR") is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,90 @@
+import shutil
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from gvasp.common.dynamics import rdf, msd, RDFAccumulator, vacf, unwrap, half_width, Unwrapper
+from gvasp.common.file import XDATCAR
+from gvasp.common.setting import RootDir
+
+TestDir = Path(RootDir).parent / "tests"
+
+
+class TestRDF(object):
+    def test_triclinic(self):
+        rng = np.random.default_rng(0)
+        lattice = np.array([[10., 0., 0.], [3., 9., 0.], [1., 2., 11.]])
+        frac_coord = rng.random((3, 12, 3))
+        element = ["A"] * 4 + ["B"] * 8
+        result = rdf(frac_coord, lattice, element, bins=20)
+        assert list(result.g) == [("A", "A"), ("A", "B"), ("B", "B"), "total"]
+
+        # brute force over the neighbouring images
+        r_max = half_width(lattice)
+        shifts = np.array(list(product([-2, -1, 0, 1, 2], repeat=3)))
+        count = np.zeros(20)
+        for frame in frac_coord:
+            for i in range(4):
+                for j in range(4, 12):
+                    distance = np.linalg.norm((frame[j] - frame[i] + shifts) @ lattice, axis=-1)
+                    count += np.histogram(distance, bins=20, range=(0, r_max))[0]
+        shell = 4 / 3 * np.pi * np.diff(np.linspace(0, r_max, 21) ** 3)
+        assert np.allclose(result.g[("A", "B")], count / (4 * 8 * 3 / np.linalg.det(lattice) * shell))
+
+    def test_xdatcar(self, tmp_path):
+        trajectory = XDATCAR(shutil.copy(TestDir / "XDATCAR", tmp_path / "XDATCAR")).to_array(stride=5)
+        result = rdf(trajectory.frac_coord, trajectory.lattice, trajectory.element, r_max=3., bins=30)
+        assert result.r.shape == (30,) and np.all(result.g["total"][:5] == 0)  # no atoms overlap
+
+    def test_accumulator(self, tmp_path):
+        trajectory = XDATCAR(shutil.copy(TestDir / "XDATCAR", tmp_path / "XDATCAR")).to_array()
+        whole = rdf(trajectory.frac_coord, trajectory.lattice, trajectory.element, r_max=3., bins=30)
+        accumulator = RDFAccumulator(trajectory.element, r_max=3., bins=30, batch=3)
+        for start in range(0, len(trajectory.number), 7):
+            accumulator(trajectory.frac_coord[start:start + 7].astype(np.float32), trajectory.lattice[start:start + 7])
+        result = accumulator.result()
+        assert all(np.allclose(result.g[key], whole.g[key]) for key in whole.g)
+
+
+class TestCorrelation(object):
+    def test_msd(self):
+        rng = np.random.default_rng(0)
+        cart_coord = np.cumsum(rng.normal(size=(100, 5, 3)), axis=0)
+        result = msd(cart_coord, ["A"] * 2 + ["B"] * 3, potim=0.5)
+        brute = [np.mean(np.sum((cart_coord[m:] - cart_coord[:100 - m]) ** 2, axis=-1)) for m in range(100)]
+        assert np.allclose(result.msd["total"], brute) and result.time[2] == 1.
+
+    def test_vacf(self):
+        rng = np.random.default_rng(0)
+        velocity = rng.normal(size=(50, 5, 3))
+        result = vacf(velocity, ["A"] * 5, normalize=False)
+        brute = [np.mean(np.sum(velocity[m:] * velocity[:50 - m], axis=-1)) for m in range(50)]
+        assert np.allclose(result.vacf["A"], brute)
+
+
+class TestUnwrapper(object):
+    def test_unwrap(self):
+        frac_coord = np.array([[[0.9, 0.5, 0.5]], [[0.05, 0.5, 0.5]], [[0.95, 0.5, 0.5]]])
+        assert np.allclose(unwrap(frac_coord)[:, 0, 0], [0.9, 1.05, 0.95])
+
+    def test_stream(self):
+        rng = np.random.default_rng(0)
+        lattice = np.array([[10., 0., 0.], [3., 9., 0.], [1., 2., 11.]])
+        cart_coord = np.cumsum(rng.normal(scale=0.5, size=(200, 4, 3)), axis=0)
+        wrapped = (cart_coord @ np.linalg.inv(lattice)) % 1
+
+        unwrapped = unwrap(wrapped, lattice)
+        assert np.allclose(unwrapped - unwrapped[0], cart_coord - cart_coord[0])
+
+        # chunk by chunk, fixed and variable cell
+        unwrapper = Unwrapper()
+        assert np.allclose(np.concatenate([unwrapper(block, lattice) for block in np.array_split(wrapped, 7)]),
+                           unwrapped)
+        lattices = np.broadcast_to(lattice, (200, 3, 3))
+        unwrapper = Unwrapper(variable=True)
+        assert np.allclose(np.concatenate([unwrapper(block, matrix) for block, matrix in
+                                           zip(np.array_split(wrapped, 7), np.array_split(lattices, 7))]), unwrapped)
+        with pytest.raises(ValueError):
+            Unwrapper(variable=True)(wrapped)
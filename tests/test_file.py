@@ -3,11 +3,12 @@ import os
 import shutil
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from gvasp.common.error import PotDirNotExistError, ParameterError, AnimationError, FrequencyError
-from gvasp.common.file import EIGENVAL, OUTCAR
-from gvasp.common.file import MODECAR
+from gvasp.common.file import DOSCAR, EIGENVAL, OUTCAR
+from gvasp.common.file import MODECAR, ARCFile, TrajFile, load_trajectory, OSZICAR, VASPRUN, PROCAR
 from gvasp.common.file import MetaFile, XDATCAR, StructInfoFile, CellFile, POSCAR, SubmitFile, XSDFile, INCAR, POTCAR, \
     CHGBase, AECCAR0, AECCAR2
 from gvasp.common.setting import RootDir
@@ -21,20 +22,22 @@ def setup_module():
 
 
 class TestMetaFile(object):
-    file = XDATCAR("XDATCAR")
+    @pytest.fixture()
+    def file(self, tmp_path):
+        return XDATCAR(shutil.copy("XDATCAR", tmp_path / "XDATCAR"))  # the frame index is written beside the copy
 
     def test_new(self):
         with pytest.raises(TypeError):
             MetaFile("XDATCAR")
 
-    def test_getitem(self):
-        logger.info(self.file[0])
+    def test_getitem(self, file):
+        logger.info(file[0])
 
-    def test_repr(self):
-        logger.info(self.file)
+    def test_repr(self, file):
+        logger.info(file)
 
-    def test_type(self):
-        logger.info(self.file.type)
+    def test_type(self, file):
+        logger.info(file.type)
 
 
 class TestStructInfoFile(object):
@@ -121,11 +124,223 @@ class TestCHGBase(object):
         aeccar2 + aeccar0
 
 
+class TestXDATCAR(object):
+    def test_iter_frames(self, tmp_path):
+        xdatcar = XDATCAR(shutil.copy("XDATCAR", tmp_path / "XDATCAR"))
+        assert len(xdatcar) == 75 and not xdatcar.variable
+        assert xdatcar.index_name.exists()
+
+        frames = list(xdatcar.iter_frames(10, 20, 3))
+        assert [frame.number for frame in frames] == [11, 14, 17, 20]
+        assert np.array_equal(frames[-1].frac_coord, xdatcar.frame(19).frac_coord)
+        assert xdatcar.frame(-1).index == 74 and xdatcar.frame(0).frac_coord.shape == (len(xdatcar.element), 3)
+
+        structure = next(xdatcar.iter_frames(start=19, structure=True))
+        assert np.allclose(structure.atoms.frac_coord, frames[-1].frac_coord % 1)  # wrapped by Atoms
+        assert isinstance(XDATCAR(tmp_path / "XDATCAR").offsets, np.memmap)  # from the on-disk index
+
+    def test_to_array(self, tmp_path):
+        xdatcar = XDATCAR(shutil.copy("XDATCAR", tmp_path / "XDATCAR"))
+        trajectory = xdatcar.to_array(stride=5, start=2)
+        assert trajectory.frac_coord.shape == (15, len(xdatcar.element), 3)
+        assert trajectory.lattice.shape == (15, 3, 3) and np.array_equal(trajectory.lattice[0], xdatcar.lattice.matrix)
+        assert np.array_equal(trajectory.number, np.arange(3, 76, 5))
+        assert np.array_equal(trajectory.frac_coord[-1], xdatcar.frame(72).frac_coord)
+
+        # variable-cell (NpT) XDATCAR: the header is repeated before each frame
+        with open("XDATCAR") as f:
+            head = [f.readline() for _ in range(7)]
+        with open(tmp_path / "XDATCAR_NpT", "w") as f:
+            for frame in xdatcar.iter_frames(stop=4):
+                lattice = "".join(f"{a:12.6f}{b:12.6f}{c:12.6f}\n" for a, b, c in frame.lattice * (1 + frame.index / 100))
+                coord = "".join(f"{a:12.8f}{b:12.8f}{c:12.8f}\n" for a, b, c in frame.frac_coord)
+                f.write("".join(head[:2]) + lattice + "".join(head[5:]) + f"Direct configuration= {frame.number:5d}\n" +
+                        coord)
+        npt = XDATCAR(tmp_path / "XDATCAR_NpT")
+        trajectory = npt.to_array()
+        assert npt.variable and trajectory.frac_coord.shape == (4, len(xdatcar.element), 3)
+        assert np.allclose(trajectory.lattice[3], xdatcar.lattice.matrix * 1.03, atol=1E-06)
+        assert np.allclose(trajectory.frac_coord[2], xdatcar.frame(2).frac_coord)
+        assert np.allclose(npt.frame(3).lattice, trajectory.lattice[3])
+
+    def test_movie(self, tmp_path):
+        xdatcar = XDATCAR(shutil.copy("XDATCAR", tmp_path / "XDATCAR"))
+        xdatcar.movie(name=tmp_path / "movie.arc", start=3, stop=60, stride=7)
+        with open(tmp_path / "movie.arc") as f:
+            lines = f.readlines()
+        assert lines[:2] == ["!BIOSYM archive 3\n", "PBC=ON\n"]
+        assert sum(line.startswith("PBC ") for line in lines) == len(range(75)[3:60:7])
+
+        # streaming blocks give the same frames as the whole coordinate array
+        trajectory = xdatcar.to_array(start=3, stop=60, stride=7)
+        ARCFile.write_coord(name=tmp_path / "whole.arc", coord=trajectory.frac_coord % 1, element=xdatcar.element,
+                            lattice=xdatcar.lattice, coord_type="frac")
+        with open(tmp_path / "whole.arc") as f:
+            assert [line for line in f if not line.startswith("!DATE")] == \
+                   [line for line in lines if not line.startswith("!DATE")]
+
+
+class TestTrajFile(object):
+    def test_write(self, tmp_path):
+        name = shutil.copy("XDATCAR", tmp_path / "XDATCAR")
+        assert TrajFile.write(tmp_path / "md.gtraj", xdatcar=name, outcar="OUTCAR")
+        trajectory, xdatcar = load_trajectory(tmp_path / "md.gtraj"), XDATCAR(name)
+        assert isinstance(trajectory, TrajFile) and isinstance(load_trajectory(name), XDATCAR)
+        assert len(trajectory) == len(xdatcar) and trajectory.element == xdatcar.element
+
+        assert np.allclose(trajectory.frame(-3).frac_coord, xdatcar.frame(-3).frac_coord, atol=1E-06)
+        array, reference = trajectory.to_array(stride=7, start=3), xdatcar.to_array(stride=7, start=3)
+        assert array.frac_coord.dtype == np.float32  # views of the mapped records
+        assert np.allclose(array.frac_coord, reference.frac_coord, atol=1E-06)
+        assert np.array_equal(array.number, reference.number)
+
+        energy = OUTCAR("OUTCAR").energy  # one energy per ionic step
+        assert np.allclose(trajectory.energy[:len(energy)], energy) and np.isnan(trajectory.energy[len(energy):]).all()
+        assert np.isnan(trajectory.temperature).all()  # not a MD OUTCAR
+
+        structure = trajectory.to_structure(5)
+        assert np.allclose(structure.atoms.frac_coord, xdatcar.frame(5).frac_coord % 1, atol=1E-06)
+        with pytest.raises(ValueError):
+            TrajFile(name)
+
+
+class TestOSZICAR(object):
+    def test_parse(self, tmp_path):
+        oszicar, outcar = OSZICAR("OSZICAR"), OUTCAR("OUTCAR")
+        assert len(oszicar) == len(outcar.energy) and np.allclose(oszicar.energy, outcar.energy)
+        assert np.array_equal(oszicar.scf, np.bincount(outcar.steps.ionic)[1:])
+        assert oszicar.mag is not None and oszicar.temperature is None
+
+        with open(tmp_path / "OSZICAR", "w") as f:  # MD
+            f.write("DAV:   1    -0.377851234567E+03   -0.37785E+03   -0.19373E+04  1176   0.132E+03\n"
+                    "     1 T=   298. E= -.37785052E+03 F= -.37817591E+03 E0= -.37817447E+03  EK= 0.30993E+00 "
+                    "SP= 0.00E+00 SK= 0.22E-04\n"
+                    "RMM:   1    -0.377851234567E+03   -0.37785E+03   -0.19373E+04  1176   0.132E+03\n"
+                    "RMM:   2    -0.377851234567E+03   -0.37785E+03   -0.19373E+04  1176   0.132E+03\n"
+                    "     2 T=   301. E= -.37785000E+03 F= -.37817000E+03 E0= -.37817400E+03  EK= 0.31000E+00 "
+                    "SP= 0.00E+00 SK= 0.22E-04\n"
+                    "RMM:   1    -0.377851234567E+03   -0.37785E+03   -0.19373E+04  1176   0.132E+03\n")
+        oszicar = OSZICAR(tmp_path / "OSZICAR")
+        assert np.array_equal(oszicar.scf, [1, 2])  # the running step is not counted
+        assert np.allclose(oszicar.temperature, [298., 301.]) and np.allclose(oszicar.kinetic_energy, [0.30993, 0.31])
+        assert np.allclose(oszicar.total_energy, [-377.85052, -377.85]) and oszicar.dE is None and oszicar.mag is None
+
+    def test_read_force(self):
+        assert np.allclose(OUTCAR.read_force("OUTCAR"), OUTCAR("OUTCAR").force)
+
+
+class TestVASPRUN(object):
+    def test_parse(self):
+        vasprun = VASPRUN("vasprun.xml")
+        assert vasprun.element == ['Ce', 'O', 'O'] and VASPRUN.read_element("vasprun.xml") == vasprun.element
+        assert len(vasprun) == 3 and np.array_equal(vasprun.scf, [3, 4, 5])
+        assert np.allclose(vasprun.energy, [-30.12, -30.22, -30.32]) and np.allclose(vasprun.free_energy[0], -30.1)
+        assert vasprun.force.shape == vasprun.position.shape == (3, 3, 3) and vasprun.stress.shape == (3, 3, 3)
+        assert vasprun.KPoint_coord.shape == (5, 3) and np.isclose(vasprun.KPoint_weight.sum(), 1.)
+        assert vasprun.eigenvalue.shape == vasprun.occupation.shape == (5, 6, 2) and vasprun.fermi == 1.5
+        assert np.all(np.diff(vasprun.eigenvalue, axis=1) >= 0)  # the bands are sorted at each k-point && spin
+
+        force = vasprun.force * vasprun.selective  # the first atom is fixed
+        assert np.allclose(vasprun.force_rms, np.sqrt((force ** 2).sum(axis=(1, 2)) / vasprun.selective.sum()))
+        assert np.allclose(vasprun.force_max, np.linalg.norm(force, axis=-1).max(axis=1))
+
+    def test_dos(self):
+        vasprun = VASPRUN("vasprun.xml")
+        energy, TDOS, LDOS, columns = vasprun.dos()
+        assert np.allclose(energy, vasprun.dos_energy - 1.5) and np.all(TDOS[:, 1] <= 0)
+        assert LDOS.shape == (3, 8, len(columns)) and vasprun.partial_dos.shape == (3, 2, 8, 9)
+
+        channel = {column: index for index, column in enumerate(columns)}
+        assert np.allclose(LDOS[..., channel['p_up']], vasprun.partial_dos[:, 0, :, 1:4].sum(axis=-1))
+        assert np.allclose(LDOS[..., channel['down']], -vasprun.partial_dos[:, 1].sum(axis=-1))
+        assert np.allclose(LDOS[..., channel['dx2_up']], vasprun.partial_dos[:, 0, :, 8])
+
+
+class TestPROCAR(object):
+    def test_parse(self):
+        procar = PROCAR("PROCAR")
+        assert (procar.ISPIN, procar.NKPoint, procar.NBand, procar.NAtom) == (2, 5, 6, 3)
+        assert procar.columns == ['s', 'py', 'pz', 'px', 'dxy', 'dyz', 'dz2', 'dxz', 'dx2']
+        assert procar.projection.shape == (2, 5, 6, 3, 9) and procar.projection.dtype == np.float32
+        assert procar.energy.shape == procar.occupation.shape == (5, 6, 2) and np.allclose(procar.KPoint_weight, 0.2)
+        assert np.allclose(procar.KPoint_coord[-1], [0., 0.5, 0.])
+        assert np.all(np.diff(procar.energy, axis=1) >= 0)  # the phase tables are not mixed into the projections
+
+    def test_select(self):
+        procar = PROCAR("PROCAR")
+        selected = PROCAR("PROCAR", atoms="O", orbitals=["s", "p", "f"], elements=["Ce", "O", "O"])
+        assert selected.atoms == [2, 3] and selected.projection.shape == (2, 5, 6, 2, 3)
+        assert np.allclose(selected.projection[..., 1], procar.projection[..., 1:, 1:4].sum(axis=-1))
+        assert np.allclose(selected.projection[..., 0], procar.projection[..., 1:, 0]) and \
+               not np.any(selected.projection[..., 2])
+
+        with pytest.raises(ValueError):
+            PROCAR("PROCAR", atoms="O", elements=["Ce", "O"])
+
+
+class TestDOSCAR(object):
+    def test_parse_block(self):
+        doscar = DOSCAR("DOSCAR_dos")
+        block = doscar._parse_block()
+        assert block.shape == (doscar.NAtom + 1, doscar.NDOS, 19)
+        assert np.all(block[1:, :, 1::2] >= 0) and np.all(block[1:, :, 2::2] <= 0)  # spin-down negated
+        assert np.allclose(block[0, :, 0], block[1, :, 0])
+
+    def test_load(self):
+        doscar = DOSCAR("DOSCAR_dos").load()
+        assert doscar.LDOS.shape == (doscar.NAtom, doscar.NDOS, len(doscar.columns))
+        p_up = [doscar.columns.index(item) for item in ['py_up', 'pz_up', 'px_up']]
+        assert np.allclose(doscar.LDOS[..., doscar.columns.index('p_up')], doscar.LDOS[..., p_up].sum(axis=-1))
+        assert np.allclose(doscar.LDOS[..., doscar.columns.index('down')], doscar.LDOS[..., 1:18:2].sum(axis=-1))
+
+    def test_cache(self, tmp_path):
+        name = shutil.copy("DOSCAR_dos", tmp_path / "DOSCAR")
+        parsed = DOSCAR(name).load(cache=True)
+        assert parsed.cache_name.exists()
+
+        cached = DOSCAR(name)
+        assert cached.read_cache() and isinstance(cached.LDOS, np.memmap)
+        assert np.array_equal(cached.LDOS, parsed.LDOS) and np.array_equal(cached.TDOS, parsed.TDOS)
+        assert cached.columns == parsed.columns
+
+        os.utime(name, ns=(0, 0))  # DOSCAR changed, the cache is outdated
+        assert not DOSCAR(name).read_cache()
+        assert not DOSCAR(name, ISPIN=1).read_cache()
+
+
 class TestEIGENVAL(object):
     def test_band_write(self):
         EIGENVAL("EIGENVAL").write()
         shutil.rmtree("band_data")
 
+    def test_parse(self, tmp_path):
+        eigenval = EIGENVAL("EIGENVAL")
+        assert eigenval.energy.shape == (eigenval.NKPoint, eigenval.NBand, 2) and eigenval.occupation is None
+        assert np.isclose(eigenval.KPoint_weight.sum(), 1., atol=1E-04)
+        assert eigenval.KPoint_label[0] == "G" and len(eigenval.KPoint_label) == eigenval.NKPoint
+        assert np.all(np.diff(eigenval.KPoint_dist) >= 0)
+
+        # ISPIN=1 with occupations, the joint X point of two segments is labeled once
+        lines = ["    2    2    1    1\n"] + ["  0\n"] * 4 + ["    8    3    2\n", "\n"]
+        for coord in ([0., 0., 0.], [0., 0.5, 0.], [0., 0.5, 0.]):
+            lines += ["  {:.7E}  {:.7E}  {:.7E}  {:.7E}\n".format(*coord, 1 / 3),
+                      "    1   -5.000000   1.000000\n", "    2    3.000000   0.000000\n", "\n"]
+        (tmp_path / "EIGENVAL").write_text("".join(lines))
+        eigenval = EIGENVAL(tmp_path / "EIGENVAL")
+        assert eigenval.energy.shape == eigenval.occupation.shape == (3, 2, 1)
+        assert np.array_equal(eigenval.occupation[:, :, 0], [[1, 0]] * 3)
+        assert eigenval.KPoint_label == ["G", "X", ""]
+        assert np.allclose(eigenval.KPoint_dist, [0., 0.5, 0.5])
+
+    @pytest.mark.parametrize("name", ["band.npz", "band.dat"])
+    def test_export(self, tmp_path, name):
+        eigenval = EIGENVAL("EIGENVAL")
+        eigenval.export(tmp_path / name)
+        band = EIGENVAL.read_export(tmp_path / name)
+        assert np.allclose(band.energy, eigenval.energy, atol=1E-06)
+        assert np.allclose(band.dist, eigenval.KPoint_dist, atol=1E-06)
+        assert band.label == eigenval.KPoint_label
+
 
 class TestOUTCAR(object):
     def test_animation_freq(self):
@@ -140,9 +355,51 @@ class TestOUTCAR(object):
             outcar = OUTCAR("freq/OUTCAR")
             outcar.animation_freq(freq="i")
 
+    def test_frequency(self):
+        outcar = OUTCAR("freq/OUTCAR")
+        frequency = outcar.frequency
+        assert frequency.coord.shape == frequency.vibration.shape == (len(frequency.image), len(outcar.element), 3)
+        assert len(frequency.wave_number) == len(frequency.vib_energy) == len(frequency.image)
+
+    def test_normal_modes(self):
+        outcar = OUTCAR("freq/OUTCAR")
+        mass = {"C": 12.011, "O": 16.000, "Ce": 140.115}  # POMASS in POTCAR
+        frequency = outcar.normal_modes(mass=np.array([mass[item] for item in outcar.element]))
+        assert frequency.image == outcar.frequency.image
+        assert np.allclose(frequency.wave_number, outcar.frequency.wave_number, atol=1E-3)
+        assert np.allclose(np.abs(frequency.vibration), np.abs(outcar.frequency.vibration), atol=1E-5)
+
+        batch = outcar.normal_modes(mass=[{}, {"O": 18.0}])
+        assert len(batch) == 2 and np.all(batch[1].wave_number < batch[0].wave_number)
+        assert len(outcar.normal_modes(atoms=[1]).wave_number) == 3
+        assert len(outcar.normal_modes(project=True).wave_number) == 3
+
+    def test_timing(self):
+        outcar = OUTCAR("OUTCAR")
+        assert outcar.timing.loop.shape == (len(outcar.steps.ionic), 2)
+        assert outcar.timing.scf.sum() == len(outcar.steps.ionic)
+
+        perf = outcar.performance()
+        assert len(perf.wall) == len(perf.scf) == outcar.steps.ionic[-1]
+        assert perf.remaining == 0.
+
     def test_bandgap(self):
         OUTCAR("OUTCAR").bandgap()
 
+    def test_band_edge(self):
+        outcar = OUTCAR("OUTCAR")
+        edge = outcar.band_edge()
+        assert outcar.eigenvalue.shape == (outcar.spin, outcar.kpoints, outcar.bands, 2)
+        assert outcar.bandgap() == ("indirect", edge.lumo.min() - edge.homo.max())
+
+        assert np.allclose(outcar.band_info.down, outcar.eigenvalue[1, ..., 0].T)
+        assert np.allclose(outcar.kpoint_info.up[0].value[:, 1:], outcar.eigenvalue[0, 0])
+
+        outcar = OUTCAR("entropy/OUTCAR")  # ISPIN = 1
+        edge = outcar.band_edge()
+        assert edge.homo.shape == (1,) and outcar.bandgap() == ("direct", edge.gap[0])
+        assert len(outcar.band_info) == 1
+
 
 class TestMODECAR:
 
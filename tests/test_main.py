@@ -56,7 +56,7 @@ class TestMain(object):
         main(["output"])
         os.remove("methane-y.xsd")
 
-    def test_movie(self):
+    def test_movie(self, tmp_path):
 
         @change_dir(directory="freq")
         def test_movie_freq(self):
@@ -66,7 +66,7 @@ class TestMain(object):
         def test_movie_neb(self):
             main(["movie", "neb"])
 
-        main(["movie", "opt"])
+        main(["movie", "opt", "--traj", str(shutil.copy("XDATCAR", tmp_path / "XDATCAR"))])
         test_movie_freq(self)
         test_movie_neb(self)
 
@@ -139,6 +139,27 @@ class TestMain(object):
     def test_entropy(self):
         main(['calc', "2", "-t", "298.15"])
 
+    @change_dir(directory="freq")
+    def test_entropy_hessian(self):
+        main(['calc', "2", "--hessian", "-a", "1", "74", "--mass", "O=18.0", "--project"])
+
+    @change_dir(directory="freq")
+    def test_index(self):
+        main(["index", "-q", "unfinished"])
+        main(["index", "-q", "lowest", "-t", "opt"])
+        os.remove(".gvasp.db")
+
+    def test_perf(self):
+        main(["perf"])
+        main(["perf", "-w", ".", "freq", "entropy"])
+        main(["perf", "-w", ".", "not_exist"])  # the unparsable workdir is skipped
+
+    def test_md_analysis(self, tmp_path):
+        xdatcar = shutil.copy("XDATCAR", tmp_path / "XDATCAR")
+        main(["md-analysis", "-f", str(xdatcar), "--potim", "0.5", "--stride", "2", "-o", str(tmp_path / "md")])
+        for name in ["md_rdf.dat", "md_msd.dat", "md_vacf.dat"]:
+            assert (tmp_path / name).exists()
+
 
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -1,9 +1,16 @@
 import os
+import re
+import shutil
+from pathlib import Path
 
+import numpy as np
 import pytest
+from matplotlib import pyplot as plt
 
-from gvasp.common.plot import PlotPES
-from gvasp.common.plot import PostDOS
+from gvasp.common.file import EIGENVAL, OUTCAR, OSZICAR, VASPRUN
+from gvasp.common.plot import DOSData, PlotBand, PlotPES, PlotOpt
+from gvasp.common.plot import PostDOS, _DOSCAR_CACHE
+from gvasp.common.setting import RootDir
 from tests.utils import change_dir
 
 
@@ -38,6 +45,54 @@ class TestPlot(object):
         plotter.save()
 
 
+@pytest.fixture()
+def smearing(tmp_path):
+    """OUTCAR && OSZICAR of tests/ with an entropy term, T*S = 0.02 eV: F = E - 0.02, E0 = E - 0.01"""
+    shift = lambda delta: lambda match: f"{match.group(1)}{float(match.group(2)) + delta:.8f}"
+    with open(f"{Path(RootDir).parent}/tests/OUTCAR") as f:
+        content = f.read()
+    content = re.sub(r"(free  energy   TOTEN  = +)(\S+)", shift(-0.02), content)
+    content = re.sub(r"(energy\(sigma->0\) = +)(\S+)", shift(-0.01), content)
+    with open(tmp_path / "OUTCAR", "w") as f:
+        f.write(content)
+
+    with open(f"{Path(RootDir).parent}/tests/OSZICAR") as f:
+        content = f.read()
+    content = re.sub(r"( F= )(\S+)", shift(-0.02), content)
+    content = re.sub(r"( E0= )(\S+)", shift(-0.01), content)
+    with open(tmp_path / "OSZICAR", "w") as f:
+        f.write(content)
+    return tmp_path
+
+
+class TestPlotOpt(object):
+    def test_smearing(self, smearing):
+        energy = np.array(PlotOpt(name=smearing / "OUTCAR").energy)  # energy without entropy
+        plotter = PlotOpt(source="OSZICAR", oszicar=smearing / "OSZICAR", plot_force=False)  # E0, energy(sigma->0)
+        assert np.allclose(plotter.energy, energy - 0.01)
+        assert np.allclose(OSZICAR(smearing / "OSZICAR").free_energy, energy - 0.02)
+
+    def test_source(self, change_test_dir):
+        reference = PlotOpt()
+        plotter = PlotOpt(source="OSZICAR")  # E0 is the energy without entropy for sigma->0
+        assert np.allclose(plotter.energy, reference.energy) and np.allclose(plotter.force, reference.force)
+        plotter.plot()
+
+        plotter = PlotOpt(name="not-exist", source="OSZICAR", plot_force=False)  # OUTCAR is not touched
+        assert plotter.force is None
+        plotter.plot()
+        plt.close("all")
+
+        plotter = PlotOpt(source="vasprun")
+        assert plotter.energy.shape == plotter.force.shape == (3,)
+        assert np.allclose(plotter.force, VASPRUN("vasprun.xml").force_max)  # max atomic force, as the OUTCAR
+        plotter.plot()
+        plt.close("all")
+
+        with pytest.raises(ValueError):
+            PlotOpt(source="XDATCAR")
+
+
 class TestPlotDOS(object):
     selector = {"0": [{"atoms": 78, "orbitals": ["s"], "color": "#098760"}],
                 "1": [{"atoms": 81, "orbitals": ["s"], "color": "#ed0345"}]}
@@ -77,12 +132,111 @@ class TestPlotDOS(object):
         poster.plot(selector=selector)
         os.remove("DOS_F0_L0")
 
+    def test_interpolate(self, change_test_dir):
+        poster = PostDOS(dos_files=["DOSCAR_dos"], pos_files=["CONTCAR_dos"], xlim=[-5, 5], dpi=50)
+        selector = {"0": [{"atoms": "C", "orbitals": ["p"], "method": "output", "interpolate": True},
+                          {"atoms": "H", "method": "output"}]}  # raw points of the full range by default
+        poster.plot(selector=selector)
+        assert len(np.loadtxt("DOS_F0_L0")) == poster.width * 50 * 2
+        assert len(np.loadtxt("DOS_F0_L1")) == poster.managers[0].energy.shape[0]
+        os.remove("DOS_F0_L0")
+        os.remove("DOS_F0_L1")
+
     @change_dir("plot_center")
     def test_ispin(self, change_test_dir):
         selector = {"0": [{"atoms": "Pt", "orbitals": ["s"], "color": "#ed0345", "method": "line"}]}
         poster = PostDOS(dos_files=["DOSCAR_ispin"], pos_files=["CONTCAR_ispin"], ISPIN=1)
         poster.plot(selector=selector)
 
+    def test_band_export(self, change_test_dir, tmp_path):
+        EIGENVAL("EIGENVAL").export(tmp_path / "band.npz")
+        plotter = PlotBand(name=tmp_path / "band.npz", type="export", ylim=[-6, 4])
+        assert plotter.energy.shape == (63, 12, 2)
+        plotter.plot()
+
+        # one LineCollection of the visible bands, one scatter of the markers and the high-symmetry lines
+        bands, markers = plt.gca().collections[:2]
+        energy_avg = plotter.energy.mean(axis=-1) - plotter.fermi
+        visible = np.count_nonzero((energy_avg.max(axis=0) >= -6) & (energy_avg.min(axis=0) <= 4))
+        assert 0 < visible < 12 and len(bands.get_segments()) == visible
+        assert len(markers.get_offsets()) == visible * 63
+
+    def test_band_vasprun(self, change_test_dir):
+        plotter = PlotBand(name="vasprun.xml", type="vasprun")
+        assert plotter.energy.shape == (5, 6, 2) and plotter.fermi == 1.5
+        assert plotter.klabel[0] != "" and plotter.klabel[-1] != ""
+        plotter.plot()
+        plt.close("all")
+
+    def test_band_outcar(self, change_test_dir):
+        outcar = OUTCAR("OUTCAR")
+        plotter = PlotBand(name="OUTCAR", type="OUTCAR")
+        assert plotter.energy.shape == (outcar.kpoints, outcar.bands, outcar.spin) and plotter.fermi == outcar.fermi
+        assert len(plotter.kcoord) == len(plotter.klabel) == outcar.kpoints
+        plotter.plot()
+        plt.close("all")
+
+    def test_band_procar(self, change_test_dir):
+        plotter = PlotBand(name="PROCAR", type="PROCAR", atoms=[2, 3], orbitals=["p"], pos_file=None)
+        assert plotter.energy.shape == (5, 6, 2) and plotter.fat_weight.shape == (5, 6)
+        plotter.plot()
+        bands, markers, fat = plt.gca().collections[:3]
+        assert len(fat.get_offsets()) == len(markers.get_offsets()) == 5 * len(bands.get_segments())
+        plt.close("all")
+
+    def test_dos_vasprun(self, change_test_dir):
+        manager = DOSData("vasprun.xml")
+        assert manager.elements == [' ', 'Ce', 'O', 'O'] and manager.atom_dos.shape[:2] == (3, 8)
+        up, down = manager.get_data(atoms="O", orbitals=["p"])[1:]
+        assert np.all(up >= 0) and np.all(down <= 0) and np.any(up > 0)
+
+    def test_load_many(self, change_test_dir, tmp_path):
+        dos_files = [shutil.copy("DOSCAR_dos", tmp_path / f"DOSCAR_{index}") for index in range(3)]
+        managers = DOSData.load_many(dos_files, ["CONTCAR_dos"] * 3, processes=2)
+        assert len(managers) == 3
+        assert all(np.array_equal(manager.atom_dos, managers[0].atom_dos) for manager in managers)
+        assert DOSData(dos_files[0], "CONTCAR_dos").atom_dos is managers[0].atom_dos  # from the cache
+        assert not managers[0].atom_dos.flags.writeable
+        assert not list(tmp_path.glob(".*.dos-cache"))  # the binary cache is opt-in
+
+    def test_cache_bound(self, change_test_dir, tmp_path, monkeypatch):
+        monkeypatch.setattr("gvasp.common.plot._DOSCAR_CACHE_SIZE", 2)
+        DOSData.clear_cache()
+        dos_files = [shutil.copy("DOSCAR_dos", tmp_path / f"DOSCAR_{index}") for index in range(3)]
+        managers = DOSData.load_many(dos_files, ["CONTCAR_dos"] * 3, processes=2)
+        assert len(managers) == 3 and len(_DOSCAR_CACHE) == 3  # not evicted by its own list
+        DOSData(dos_files[0], "CONTCAR_dos")
+        DOSData("DOSCAR_dos", "CONTCAR_dos")
+        assert len(_DOSCAR_CACHE) == 2 and str(dos_files[0]) in [key[0] for key in _DOSCAR_CACHE]
+        DOSData.clear_cache()
+        assert not len(_DOSCAR_CACHE)
+
+    def test_alignment(self, change_test_dir):
+        poster = PostDOS(dos_files=["DOSCAR_dos", "DOSCAR_dos"], pos_files=["CONTCAR_dos", "CONTCAR_dos"],
+                         align=[(0, "s"), (4, "p")])
+        first, second = poster.alignment()
+        assert first.shift == 0.
+        assert second.shift == pytest.approx(second.energy - first.energy)
+        assert poster.managers[1].energy[second.index] == second.energy
+
+        poster.prominence = 1e6
+        with pytest.raises(ValueError):
+            poster.alignment()
+
+    def test_band_centers(self, change_test_dir, tmp_path):
+        poster = PostDOS(dos_files=["DOSCAR_dos"], pos_files=["CONTCAR_dos"])
+        rows = poster.band_centers([{"atoms": index} for index in range(1, 6)] + [{"atoms": "C", "orbitals": "p"}],
+                                   xlim=[-10, 0])
+        assert len(rows) == 6
+        assert all(np.isfinite(row['center']) and row['width'] >= 0 for row in rows)
+        assert rows[-1]['electrons'] <= rows[4]['electrons']  # C p is a part of the whole C DOS
+
+        PostDOS.write_centers(rows, tmp_path / "centers.json")
+        PostDOS.write_centers(rows, tmp_path / "centers.csv")
+        assert (tmp_path / "centers.json").exists() and (tmp_path / "centers.csv").exists()
+        with pytest.raises(ValueError):
+            PostDOS.write_centers(rows, tmp_path / "centers.txt")
+
     @change_dir("plot_center")
     def test_center(self, change_test_dir):
         selector = {
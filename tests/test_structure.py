@@ -1,14 +1,48 @@
+import pickle
 import unittest
 from pathlib import Path
 
+import numpy as np
+
 from gvasp.common.setting import RootDir
 from gvasp.common.file import POSCAR
+from gvasp.common.structure import neighbour_list
 
 
 class TestStructure(unittest.TestCase):
     def test_structure(self):
         structure = POSCAR(f"{Path(RootDir).parent}/tests/POSCAR_IS_sort").structure
         structure.find_neighbour_table(neighbour_num=structure.atoms.count, sort=False, including_self=True)
+        dist = structure.neighbour_table.dist
+        self.assertEqual(dist.shape, (structure.atoms.count, structure.atoms.count))
+        self.assertTrue(np.allclose(dist, dist.T) and np.allclose(np.diag(dist), 0.))
+
+        table = pickle.loads(pickle.dumps(structure.neighbour_table))  # the CSR arrays survive a process pool
+        self.assertTrue(np.array_equal(table.dist, dist))
+
+    def test_neighbour_list(self):
+        structure = POSCAR(f"{Path(RootDir).parent}/tests/POSCAR_IS_sort").structure
+        frac_coord, matrix = np.array(structure.atoms.frac_coord), structure.lattice.matrix
+        i, j, distance, vector = neighbour_list(frac_coord, matrix, cutoff=6.)
+
+        diff = frac_coord[np.newaxis] - frac_coord[:, np.newaxis]  # brute force, all pairs at the nearest image
+        brute = np.linalg.norm((diff - np.round(diff)) @ matrix, axis=-1)
+        pair_i, pair_j = np.nonzero((brute <= 6.) & ~np.eye(len(frac_coord), dtype=bool))
+        self.assertEqual(sorted(zip(i.tolist(), j.tolist())), sorted(zip(pair_i.tolist(), pair_j.tolist())))
+        self.assertTrue(np.allclose(distance, brute[i, j]) and np.allclose(np.linalg.norm(vector, axis=1), distance))
+
+    def test_neighbour_table(self):
+        structure = POSCAR(f"{Path(RootDir).parent}/tests/POSCAR_IS_sort").structure
+        structure.find_neighbour_table()
+        table = structure.neighbour_table
+        self.assertEqual(table.dist.shape, (structure.atoms.count, 12))
+        self.assertEqual(table.dist3d.shape, (structure.atoms.count, 12, 3))
+        self.assertTrue(np.all(np.diff(table.dist, axis=1) >= 0))
+
+        structure.find_neighbour_table(neighbour_num=None, cut_radius=3.)
+        first = structure.atoms[0]
+        self.assertTrue(all(item[1] <= 3. for item in structure.neighbour_table[first]))
+        self.assertEqual(len(structure.neighbour_table[first]), np.diff(structure.neighbour_table.indptr)[0])
 
 
 if __name__ == '__main__':